@@ -24,6 +24,8 @@ from agritroller.services import (
     RS485Service,
     SchedulerService,
     Service,
+    TelemetryRollupService,
+    TelemetryService,
     TemplateService,
     VersioningService,
     WifiService,
@@ -55,9 +57,11 @@ class ServiceContainer:
             WifiService(self.context, cfg.wifi),
             PortMonitorService(self.context, cfg.port_monitor),
             LogicService(self.context),
-            ModbusScannerService(self.context),
+            ModbusScannerService(self.context, cfg.modbus_scanner),
             SchedulerService(self.context, cfg.scheduler),
             PeripheralControllerService(self.context, cfg.serial),
+            TelemetryService(self.context, cfg.telemetry),
+            TelemetryRollupService(self.context, cfg.telemetry),
             RS485Service(self.context, cfg.rs485),
             FrontendBridgeService(self.context, cfg.frontend),
             WebServerService(self.context, cfg.web, cfg.frontend),
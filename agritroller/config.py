@@ -27,6 +27,19 @@ class RS485Config:
     port: str = "/dev/ttyUSB1"
     baudrate: int = 9600
     default_template_slug: str = "default"
+    poll_enabled: bool = True
+    poll_interval: float = 1.0
+    poll_timeout: float = 0.1
+    poll_offline_interval: float = 10.0
+    device_refresh_interval: float = 5.0
+    read_max_register_gap: int = 8
+    read_max_bit_gap: int = 64
+    poll_turnaround: float = 0.005
+    poll_bus_capacity: float = 0.8
+    poll_max_stretch: float = 10.0
+    command_window: float = 0.02
+    command_timeout: float = 0.2
+    numpy_decode: bool = True
 
 
 @dataclass
@@ -35,6 +48,33 @@ class DatabaseConfig:
     echo: bool = False
 
 
+@dataclass
+class TelemetryConfig:
+    enabled: bool = True
+    flush_interval: float = 1.0
+    flush_rows: int = 500
+    max_buffer: int = 50000
+    range_max_points: int = 2000
+    range_chunk_rows: int = 4096
+    numpy_downsample: bool = True
+    rollups_enabled: bool = True
+    rollup_interval: float = 60.0
+    rollup_delay: float = 120.0
+    rollup_batch_periods: int = 60
+    retention_batch_rows: int = 2000
+    # Days to keep each tier; 0 keeps it forever.
+    raw_retention_days: float = 14.0
+    rollup_1m_retention_days: float = 90.0
+    rollup_1h_retention_days: float = 730.0
+    rollup_1d_retention_days: float = 0.0
+    # Raw samples older than archive_after_hours move from SQLite into compressed
+    # segment files; with the archive on, raw_retention_days no longer applies.
+    archive_enabled: bool = True
+    archive_dir: Path = DATA_ROOT / "telemetry"
+    archive_after_hours: float = 48.0
+    archive_retention_days: float = 365.0
+
+
 @dataclass
 class WebConfig:
     host: str = "0.0.0.0"
@@ -52,6 +92,19 @@ class PortMonitorConfig:
     poll_interval: float = 2.0
 
 
+@dataclass
+class ModbusScannerConfig:
+    default_timeout: float = 0.2
+    max_jobs: int = 50
+    max_job_age: float = 3600.0
+    archive_completed: bool = True
+    max_archived_jobs: int = 500
+    archive_interval: float = 1.0
+    progress_event_interval: float = 0.25
+    transport: str = "asyncio"
+    address_cache_ttl: float = 86400.0
+
+
 @dataclass
 class FirmwareUpdateConfig:
     firmware_dir: Path = Path("firmware")
@@ -96,7 +149,9 @@ class AppConfig:
     serial: SerialConfig = field(default_factory=SerialConfig)
     rs485: RS485Config = field(default_factory=RS485Config)
     port_monitor: PortMonitorConfig = field(default_factory=PortMonitorConfig)
+    modbus_scanner: ModbusScannerConfig = field(default_factory=ModbusScannerConfig)
     database: DatabaseConfig = field(default_factory=DatabaseConfig)
+    telemetry: TelemetryConfig = field(default_factory=TelemetryConfig)
     web: WebConfig = field(default_factory=WebConfig)
     scheduler: SchedulerConfig = field(default_factory=SchedulerConfig)
     firmware: FirmwareUpdateConfig = field(default_factory=FirmwareUpdateConfig)
@@ -150,15 +205,97 @@ def load_app_config_from_env() -> AppConfig:
     cfg.rs485.default_template_slug = os.environ.get(
         "AGRITROLLER_RS485_DEFAULT_TEMPLATE", cfg.rs485.default_template_slug
     )
+    cfg.rs485.poll_enabled = _env_bool("AGRITROLLER_RS485_POLL_ENABLED", cfg.rs485.poll_enabled)
+    cfg.rs485.poll_interval = _env_float("AGRITROLLER_RS485_POLL_INTERVAL", cfg.rs485.poll_interval)
+    cfg.rs485.poll_timeout = _env_float("AGRITROLLER_RS485_POLL_TIMEOUT", cfg.rs485.poll_timeout)
+    cfg.rs485.poll_offline_interval = _env_float(
+        "AGRITROLLER_RS485_POLL_OFFLINE_INTERVAL", cfg.rs485.poll_offline_interval
+    )
+    cfg.rs485.read_max_register_gap = _env_int("AGRITROLLER_RS485_READ_GAP", cfg.rs485.read_max_register_gap)
+    cfg.rs485.read_max_bit_gap = _env_int("AGRITROLLER_RS485_READ_BIT_GAP", cfg.rs485.read_max_bit_gap)
+    cfg.rs485.poll_bus_capacity = _env_float("AGRITROLLER_RS485_POLL_BUS_CAPACITY", cfg.rs485.poll_bus_capacity)
+    cfg.rs485.command_window = _env_float("AGRITROLLER_RS485_COMMAND_WINDOW", cfg.rs485.command_window)
+    cfg.rs485.command_timeout = _env_float("AGRITROLLER_RS485_COMMAND_TIMEOUT", cfg.rs485.command_timeout)
+    cfg.rs485.numpy_decode = _env_bool("AGRITROLLER_RS485_NUMPY_DECODE", cfg.rs485.numpy_decode)
 
     cfg.port_monitor.poll_interval = _env_float(
         "AGRITROLLER_PORT_MONITOR_INTERVAL",
         cfg.port_monitor.poll_interval,
     )
 
+    cfg.modbus_scanner.default_timeout = _env_float(
+        "AGRITROLLER_SCAN_TIMEOUT", cfg.modbus_scanner.default_timeout
+    )
+    cfg.modbus_scanner.max_jobs = _env_int("AGRITROLLER_SCAN_MAX_JOBS", cfg.modbus_scanner.max_jobs)
+    cfg.modbus_scanner.max_job_age = _env_float(
+        "AGRITROLLER_SCAN_MAX_JOB_AGE", cfg.modbus_scanner.max_job_age
+    )
+    cfg.modbus_scanner.archive_completed = _env_bool(
+        "AGRITROLLER_SCAN_ARCHIVE", cfg.modbus_scanner.archive_completed
+    )
+    cfg.modbus_scanner.max_archived_jobs = _env_int(
+        "AGRITROLLER_SCAN_MAX_ARCHIVED", cfg.modbus_scanner.max_archived_jobs
+    )
+    cfg.modbus_scanner.archive_interval = _env_float(
+        "AGRITROLLER_SCAN_ARCHIVE_INTERVAL", cfg.modbus_scanner.archive_interval
+    )
+    cfg.modbus_scanner.transport = os.environ.get("AGRITROLLER_SCAN_TRANSPORT", cfg.modbus_scanner.transport)
+    cfg.modbus_scanner.address_cache_ttl = _env_float(
+        "AGRITROLLER_SCAN_CACHE_TTL", cfg.modbus_scanner.address_cache_ttl
+    )
+
     cfg.database.path = Path(os.environ.get("AGRITROLLER_DB_PATH", cfg.database.path))
     cfg.database.echo = _env_bool("AGRITROLLER_DB_ECHO", cfg.database.echo)
 
+    cfg.telemetry.enabled = _env_bool("AGRITROLLER_TELEMETRY_ENABLED", cfg.telemetry.enabled)
+    cfg.telemetry.flush_interval = _env_float(
+        "AGRITROLLER_TELEMETRY_FLUSH_INTERVAL", cfg.telemetry.flush_interval
+    )
+    cfg.telemetry.flush_rows = _env_int("AGRITROLLER_TELEMETRY_FLUSH_ROWS", cfg.telemetry.flush_rows)
+    cfg.telemetry.max_buffer = _env_int("AGRITROLLER_TELEMETRY_MAX_BUFFER", cfg.telemetry.max_buffer)
+    cfg.telemetry.range_max_points = _env_int(
+        "AGRITROLLER_TELEMETRY_RANGE_MAX_POINTS", cfg.telemetry.range_max_points
+    )
+    cfg.telemetry.range_chunk_rows = _env_int(
+        "AGRITROLLER_TELEMETRY_RANGE_CHUNK_ROWS", cfg.telemetry.range_chunk_rows
+    )
+    cfg.telemetry.numpy_downsample = _env_bool(
+        "AGRITROLLER_TELEMETRY_NUMPY_DOWNSAMPLE", cfg.telemetry.numpy_downsample
+    )
+    cfg.telemetry.rollups_enabled = _env_bool("AGRITROLLER_TELEMETRY_ROLLUPS", cfg.telemetry.rollups_enabled)
+    cfg.telemetry.rollup_interval = _env_float(
+        "AGRITROLLER_TELEMETRY_ROLLUP_INTERVAL", cfg.telemetry.rollup_interval
+    )
+    cfg.telemetry.rollup_delay = _env_float("AGRITROLLER_TELEMETRY_ROLLUP_DELAY", cfg.telemetry.rollup_delay)
+    cfg.telemetry.rollup_batch_periods = _env_int(
+        "AGRITROLLER_TELEMETRY_ROLLUP_BATCH_PERIODS", cfg.telemetry.rollup_batch_periods
+    )
+    cfg.telemetry.retention_batch_rows = _env_int(
+        "AGRITROLLER_TELEMETRY_RETENTION_BATCH_ROWS", cfg.telemetry.retention_batch_rows
+    )
+    cfg.telemetry.raw_retention_days = _env_float(
+        "AGRITROLLER_TELEMETRY_RAW_RETENTION_DAYS", cfg.telemetry.raw_retention_days
+    )
+    cfg.telemetry.rollup_1m_retention_days = _env_float(
+        "AGRITROLLER_TELEMETRY_1M_RETENTION_DAYS", cfg.telemetry.rollup_1m_retention_days
+    )
+    cfg.telemetry.rollup_1h_retention_days = _env_float(
+        "AGRITROLLER_TELEMETRY_1H_RETENTION_DAYS", cfg.telemetry.rollup_1h_retention_days
+    )
+    cfg.telemetry.rollup_1d_retention_days = _env_float(
+        "AGRITROLLER_TELEMETRY_1D_RETENTION_DAYS", cfg.telemetry.rollup_1d_retention_days
+    )
+    cfg.telemetry.archive_enabled = _env_bool("AGRITROLLER_TELEMETRY_ARCHIVE", cfg.telemetry.archive_enabled)
+    cfg.telemetry.archive_dir = Path(
+        os.environ.get("AGRITROLLER_TELEMETRY_ARCHIVE_DIR", cfg.telemetry.archive_dir)
+    )
+    cfg.telemetry.archive_after_hours = _env_float(
+        "AGRITROLLER_TELEMETRY_ARCHIVE_AFTER_HOURS", cfg.telemetry.archive_after_hours
+    )
+    cfg.telemetry.archive_retention_days = _env_float(
+        "AGRITROLLER_TELEMETRY_ARCHIVE_RETENTION_DAYS", cfg.telemetry.archive_retention_days
+    )
+
     cfg.web.host = os.environ.get("AGRITROLLER_HOST", cfg.web.host)
     cfg.web.port = _env_int("AGRITROLLER_PORT", cfg.web.port)
     cfg.web.reload = _env_bool("AGRITROLLER_RELOAD", cfg.web.reload)
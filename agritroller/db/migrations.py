@@ -281,6 +281,150 @@ def _migration_0007_module_configs(conn: sqlite3.Connection) -> None:
     )
 
 
+def _migration_0008_scan_jobs(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scan_jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL DEFAULT 'scan',
+            status TEXT NOT NULL,
+            port TEXT,
+            started_at REAL NOT NULL,
+            finished_at REAL,
+            result_count INTEGER NOT NULL DEFAULT 0,
+            summary TEXT NOT NULL DEFAULT '{}',
+            results TEXT NOT NULL DEFAULT '[]'
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_scan_jobs_started
+        ON scan_jobs(started_at)
+        """
+    )
+
+
+def _migration_0009_scan_address_cache(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scan_address_cache (
+            port TEXT NOT NULL,
+            baudrate INTEGER NOT NULL,
+            parity TEXT NOT NULL DEFAULT 'N',
+            address INTEGER NOT NULL,
+            responded INTEGER NOT NULL,
+            checked_at REAL NOT NULL,
+            PRIMARY KEY (port, baudrate, parity, address)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_scan_address_cache_checked
+        ON scan_address_cache(checked_at)
+        """
+    )
+
+
+def _migration_0010_scan_job_checkpoints(conn: sqlite3.Connection) -> None:
+    if not _column_exists(conn, "scan_jobs", "checkpoint"):
+        conn.execute("ALTER TABLE scan_jobs ADD COLUMN checkpoint TEXT")
+
+
+def _migration_0011_telemetry(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS telemetry_points (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            device_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            UNIQUE (device_id, name)
+        )
+        """
+    )
+    # One row per sample, clustered by point and time; ``ts`` is Unix milliseconds.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS telemetry (
+            point_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            value REAL,
+            PRIMARY KEY (point_id, ts)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _migration_0012_telemetry_rollups(conn: sqlite3.Connection) -> None:
+    # Aggregates of ``period`` ms buckets starting at ``ts``, built from the next finer tier.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS telemetry_rollups (
+            point_id INTEGER NOT NULL,
+            period INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            min_value REAL,
+            max_value REAL,
+            avg_value REAL,
+            count INTEGER NOT NULL,
+            last_value REAL,
+            PRIMARY KEY (point_id, period, ts)
+        ) WITHOUT ROWID
+        """
+    )
+    # Everything before ``watermark`` has been rolled up into the tier.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS telemetry_rollup_state (
+            period INTEGER PRIMARY KEY,
+            watermark INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def _migration_0013_telemetry_segments(conn: sqlite3.Connection) -> None:
+    # Catalog of sealed segment files, one per device and UTC day.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS telemetry_segments (
+            device_id INTEGER NOT NULL,
+            start_ts INTEGER NOT NULL,
+            end_ts INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            points INTEGER NOT NULL,
+            samples INTEGER NOT NULL,
+            bytes INTEGER NOT NULL,
+            PRIMARY KEY (device_id, start_ts)
+        ) WITHOUT ROWID
+        """
+    )
+    # Raw samples before ``watermark`` live in segments, not in ``telemetry``.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS telemetry_archive_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            watermark INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def _migration_0014_telemetry_late(conn: sqlite3.Connection) -> None:
+    # Samples written behind the archive watermark, waiting to be merged into their segment.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS telemetry_late (
+            point_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            value REAL,
+            PRIMARY KEY (point_id, ts)
+        ) WITHOUT ROWID
+        """
+    )
+
+
 def get_migrations() -> List[Migration]:
     """Return ordered migrations."""
     return [
@@ -319,4 +463,39 @@ def get_migrations() -> List[Migration]:
             description="Store parsed module cfg definitions",
             handler=_migration_0007_module_configs,
         ),
+        Migration(
+            id="0008_scan_jobs",
+            description="Archive finished RS-485 scan jobs",
+            handler=_migration_0008_scan_jobs,
+        ),
+        Migration(
+            id="0009_scan_address_cache",
+            description="Remember which RS-485 addresses answered recent scans",
+            handler=_migration_0009_scan_address_cache,
+        ),
+        Migration(
+            id="0010_scan_job_checkpoints",
+            description="Persist checkpoints of paused RS-485 scan jobs",
+            handler=_migration_0010_scan_job_checkpoints,
+        ),
+        Migration(
+            id="0011_telemetry",
+            description="Store sensor and actuator readings",
+            handler=_migration_0011_telemetry,
+        ),
+        Migration(
+            id="0012_telemetry_rollups",
+            description="Store 1m/1h/1d telemetry aggregates",
+            handler=_migration_0012_telemetry_rollups,
+        ),
+        Migration(
+            id="0013_telemetry_segments",
+            description="Catalog compressed telemetry archive segments",
+            handler=_migration_0013_telemetry_segments,
+        ),
+        Migration(
+            id="0014_telemetry_late",
+            description="Queue telemetry that arrives behind the archive watermark",
+            handler=_migration_0014_telemetry_late,
+        ),
     ]
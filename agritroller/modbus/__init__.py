@@ -0,0 +1,15 @@
+"""Modbus RTU protocol helpers shared by the scanner and pollers."""
+
+from .crc import append_crc, check_crc, check_frames, crc16
+from .framing import RTUFrameParser, inter_frame_gap, parse_exception, read_frame
+
+__all__ = [
+    "RTUFrameParser",
+    "append_crc",
+    "check_crc",
+    "check_frames",
+    "crc16",
+    "inter_frame_gap",
+    "parse_exception",
+    "read_frame",
+]
@@ -0,0 +1,245 @@
+"""Identify Modbus slaves by probing registers declared in module configs."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+READ_FUNCTIONS = {
+    "coil": 1,
+    "discrete_input": 2,
+    "holding_register": 3,
+    "input_register": 4,
+}
+
+
+class Probe(NamedTuple):
+    """One single-register read: Modbus read function and register address."""
+
+    function: int
+    address: int
+
+
+# ``True`` for a normal reply, ``False`` for an exception reply (register not
+# mapped) and ``None`` when the slave stayed silent.
+ProbeFn = Callable[[Probe], Awaitable[Optional[bool]]]
+
+
+@dataclass(frozen=True)
+class Signature:
+    slug: str
+    kind: str
+    probes: FrozenSet[Probe]
+
+
+@dataclass
+class FingerprintMatch:
+    slug: Optional[str]
+    kind: Optional[str]
+    score: int
+    candidates: List[str]
+    probes: Dict[Probe, Optional[bool]] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "slug": self.slug,
+            "kind": self.kind,
+            "score": self.score,
+            "candidates": self.candidates,
+            "probes": len(self.probes),
+        }
+
+
+def _register_probes(registers: Iterable[Mapping[str, Any]]) -> List[Probe]:
+    probes: List[Probe] = []
+    for register in registers:
+        function = READ_FUNCTIONS.get(str(register.get("register_type")))
+        try:
+            address = int(register["address"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if function is not None:
+            probes.append(Probe(function, address))
+    return probes
+
+
+def signatures_from_records(
+    modules: Iterable[Mapping[str, Any]],
+    module_types: Iterable[Mapping[str, Any]] = (),
+) -> List[Signature]:
+    """Build signatures from ``ModuleConfigService`` records.
+
+    A module's signature covers its own registers, the registers inherited
+    from its module type and those of its sensors and actuators. Module types
+    get a signature of their own so a slave that only exposes the shared
+    service registers is still labelled with its family.
+    """
+
+    signatures: List[Signature] = []
+    for record in module_types:
+        content = record.get("content") or {}
+        probes = frozenset(_register_probes(content.get("registers") or []))
+        if probes:
+            signatures.append(Signature(str(record["slug"]), "module_type", probes))
+    for record in modules:
+        content = record.get("content") or {}
+        registers = list(content.get("registers") or []) + list(content.get("type_registers") or [])
+        for feature in list(content.get("sensors") or []) + list(content.get("actuators") or []):
+            registers.extend(feature.get("registers") or [])
+        probes = frozenset(_register_probes(registers))
+        if probes:
+            signatures.append(Signature(str(record["slug"]), "module", probes))
+    return signatures
+
+
+class FingerprintPlan:
+    """Adaptive probe plan that separates catalog entries with few reads.
+
+    Rather than reading every register of every module, each step picks the
+    register whose presence splits the remaining candidates most evenly, so a
+    catalog of ``N`` entries is told apart in about ``log2(N)`` reads per slave.
+    Choices depend only on the candidate set and the reads already made, so
+    they are memoized and shared across every slave of a scan.
+    """
+
+    def __init__(self, signatures: Iterable[Signature]) -> None:
+        self.signatures: List[Signature] = sorted(
+            signatures, key=lambda sig: (sig.kind != "module", sig.slug)
+        )
+        self._universe: FrozenSet[Probe] = frozenset().union(*(sig.probes for sig in self.signatures))
+        self._choices: Dict[Tuple[FrozenSet[int], FrozenSet[Probe]], Optional[Probe]] = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    @classmethod
+    def from_records(
+        cls,
+        modules: Iterable[Mapping[str, Any]],
+        module_types: Iterable[Mapping[str, Any]] = (),
+    ) -> "FingerprintPlan":
+        return cls(signatures_from_records(modules, module_types))
+
+    def next_probe(self, candidates: FrozenSet[int], asked: Iterable[Probe] = ()) -> Optional[Probe]:
+        """Return the most informative probe for ``candidates``, if any splits them."""
+
+        asked_set = frozenset(asked)
+        key = (candidates, asked_set)
+        if key in self._choices:
+            return self._choices[key]
+        best: Optional[Probe] = None
+        best_cost = len(candidates)
+        universe = sorted(set().union(*(self.signatures[i].probes for i in candidates)) - asked_set)
+        for probe in universe:
+            present = sum(1 for i in candidates if probe in self.signatures[i].probes)
+            cost = max(present, len(candidates) - present)
+            if cost < best_cost:
+                best, best_cost = probe, cost
+        self._choices[key] = best
+        return best
+
+    def distinguishing_probes(self) -> List[Probe]:
+        """Static probe set that separates every distinguishable pair of entries."""
+
+        chosen: List[Probe] = []
+        groups = [frozenset(range(len(self.signatures)))]
+        while True:
+            splittable = [group for group in groups if self.next_probe(group, chosen) is not None]
+            if not splittable:
+                return chosen
+            probe = self.next_probe(max(splittable, key=len), chosen)
+            assert probe is not None
+            chosen.append(probe)
+            groups = [
+                part
+                for group in groups
+                for part in (
+                    frozenset(i for i in group if probe in self.signatures[i].probes),
+                    frozenset(i for i in group if probe not in self.signatures[i].probes),
+                )
+                if part
+            ]
+
+    async def identify(
+        self,
+        probe_fn: ProbeFn,
+        *,
+        known: Optional[Mapping[Probe, Optional[bool]]] = None,
+    ) -> FingerprintMatch:
+        """Run the adaptive probe sequence against one slave.
+
+        ``known`` seeds observations that are already available, such as the
+        scan's own read, so they are not repeated.
+        """
+
+        # Registers no catalog entry declares say nothing about the module type.
+        observed = {probe: outcome for probe, outcome in (known or {}).items() if probe in self._universe}
+        candidates = frozenset(range(len(self.signatures)))
+        for probe, outcome in observed.items():
+            candidates = self._narrow(candidates, probe, outcome)
+        while len(candidates) > 1:
+            probe = self.next_probe(candidates, observed)
+            if probe is None:
+                break
+            outcome = await probe_fn(probe)
+            observed[probe] = outcome
+            candidates = self._narrow(candidates, probe, outcome)
+        confirmed = any(
+            outcome and probe in self.signatures[i].probes
+            for probe, outcome in observed.items()
+            for i in candidates
+        )
+        if candidates and not confirmed:
+            # Nothing has confirmed the remaining entries yet: read one of their
+            # registers so an unrelated slave is not labelled by elimination.
+            first = self.signatures[min(candidates)]
+            pending = sorted(first.probes - observed.keys())
+            if pending:
+                observed[pending[0]] = await probe_fn(pending[0])
+                candidates = self._narrow(candidates, pending[0], observed[pending[0]])
+        return self._match(candidates, observed)
+
+    def _narrow(self, candidates: FrozenSet[int], probe: Probe, outcome: Optional[bool]) -> FrozenSet[int]:
+        if outcome is None:
+            return candidates
+        return frozenset(i for i in candidates if (probe in self.signatures[i].probes) == outcome)
+
+    def _score(self, signature: Signature, observed: Mapping[Probe, Optional[bool]]) -> int:
+        score = 0
+        for probe, outcome in observed.items():
+            if outcome is None:
+                continue
+            score += 1 if (probe in signature.probes) == outcome else -1
+        return score
+
+    def _match(self, candidates: FrozenSet[int], observed: Dict[Probe, Optional[bool]]) -> FingerprintMatch:
+        if candidates:
+            ordered = sorted(candidates)
+        elif any(observed.values()):
+            # No entry is fully consistent (e.g. a firmware variant); fall back
+            # to the entry that agrees with most of the observations.
+            scores = [self._score(sig, observed) for sig in self.signatures]
+            top = max(scores)
+            ordered = [i for i, score in enumerate(scores) if score == top]
+        else:
+            return FingerprintMatch(None, None, 0, [], observed)
+        best = self.signatures[ordered[0]]
+        return FingerprintMatch(
+            slug=best.slug,
+            kind=best.kind,
+            score=self._score(best, observed),
+            candidates=[self.signatures[i].slug for i in ordered],
+            probes=observed,
+        )
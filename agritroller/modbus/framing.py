@@ -0,0 +1,132 @@
+"""Incremental Modbus RTU frame assembly for serial reads."""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from agritroller.modbus.crc import check_crc
+
+BITS_PER_CHARACTER = 11  # start + 8 data + parity/stop + stop
+HIGH_SPEED_GAP = 0.00175  # fixed 3.5T for baudrates above 19200 (Modbus over serial line, 2.5.1.1)
+EXCEPTION_FRAME_LENGTH = 5
+BYTE_COUNT_FUNCTIONS = frozenset({1, 2, 3, 4, 23})
+FIXED_LENGTH_FUNCTIONS = {5: 8, 6: 8, 15: 8, 16: 8}
+MIN_FRAME_LENGTH = 5
+
+
+def character_time(baudrate: int) -> float:
+    """Seconds needed to transmit one RTU character."""
+
+    return BITS_PER_CHARACTER / max(1, baudrate)
+
+
+def inter_frame_gap(baudrate: int) -> float:
+    """Silent interval (3.5 characters) that terminates an RTU frame."""
+
+    if baudrate > 19200:
+        return HIGH_SPEED_GAP
+    return 3.5 * character_time(baudrate)
+
+
+def expected_byte_count(function: int, count: int) -> int:
+    """Payload byte count of a normal FC1-FC4 response."""
+
+    if function in (1, 2):
+        return (count + 7) // 8
+    return count * 2
+
+
+class RTUFrameParser:
+    """Accumulates response bytes and works out the frame length from its header.
+
+    The length is known after the function byte for exception replies and fixed
+    length write echoes, or after the byte-count field for read responses.
+    """
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+        self.expected_length: Optional[int] = None
+
+    def feed(self, data: bytes) -> None:
+        self.buffer.extend(data)
+        if self.expected_length is None:
+            self.expected_length = self._detect_length()
+
+    def bytes_needed(self) -> int:
+        """How many bytes can be requested without reading past this frame."""
+
+        if self.expected_length is not None:
+            return max(0, self.expected_length - len(self.buffer))
+        if len(self.buffer) < MIN_FRAME_LENGTH:
+            return MIN_FRAME_LENGTH - len(self.buffer)
+        # Unknown function code: consume byte by byte until the line goes silent.
+        return 1
+
+    @property
+    def complete(self) -> bool:
+        return self.expected_length is not None and len(self.buffer) >= self.expected_length
+
+    @property
+    def is_exception(self) -> bool:
+        return len(self.buffer) >= 2 and bool(self.buffer[1] & 0x80)
+
+    @property
+    def frame(self) -> bytes:
+        if self.expected_length is not None:
+            return bytes(self.buffer[: self.expected_length])
+        return bytes(self.buffer)
+
+    def reset(self) -> None:
+        self.buffer.clear()
+        self.expected_length = None
+
+    def _detect_length(self) -> Optional[int]:
+        if len(self.buffer) < 2:
+            return None
+        function = self.buffer[1]
+        if function & 0x80:
+            return EXCEPTION_FRAME_LENGTH
+        if function in FIXED_LENGTH_FUNCTIONS:
+            return FIXED_LENGTH_FUNCTIONS[function]
+        if function in BYTE_COUNT_FUNCTIONS and len(self.buffer) >= 3:
+            return 3 + self.buffer[2] + 2
+        return None
+
+
+def read_frame(ser: Any, *, timeout: float, baudrate: int, gap: Optional[float] = None) -> bytes:
+    """Read a single RTU frame from a pyserial-like object.
+
+    Waits up to ``timeout`` for the first bytes, then keeps reading only while
+    the frame is incomplete and the line has not been silent for longer than
+    the inter-frame gap (plus the time needed to clock in the missing bytes).
+    Returns whatever was received, which may be empty or truncated.
+    """
+
+    silent = gap if gap is not None else inter_frame_gap(baudrate)
+    char_time = character_time(baudrate)
+    parser = RTUFrameParser()
+    original_timeout = ser.timeout
+    wait = timeout
+    try:
+        while not parser.complete:
+            needed = parser.bytes_needed()
+            if ser.timeout != wait:
+                ser.timeout = wait
+            chunk = ser.read(needed)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            wait = silent + char_time * parser.bytes_needed()
+    finally:
+        if ser.timeout != original_timeout:
+            ser.timeout = original_timeout
+    return parser.frame
+
+
+def parse_exception(frame: bytes) -> Optional[int]:
+    """Return the exception code of a valid exception reply, if it is one."""
+
+    if len(frame) == EXCEPTION_FRAME_LENGTH and frame[1] & 0x80 and check_crc(frame):
+        return frame[2]
+    return None
+
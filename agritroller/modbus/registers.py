@@ -0,0 +1,273 @@
+"""Pollable points derived from module configs and their scalar decoding."""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from agritroller.modbus.crc import append_crc, crc16
+from agritroller.modbus.fingerprint import READ_FUNCTIONS
+from agritroller.modbus.framing import expected_byte_count
+from agritroller.modbus.transforms import Transform, compile_inverse, compile_transform, identity
+
+BIT_FUNCTIONS = frozenset({1, 2})
+
+# Words consumed by each register ``data_type``; anything else reads one word.
+DATA_TYPE_WORDS = {
+    "bool": 1,
+    "uint16": 1,
+    "int16": 1,
+    "uint32": 2,
+    "int32": 2,
+    "float32": 2,
+    "float": 2,
+}
+
+
+@dataclass(frozen=True)
+class PollPoint:
+    """One named value of a module: where it lives and how it is decoded."""
+
+    name: str
+    kind: str
+    register_type: str
+    function: int
+    address: int
+    length: int
+    data_type: Optional[str] = None
+    transform: Optional[str] = None
+    unit: Optional[str] = None
+
+    @property
+    def is_bit(self) -> bool:
+        return self.function in BIT_FUNCTIONS
+
+    @property
+    def count(self) -> int:
+        """Bits or words to read, covering at least what ``data_type`` needs."""
+
+        if self.is_bit:
+            return self.length
+        return max(self.length, DATA_TYPE_WORDS.get(self.data_type or "uint16", 1))
+
+
+class ReadBlock(NamedTuple):
+    """One FC1-FC4 request and the points decoded from its reply (with offsets)."""
+
+    function: int
+    address: int
+    count: int
+    points: Tuple[Tuple[PollPoint, int], ...]
+
+
+def _point(register: Mapping[str, Any], kind: str) -> Optional[PollPoint]:
+    function = READ_FUNCTIONS.get(str(register.get("register_type")))
+    try:
+        address = int(register["address"])
+        length = max(1, int(register.get("length") or 1))
+    except (KeyError, TypeError, ValueError):
+        return None
+    if function is None:
+        return None
+    data_type = register.get("data_type")
+    transform = register.get("transform")
+    unit = register.get("unit")
+    return PollPoint(
+        name=str(register.get("name") or f"{kind}_{address}"),
+        kind=kind,
+        register_type=str(register["register_type"]),
+        function=function,
+        address=address,
+        length=length,
+        data_type=str(data_type) if data_type is not None else None,
+        transform=str(transform) if transform is not None else None,
+        unit=str(unit) if unit is not None else None,
+    )
+
+
+def points_from_module(record: Mapping[str, Any]) -> List[PollPoint]:
+    """List the points of a ``ModuleConfigService`` module record.
+
+    Sensors and actuators come first, then the module's own registers and the
+    registers inherited from its module type. A name already taken by an
+    earlier point is skipped, so a feature keeps its register name.
+    """
+
+    content = record.get("content") or record
+    sources: List[tuple[str, Iterable[Mapping[str, Any]]]] = []
+    for feature in content.get("sensors") or []:
+        sources.append(("sensor", feature.get("registers") or []))
+    for feature in content.get("actuators") or []:
+        sources.append(("actuator", feature.get("registers") or []))
+    sources.append(("register", content.get("registers") or []))
+    sources.append(("type_register", content.get("type_registers") or []))
+    points: List[PollPoint] = []
+    seen = set()
+    for kind, registers in sources:
+        for register in registers:
+            point = _point(register, kind)
+            if point is None or point.name in seen:
+                continue
+            seen.add(point.name)
+            points.append(point)
+    return points
+
+
+def build_read_request(address: int, function: int, register: int, count: int) -> bytes:
+    return append_crc(
+        bytes(
+            [
+                address & 0xFF,
+                function & 0xFF,
+                (register >> 8) & 0xFF,
+                register & 0xFF,
+                (count >> 8) & 0xFF,
+                count & 0xFF,
+            ]
+        )
+    )
+
+
+def read_payload(response: bytes, address: int, function: int, count: int) -> Optional[bytes]:
+    """Return the data bytes of a valid FC1-FC4 reply, or ``None``."""
+
+    if len(response) < 5 or response[0] != address or response[1] != function:
+        return None
+    size = response[2]
+    end = 3 + size
+    if size != expected_byte_count(function, count) or len(response) < end + 2:
+        return None
+    if int.from_bytes(response[end : end + 2], byteorder="little") != crc16(response[:end]):
+        return None
+    return response[3:end]
+
+
+def unpack_bits(payload: bytes, count: int) -> List[int]:
+    bits = int.from_bytes(payload, byteorder="little")
+    return [(bits >> index) & 1 for index in range(count)]
+
+
+def unpack_words(payload: bytes) -> List[int]:
+    return [int.from_bytes(payload[i : i + 2], byteorder="big") for i in range(0, len(payload) - 1, 2)]
+
+
+def encode_point(point: PollPoint, value: Any, spec: Any = None) -> List[int]:
+    """Bits or words to write so that ``point`` reads back as ``value``.
+
+    ``spec`` is the transform the point is read with (a device ``mapping`` or
+    type ``mapping_defaults`` entry); it defaults to the register's own.
+    Raises ``ValueError`` for values the point cannot hold.
+    """
+
+    if point.is_bit:
+        items = value if isinstance(value, (list, tuple)) else [value]
+        if len(items) != point.length:
+            raise ValueError(f"'{point.name}' takes {point.length} bit(s)")
+        return [1 if _as_bool(item) else 0 for item in items]
+    data_type = point.data_type or "uint16"
+    if data_type == "bool" or isinstance(value, bool):
+        return [1 if _as_bool(value) else 0] + [0] * (point.count - 1)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{point.name}' needs a number, got {value!r}") from None
+    raw = compile_inverse(point.transform if spec is None else spec)(number)
+    code = {"int16": ">h", "uint32": ">I", "int32": ">i", "float32": ">f", "float": ">f"}.get(data_type, ">H")
+    try:
+        packed = struct.pack(code, raw if code == ">f" else round(raw))
+    except struct.error:
+        raise ValueError(f"{value!r} is out of range for '{point.name}' ({data_type})") from None
+    words = unpack_words(packed)
+    return words + [0] * (point.count - len(words))
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("1", "on", "true"):
+            return True
+        if lowered in ("0", "off", "false"):
+            return False
+        raise ValueError(f"Cannot interpret {value!r} as on/off")
+    return bool(value)
+
+
+class BlockDecoder:
+    """Decodes every point of one block with extractors and transforms compiled up front.
+
+    The reply is unpacked in one ``struct`` call (or one integer for bit
+    tables); each point then costs a tuple lookup and its compiled transform.
+    ``transforms`` overrides the register ``transform`` per point name.
+    """
+
+    __slots__ = ("block", "_unpack", "_fields")
+
+    def __init__(self, block: ReadBlock, transforms: Optional[Mapping[str, Transform]] = None) -> None:
+        self.block = block
+        bits = block.function in BIT_FUNCTIONS
+        self._unpack = None if bits else struct.Struct(f">{block.count}H").unpack_from
+        fields: List[Tuple[str, Callable[[Any], Any], Transform]] = []
+        for point, offset in block.points:
+            transform = (transforms or {}).get(point.name) or register_transform(point)
+            if point.is_bit or point.data_type == "bool":
+                transform = identity
+            fields.append((point.name, _extractor(point, offset), transform))
+        self._fields = tuple(fields)
+
+    def __call__(self, payload: bytes) -> Dict[str, Any]:
+        items: Any = int.from_bytes(payload, "little") if self._unpack is None else self._unpack(payload)
+        return {name: transform(extract(items)) for name, extract, transform in self._fields}
+
+
+def _extractor(point: PollPoint, offset: int) -> Callable[[Any], Any]:
+    if point.is_bit:
+        if point.length == 1:
+            return lambda bits: bool((bits >> offset) & 1)
+        length = point.length
+        return lambda bits: [bool((bits >> index) & 1) for index in range(offset, offset + length)]
+    data_type = point.data_type or "uint16"
+    if data_type == "bool":
+        return lambda words: bool(words[offset])
+    if data_type == "int16":
+        return lambda words: words[offset] - 0x10000 if words[offset] & 0x8000 else words[offset]
+    if DATA_TYPE_WORDS.get(data_type, 1) == 2:
+        code = struct.Struct({"uint32": ">I", "int32": ">i"}.get(data_type, ">f"))
+        pack = struct.Struct(">HH").pack
+        return lambda words: code.unpack(pack(words[offset], words[offset + 1]))[0]
+    return lambda words: words[offset]
+
+
+def register_transform(point: PollPoint) -> Transform:
+    try:
+        return compile_transform(point.transform)
+    except ValueError:
+        return identity
+
+
+def decode_block(block: ReadBlock, payload: bytes) -> Dict[str, Any]:
+    """Decode every point of ``block`` from the data bytes of its reply."""
+
+    return BlockDecoder(block)(payload)
+
+
+def decode_point(point: PollPoint, items: Sequence[int], offset: int = 0) -> Any:
+    """Decode ``point`` from unpacked bits or words starting at ``offset``."""
+
+    if point.is_bit:
+        if point.length == 1:
+            return bool(items[offset])
+        return [bool(bit) for bit in items[offset : offset + point.length]]
+    data_type = point.data_type or "uint16"
+    words = items[offset : offset + DATA_TYPE_WORDS.get(data_type, 1)]
+    if data_type == "bool":
+        return bool(words[0])
+    if data_type == "int16":
+        value: Any = struct.unpack(">h", struct.pack(">H", words[0]))[0]
+    elif data_type in ("uint32", "int32", "float32", "float"):
+        raw = struct.pack(">HH", *words)
+        code = {"uint32": ">I", "int32": ">i"}.get(data_type, ">f")
+        value = struct.unpack(code, raw)[0]
+    else:
+        value = words[0]
+    return register_transform(point)(value)
@@ -0,0 +1,466 @@
+"""Virtual Modbus RTU slaves served behind pseudo-terminals.
+
+Each :class:`VirtualBus` owns one PTY pair and answers requests for the slaves
+attached to it from a background thread, so services under test open the PTY
+path with pyserial exactly like a USB RS-485 adapter. Slaves are built from the
+``.cfg`` module catalog and can be given latency, jitter, corrupted CRCs and
+injected exception replies to exercise the scanner and pollers reproducibly::
+
+    python -m agritroller.modbus.simulator --bus 1:ac_switch,2:iarduino --latency 0.004
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import select
+import signal
+import threading
+import time
+import tty
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from agritroller.modbus.crc import append_crc, check_crc
+from agritroller.modbus.framing import character_time, expected_byte_count, inter_frame_gap
+from agritroller.services.module_configs import ModuleConfigParser
+
+FUNCTION_TABLES = {
+    1: "coil",
+    2: "discrete_input",
+    3: "holding_register",
+    4: "input_register",
+    5: "coil",
+    6: "holding_register",
+    15: "coil",
+    16: "holding_register",
+}
+BIT_TABLES = frozenset({"coil", "discrete_input"})
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+SLAVE_DEVICE_BUSY = 0x06
+
+MAX_READ_BITS = 2000
+MAX_READ_REGISTERS = 125
+
+
+@dataclass
+class SlaveBehaviour:
+    """Timing and fault injection applied to every reply of a slave."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    crc_error_rate: float = 0.0
+    exception_rate: float = 0.0
+    exception_code: int = SLAVE_DEVICE_BUSY
+
+
+@dataclass
+class SlaveStats:
+    requests: int = 0
+    replies: int = 0
+    exceptions: int = 0
+    injected_exceptions: int = 0
+    crc_errors: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+@dataclass
+class VirtualSlave:
+    """Register image of one slave answering FC1-FC6, FC15 and FC16."""
+
+    address: int
+    slug: Optional[str] = None
+    tables: Dict[str, Dict[int, int]] = field(default_factory=dict)
+    behaviour: SlaveBehaviour = field(default_factory=SlaveBehaviour)
+    stats: SlaveStats = field(default_factory=SlaveStats)
+
+    @classmethod
+    def from_registers(
+        cls,
+        address: int,
+        registers: Iterable[Mapping[str, Any]],
+        *,
+        slug: Optional[str] = None,
+        values: Optional[Mapping[str, int]] = None,
+        behaviour: Optional[SlaveBehaviour] = None,
+    ) -> "VirtualSlave":
+        """Map every register declared in a module config, ``length`` words/bits each.
+
+        The first word of a register starts at ``values[name]``, falling back
+        to the register's ``default`` field and then zero.
+        """
+
+        tables: Dict[str, Dict[int, int]] = {}
+        for register in registers:
+            table = tables.setdefault(str(register["register_type"]), {})
+            start = int(register["address"])
+            initial = int((values or {}).get(register.get("name", ""), register.get("default", 0)) or 0)
+            for offset in range(max(1, int(register.get("length", 1)))):
+                table.setdefault(start + offset, initial if offset == 0 else 0)
+        return cls(address=address, slug=slug, tables=tables, behaviour=behaviour or SlaveBehaviour())
+
+    @classmethod
+    def from_record(
+        cls,
+        address: int,
+        record: Mapping[str, Any],
+        *,
+        values: Optional[Mapping[str, int]] = None,
+        behaviour: Optional[SlaveBehaviour] = None,
+    ) -> "VirtualSlave":
+        """Build a slave from a ``ModuleConfigService`` module or module type record."""
+
+        content = record.get("content") or {}
+        registers = list(content.get("registers") or []) + list(content.get("type_registers") or [])
+        for feature in list(content.get("sensors") or []) + list(content.get("actuators") or []):
+            registers.extend(feature.get("registers") or [])
+        return cls.from_registers(
+            address, registers, slug=str(record.get("slug")), values=values, behaviour=behaviour
+        )
+
+    def handle(self, request: bytes) -> Optional[bytes]:
+        """Return the response frame for ``request`` (``None`` when nothing is sent)."""
+
+        if len(request) < 4 or not check_crc(request):
+            return None
+        self.stats.requests += 1
+        function = request[1]
+        try:
+            pdu = self._dispatch(function, request[2:-2])
+        except _ModbusException as exc:
+            self.stats.exceptions += 1
+            pdu = bytes([function | 0x80, exc.code])
+        return append_crc(bytes([self.address]) + pdu)
+
+    def _dispatch(self, function: int, data: bytes) -> bytes:
+        table_name = FUNCTION_TABLES.get(function)
+        if table_name is None:
+            raise _ModbusException(ILLEGAL_FUNCTION)
+        table = self.tables.get(table_name, {})
+        if len(data) < 4:
+            raise _ModbusException(ILLEGAL_DATA_VALUE)
+        start = int.from_bytes(data[0:2], "big")
+        if function in (1, 2, 3, 4):
+            count = int.from_bytes(data[2:4], "big")
+            limit = MAX_READ_BITS if table_name in BIT_TABLES else MAX_READ_REGISTERS
+            if not 1 <= count <= limit:
+                raise _ModbusException(ILLEGAL_DATA_VALUE)
+            values = [self._get(table, start + offset) for offset in range(count)]
+            if table_name in BIT_TABLES:
+                payload = _pack_bits(values)
+            else:
+                payload = b"".join((value & 0xFFFF).to_bytes(2, "big") for value in values)
+            return bytes([function, len(payload)]) + payload
+        if function == 5:
+            raw = int.from_bytes(data[2:4], "big")
+            if raw not in (0x0000, 0xFF00):
+                raise _ModbusException(ILLEGAL_DATA_VALUE)
+            self._set(table, start, 1 if raw else 0)
+            return bytes([function]) + data[:4]
+        if function == 6:
+            self._set(table, start, int.from_bytes(data[2:4], "big"))
+            return bytes([function]) + data[:4]
+        count = int.from_bytes(data[2:4], "big")
+        if len(data) < 5 or len(data) < 5 + data[4]:
+            raise _ModbusException(ILLEGAL_DATA_VALUE)
+        payload = data[5 : 5 + data[4]]
+        if not count or len(payload) != expected_byte_count(1 if function == 15 else 3, count):
+            raise _ModbusException(ILLEGAL_DATA_VALUE)
+        if function == 15:
+            values = [(payload[i // 8] >> (i % 8)) & 1 for i in range(count)]
+        else:
+            values = [int.from_bytes(payload[i * 2 : i * 2 + 2], "big") for i in range(count)]
+        for offset in range(count):
+            self._get(table, start + offset)
+        for offset, value in enumerate(values):
+            table[start + offset] = value
+        return bytes([function]) + data[:4]
+
+    @staticmethod
+    def _get(table: Dict[int, int], address: int) -> int:
+        try:
+            return table[address]
+        except KeyError:
+            raise _ModbusException(ILLEGAL_DATA_ADDRESS) from None
+
+    def _set(self, table: Dict[int, int], address: int, value: int) -> None:
+        self._get(table, address)
+        table[address] = value
+
+
+class _ModbusException(Exception):
+    def __init__(self, code: int) -> None:
+        super().__init__(code)
+        self.code = code
+
+
+def _pack_bits(values: List[int]) -> bytes:
+    packed = bytearray((len(values) + 7) // 8)
+    for index, value in enumerate(values):
+        if value:
+            packed[index // 8] |= 1 << (index % 8)
+    return bytes(packed)
+
+
+def request_length(buffer: bytes) -> Optional[int]:
+    """Length of the request frame at the start of ``buffer`` if it can be told yet."""
+
+    if len(buffer) < 2:
+        return None
+    function = buffer[1]
+    if 1 <= function <= 6:
+        return 8
+    if function in (15, 16):
+        return 9 + buffer[6] if len(buffer) >= 7 else None
+    return None
+
+
+class VirtualBus:
+    """One PTY pair with a thread answering for the slaves attached to it."""
+
+    def __init__(
+        self,
+        slaves: Iterable[VirtualSlave],
+        *,
+        baudrate: Optional[int] = None,
+        seed: Optional[int] = None,
+        link: Optional[str] = None,
+    ) -> None:
+        self.slaves: Dict[int, VirtualSlave] = {slave.address: slave for slave in slaves}
+        self.baudrate = baudrate
+        self.link = Path(link) if link else None
+        self.random = random.Random(seed)
+        self.master_fd: Optional[int] = None
+        self.slave_fd: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def path(self) -> str:
+        """Path services should open; the symlink when one was requested."""
+
+        if self.link is not None:
+            return str(self.link)
+        if self.slave_fd is None:
+            raise RuntimeError("Virtual bus is not started")
+        return os.ttyname(self.slave_fd)
+
+    def start(self) -> "VirtualBus":
+        if self._thread is not None:
+            return self
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.master_fd)
+        tty.setraw(self.slave_fd)
+        if self.link is not None:
+            if self.link.is_symlink():
+                self.link.unlink()
+            self.link.symlink_to(os.ttyname(self.slave_fd))
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._serve, name=f"modbus-sim-{self.path}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self._thread = None
+        for fd in (self.master_fd, self.slave_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self.master_fd = self.slave_fd = None
+        if self.link is not None and self.link.is_symlink():
+            self.link.unlink()
+
+    def stats(self) -> Dict[int, Dict[str, int]]:
+        return {address: slave.stats.to_dict() for address, slave in self.slaves.items()}
+
+    def _serve(self) -> None:
+        assert self.master_fd is not None
+        gap = inter_frame_gap(self.baudrate or 9600)
+        buffer = bytearray()
+        while not self._stop.is_set():
+            readable, _, _ = select.select([self.master_fd], [], [], gap if buffer else 0.05)
+            if not readable:
+                if buffer:
+                    # The line went silent: whatever is buffered is one frame.
+                    self._dispatch(bytes(buffer))
+                    buffer.clear()
+                continue
+            try:
+                buffer.extend(os.read(self.master_fd, 256))
+            except OSError:
+                return
+            while True:
+                length = request_length(buffer)
+                if length is None or len(buffer) < length:
+                    break
+                frame = bytes(buffer[:length])
+                del buffer[:length]
+                self._dispatch(frame)
+
+    def _dispatch(self, frame: bytes) -> None:
+        if not frame:
+            return
+        if frame[0] == 0:
+            # Broadcast writes are applied by every slave and never answered.
+            for slave in self.slaves.values():
+                slave.handle(frame)
+            return
+        slave = self.slaves.get(frame[0])
+        if slave is None:
+            return
+        response = slave.handle(frame)
+        if response is None:
+            return
+        behaviour = slave.behaviour
+        if behaviour.exception_rate and self.random.random() < behaviour.exception_rate:
+            slave.stats.injected_exceptions += 1
+            response = append_crc(bytes([slave.address, frame[1] | 0x80, behaviour.exception_code]))
+        if behaviour.crc_error_rate and self.random.random() < behaviour.crc_error_rate:
+            slave.stats.crc_errors += 1
+            response = response[:-1] + bytes([response[-1] ^ 0xFF])
+        delay = behaviour.latency
+        if behaviour.jitter:
+            delay += self.random.uniform(-behaviour.jitter, behaviour.jitter)
+        if self.baudrate:
+            delay += character_time(self.baudrate) * len(response)
+        if delay > 0:
+            time.sleep(delay)
+        slave.stats.replies += 1
+        try:
+            os.write(self.master_fd, response)  # type: ignore[arg-type]
+        except OSError:
+            pass
+
+
+class SlaveFarm:
+    """Set of virtual buses started and stopped together."""
+
+    def __init__(self, catalog: Optional[Mapping[str, Mapping[str, Any]]] = None) -> None:
+        self.catalog: Dict[str, Mapping[str, Any]] = dict(catalog or {})
+        self.buses: List[VirtualBus] = []
+
+    @classmethod
+    def from_configs(cls, config_dir: Path) -> "SlaveFarm":
+        return cls(load_catalog(config_dir))
+
+    def add_bus(
+        self,
+        layout: Mapping[int, str],
+        *,
+        behaviour: Optional[SlaveBehaviour] = None,
+        values: Optional[Mapping[int, Mapping[str, int]]] = None,
+        baudrate: Optional[int] = None,
+        seed: Optional[int] = None,
+        link: Optional[str] = None,
+    ) -> VirtualBus:
+        """Create a bus with one slave per ``{address: module slug}`` entry."""
+
+        slaves = []
+        for address, slug in layout.items():
+            if slug not in self.catalog:
+                raise ValueError(f"Module '{slug}' is not in the simulator catalog")
+            slaves.append(
+                VirtualSlave.from_record(
+                    address,
+                    self.catalog[slug],
+                    values=(values or {}).get(address),
+                    behaviour=behaviour,
+                )
+            )
+        bus = VirtualBus(slaves, baudrate=baudrate, seed=seed, link=link)
+        self.buses.append(bus)
+        return bus
+
+    def start(self) -> "SlaveFarm":
+        for bus in self.buses:
+            bus.start()
+        return self
+
+    def stop(self) -> None:
+        for bus in self.buses:
+            bus.stop()
+
+    def __enter__(self) -> "SlaveFarm":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+
+def load_catalog(config_dir: Path) -> Dict[str, Mapping[str, Any]]:
+    """Module and module type records from a ``.cfg`` directory, keyed by slug."""
+
+    parsed = ModuleConfigParser().parse_directory(Path(config_dir))
+    catalog: Dict[str, Mapping[str, Any]] = {mtype.slug: mtype.to_record() for mtype in parsed.module_types}
+    catalog.update((module.slug, module.to_record()) for module in parsed.modules)
+    return catalog
+
+
+def _parse_layout(raw: str) -> Dict[int, str]:
+    layout: Dict[int, str] = {}
+    for item in raw.split(","):
+        address, _, slug = item.partition(":")
+        layout[int(address)] = slug.strip()
+    return layout
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run virtual Modbus RTU slaves behind PTYs.")
+    parser.add_argument("--configs", type=Path, default=Path("configs"), help="directory with .cfg modules")
+    parser.add_argument(
+        "--bus",
+        action="append",
+        required=True,
+        help="slaves on one PTY as address:slug[,address:slug...]; repeat for more buses",
+    )
+    parser.add_argument("--link", help="symlink prefix, e.g. /tmp/ttyUSB_SIM (bus index is appended)")
+    parser.add_argument("--baudrate", type=int, help="emulate the transmit time of replies at this rate")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--crc-error-rate", type=float, default=0.0)
+    parser.add_argument("--exception-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    behaviour = SlaveBehaviour(
+        latency=args.latency,
+        jitter=args.jitter,
+        crc_error_rate=args.crc_error_rate,
+        exception_rate=args.exception_rate,
+    )
+    farm = SlaveFarm.from_configs(args.configs)
+    for index, raw in enumerate(args.bus):
+        farm.add_bus(
+            _parse_layout(raw),
+            behaviour=behaviour,
+            baudrate=args.baudrate,
+            seed=None if args.seed is None else args.seed + index,
+            link=f"{args.link}{index}" if args.link else None,
+        )
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    with farm:
+        buses = [{"path": bus.path, "slaves": sorted(bus.slaves)} for bus in farm.buses]
+        print(json.dumps(buses), flush=True)
+        try:
+            stopped.wait()
+        except KeyboardInterrupt:
+            pass
+        print(json.dumps([bus.stats() for bus in farm.buses]), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Response timeout estimation for Modbus transactions."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+
+class AdaptiveTimeout:
+    """Learns a response timeout from observed round-trip times.
+
+    Uses the smoothed RTT/variance estimator from RFC 6298 and never drops below
+    1.5x the slowest reply seen so far, so a slow slave that already answered
+    once keeps fitting inside the window. The result is clamped to
+    ``[floor, ceiling]``; until the first reply arrives the ceiling is used.
+    """
+
+    ALPHA = 0.125
+    BETA = 0.25
+    VARIANCE_FACTOR = 4.0
+    SLOWEST_FACTOR = 1.5
+
+    def __init__(self, ceiling: float, floor: float) -> None:
+        self.ceiling = max(ceiling, floor)
+        self.floor = min(floor, ceiling)
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.max_rtt = 0.0
+        self.samples = 0
+
+    def observe(self, rtt: float) -> None:
+        rtt = max(0.0, rtt)
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.max_rtt = max(self.max_rtt, rtt)
+        self.samples += 1
+
+    @property
+    def current(self) -> float:
+        if self.srtt is None:
+            return self.ceiling
+        estimate = max(self.srtt + self.VARIANCE_FACTOR * self.rttvar, self.max_rtt * self.SLOWEST_FACTOR)
+        return min(self.ceiling, max(self.floor, estimate))
@@ -0,0 +1,237 @@
+"""Compile register transforms and mapping op chains into plain callables.
+
+Two sources describe how a raw register value becomes an engineering value:
+the ``transform`` field of a module register (``scale:0.001``,
+``offset:-40``, ``passthrough``) and the op chains stored in a device's
+``mapping`` or its type's ``mapping_defaults``::
+
+    [{"op": "hex_to_int"}, {"op": "scale", "factor": 0.1}, {"op": "round", "digits": 1}]
+
+Both compile once into a single callable. Consecutive ``scale``/``offset``
+steps are folded into one multiply-add, so the poll loop never looks at the
+spec dicts again.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger("agritroller.transforms")
+
+Transform = Callable[[Any], Any]
+
+OPS = frozenset({"hex_to_int", "scale", "offset", "mask", "round", "to_int", "to_float"})
+
+
+def identity(value: Any) -> Any:
+    return value
+
+
+def compile_transform(spec: Any) -> Transform:
+    """Compile a register ``transform`` string, an op dict or an op chain.
+
+    Raises ``ValueError`` for unknown ops or missing parameters.
+    """
+
+    if spec is None or spec == "" or spec == "passthrough":
+        return identity
+    if isinstance(spec, str):
+        return _compile_text(spec.strip())
+    if isinstance(spec, Mapping):
+        spec = [spec]
+    if not isinstance(spec, (list, tuple)):
+        raise ValueError(f"Unsupported transform {spec!r}")
+    return _compile_chain(tuple(_step(op) for op in spec))
+
+
+def compile_inverse(spec: Any) -> Transform:
+    """Compile the inverse of a linear transform, used to write values back.
+
+    Raises ``ValueError`` when the transform is not a pure scale/offset chain.
+    """
+
+    if spec is None or spec == "" or spec == "passthrough":
+        return identity
+    if isinstance(spec, str):
+        ops = [_text_op(spec.strip())]
+    elif isinstance(spec, Mapping):
+        ops = [spec]
+    else:
+        ops = list(spec)
+    steps = [_step(op) for op in ops]
+    if not all(kind == "affine" for kind, _ in steps):
+        raise ValueError(f"Transform {spec!r} cannot be inverted")
+    factor, offset = _fold([args for _, args in steps])  # type: ignore[misc]
+    if not factor:
+        raise ValueError(f"Transform {spec!r} scales by zero")
+    return _affine((1 / factor, -offset / factor))
+
+
+@functools.lru_cache(maxsize=512)
+def _compile_text(text: str) -> Transform:
+    return _compile_chain((_step(_text_op(text)),))
+
+
+def _text_op(text: str) -> Dict[str, Any]:
+    name, _, argument = text.partition(":")
+    name = name.strip()
+    if name not in ("scale", "offset"):
+        raise ValueError(f"Unknown transform '{text}'")
+    try:
+        number = float(argument)
+    except ValueError:
+        raise ValueError(f"Transform '{text}' needs a number") from None
+    return {"op": name, "factor" if name == "scale" else "value": number}
+
+
+def _number(op: Mapping[str, Any], *keys: str) -> float:
+    for key in keys:
+        if op.get(key) is not None:
+            try:
+                return float(op[key])
+            except (TypeError, ValueError):
+                break
+    raise ValueError(f"Op '{op.get('op')}' needs a numeric '{keys[0]}'")
+
+
+def _step(op: Any) -> Tuple[str, Any]:
+    """Turn one op dict into ``("affine", (factor, offset))`` or ``("call", fn)``."""
+
+    if not isinstance(op, Mapping) or op.get("op") not in OPS:
+        raise ValueError(f"Unknown transform op {op!r}")
+    name = op["op"]
+    if name == "scale":
+        return "affine", (_number(op, "factor", "value"), 0.0)
+    if name == "offset":
+        return "affine", (1.0, _number(op, "value", "offset"))
+    if name == "mask":
+        raw = op.get("mask", op.get("value"))
+        try:
+            mask = int(raw, 0) if isinstance(raw, str) else int(raw)
+        except (TypeError, ValueError):
+            raise ValueError("Op 'mask' needs an integer 'mask'") from None
+        shift = int(op.get("shift") or 0)
+        return "call", lambda value: (int(value) & mask) >> shift
+    if name == "round":
+        digits = op.get("digits")
+        if digits is None:
+            return "call", round
+        places = int(digits)
+        return "call", lambda value: round(value, places)
+    if name == "to_int":
+        return "call", int
+    if name == "to_float":
+        return "call", float
+    bits = int(op.get("bits") or 16)
+    signed = bool(op.get("signed"))
+    sign, span = 1 << (bits - 1), 1 << bits
+
+    def hex_to_int(value: Any) -> Any:
+        number = int(value, 16) if isinstance(value, str) else int(value)
+        return number - span if signed and number & sign else number
+
+    return "call", hex_to_int
+
+
+def _fold(pairs: Iterable[Tuple[float, float]]) -> Tuple[float, float]:
+    factor, offset = 1.0, 0.0
+    for scale, shift in pairs:
+        factor, offset = factor * scale, offset * scale + shift
+    return factor, offset
+
+
+def affine_parameters(transform: Transform) -> Optional[Tuple[float, float]]:
+    """``(factor, offset)`` of a compiled linear transform, so it can be applied in bulk."""
+
+    if transform is identity:
+        return 1.0, 0.0
+    return getattr(transform, "affine", None)
+
+
+def _affine(pair: Tuple[float, float]) -> Transform:
+    factor, offset = pair
+    if factor == 1 and offset == 0:
+        return identity
+    if offset == 0:
+        transform: Any = lambda value: value if isinstance(value, bool) else value * factor
+    elif factor == 1:
+        transform = lambda value: value if isinstance(value, bool) else value + offset
+    else:
+        transform = lambda value: value if isinstance(value, bool) else value * factor + offset
+    transform.affine = (factor, offset)
+    return transform
+
+
+def _compile_chain(steps: Tuple[Tuple[str, Any], ...]) -> Transform:
+    functions: List[Transform] = []
+    pending: List[Tuple[float, float]] = []
+    for kind, argument in steps:
+        if kind == "affine":
+            pending.append(argument)
+            continue
+        if pending:
+            functions.append(_affine(_fold(pending)))
+            pending = []
+        functions.append(argument)
+    if pending:
+        functions.append(_affine(_fold(pending)))
+    functions = [function for function in functions if function is not identity]
+    if not functions:
+        return identity
+    if len(functions) == 1:
+        return functions[0]
+    chain = tuple(functions)
+
+    def run(value: Any) -> Any:
+        for function in chain:
+            value = function(value)
+        return value
+
+    return run
+
+
+class TransformCache:
+    """Compiled transforms per device, rebuilt only when their sources change.
+
+    ``for_device`` takes the effective spec of every point (the device
+    ``mapping`` entry, else the type's ``mapping_defaults`` entry, else the
+    register ``transform``) and returns the cached callables as long as those
+    specs are unchanged, so editing a device or its type recompiles it on the
+    next sync and nothing else does.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[int, Tuple[str, Dict[str, Transform]]] = {}
+
+    def for_device(self, device_id: int, specs: Mapping[str, Any]) -> Dict[str, Transform]:
+        signature = json.dumps(specs, sort_keys=True, default=str)
+        entry = self._entries.get(device_id)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        compiled: Dict[str, Transform] = {}
+        for name, spec in specs.items():
+            try:
+                compiled[name] = compile_transform(spec)
+            except ValueError as exc:
+                logger.warning("Ignoring transform of '%s' on device #%s: %s", name, device_id, exc)
+                compiled[name] = identity
+        self._entries[device_id] = (signature, compiled)
+        return compiled
+
+    def invalidate(self, device_id: Optional[int] = None) -> None:
+        if device_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(device_id, None)
+
+    def retain(self, device_ids: Iterable[int]) -> None:
+        keep = set(device_ids)
+        for device_id in list(self._entries):
+            if device_id not in keep:
+                self._entries.pop(device_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
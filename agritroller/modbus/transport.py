@@ -0,0 +1,187 @@
+"""Serial transports used by the per-port Modbus workers."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Optional, Protocol
+
+import serial
+
+from agritroller.modbus.framing import RTUFrameParser, character_time, inter_frame_gap, read_frame
+
+TRANSPORT_ASYNCIO = "asyncio"
+TRANSPORT_THREAD = "thread"
+
+
+class SerialTransport(Protocol):
+    """Request/response channel over one serial port."""
+
+    port: str
+    baudrate: int
+    parity: str
+
+    @property
+    def is_open(self) -> bool:
+        ...
+
+    def configure(self, *, baudrate: int, parity: str) -> None:
+        ...
+
+    async def transact(self, request: bytes, *, timeout: float) -> bytes:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class _SerialBackedTransport:
+    def __init__(self, ser: Any) -> None:
+        self.serial = ser
+        self.port = str(getattr(ser, "port", ""))
+        self.baudrate = int(ser.baudrate)
+        self.parity = str(getattr(ser, "parity", "N"))
+
+    @property
+    def is_open(self) -> bool:
+        return bool(self.serial is not None and self.serial.is_open)
+
+    def configure(self, *, baudrate: int, parity: str) -> None:
+        # pyserial applies line settings to an open port in place, which is
+        # much cheaper than closing and reopening the device between sweeps.
+        if baudrate != self.baudrate:
+            self.serial.baudrate = baudrate
+            self.baudrate = baudrate
+        if parity != self.parity:
+            self.serial.parity = parity
+            self.parity = parity
+
+    def close(self) -> None:
+        try:
+            self.serial.close()
+        except Exception:
+            pass
+
+
+class ThreadedSerialTransport(_SerialBackedTransport):
+    """Runs each blocking pyserial transaction in the default executor."""
+
+    async def transact(self, request: bytes, *, timeout: float) -> bytes:
+        return await asyncio.to_thread(self._transact_blocking, request, timeout)
+
+    def _transact_blocking(self, request: bytes, timeout: float) -> bytes:
+        self.serial.reset_input_buffer()
+        self.serial.write(request)
+        return read_frame(self.serial, timeout=timeout, baudrate=self.baudrate)
+
+
+class AsyncSerialTransport(_SerialBackedTransport):
+    """Drives a non-blocking serial file descriptor from the event loop.
+
+    pyserial is only used to open the device and apply termios settings; reads
+    and writes go straight to the descriptor and waits use ``add_reader`` /
+    ``add_writer``, so no executor thread is held while waiting for a slave.
+    """
+
+    def __init__(self, ser: Any) -> None:
+        super().__init__(ser)
+        self.fd: int = ser.fileno()
+        os.set_blocking(self.fd, False)
+
+    async def transact(self, request: bytes, *, timeout: float) -> bytes:
+        self._drain_input()
+        await self._write_all(request)
+        return await self.read_frame(timeout=timeout)
+
+    async def read_frame(self, *, timeout: float, gap: Optional[float] = None) -> bytes:
+        """Async counterpart of :func:`agritroller.modbus.framing.read_frame`."""
+
+        silent = gap if gap is not None else inter_frame_gap(self.baudrate)
+        char_time = character_time(self.baudrate)
+        parser = RTUFrameParser()
+        deadline = time.monotonic() + timeout
+        while not parser.complete:
+            chunk = self._read_available(parser.bytes_needed())
+            if chunk:
+                parser.feed(chunk)
+                deadline = time.monotonic() + silent + char_time * parser.bytes_needed()
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not await self._wait_io(readable=True, timeout=remaining):
+                break
+        return parser.frame
+
+    def _read_available(self, size: int) -> bytes:
+        try:
+            return os.read(self.fd, max(1, size))
+        except (BlockingIOError, InterruptedError):
+            return b""
+
+    def _drain_input(self) -> None:
+        while self._read_available(256):
+            pass
+
+    async def _write_all(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self.fd, view)
+            except (BlockingIOError, InterruptedError):
+                written = 0
+            view = view[written:]
+            if view:
+                await self._wait_io(readable=False, timeout=None)
+
+    async def _wait_io(self, *, readable: bool, timeout: Optional[float]) -> bool:
+        loop = asyncio.get_running_loop()
+        ready: asyncio.Future[None] = loop.create_future()
+
+        def wake() -> None:
+            if not ready.done():
+                ready.set_result(None)
+
+        if readable:
+            loop.add_reader(self.fd, wake)
+        else:
+            loop.add_writer(self.fd, wake)
+        try:
+            await asyncio.wait_for(ready, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if readable:
+                loop.remove_reader(self.fd)
+            else:
+                loop.remove_writer(self.fd)
+
+
+def open_transport(
+    port: str,
+    *,
+    baudrate: int,
+    parity: str = "N",
+    timeout: float = 0.2,
+    mode: str = TRANSPORT_ASYNCIO,
+) -> SerialTransport:
+    """Open ``port`` and wrap it in the requested transport.
+
+    Falls back to the threaded transport when the platform or serial object
+    does not expose a pollable file descriptor.
+    """
+
+    ser = serial.Serial(
+        port=port,
+        baudrate=baudrate,
+        bytesize=8,
+        parity=parity,
+        stopbits=1,
+        timeout=timeout,
+    )
+    if mode == TRANSPORT_ASYNCIO and os.name == "posix":
+        try:
+            return AsyncSerialTransport(ser)
+        except (AttributeError, OSError, ValueError):
+            pass
+    return ThreadedSerialTransport(ser)
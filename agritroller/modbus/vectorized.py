@@ -0,0 +1,165 @@
+"""NumPy decoding of whole read blocks.
+
+NumPy is optional: on boards without it ``HAVE_NUMPY`` is false and
+:func:`make_decoder` hands out the pure Python :class:`BlockDecoder`. With it,
+a reply payload is viewed as big-endian ``uint16``/``int16`` words (and as
+overlapping 32-bit windows for two-word types) without copying, the points of
+each type are gathered with one fancy index and their linear transforms are
+applied as one multiply-add.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from agritroller.modbus.registers import BIT_FUNCTIONS, BlockDecoder, ReadBlock, register_transform
+from agritroller.modbus.transforms import Transform, affine_parameters, identity
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the board image
+    np = None  # type: ignore[assignment]
+
+HAVE_NUMPY = np is not None
+
+# Below this many points the fixed per-call NumPy overhead costs more than it
+# saves over BlockDecoder (crossover measured with benchmarks/bench_decode.py).
+VECTOR_MIN_POINTS = 48
+
+WORD_DTYPES = {
+    "uint16": ">u2",
+    "int16": ">i2",
+    "uint32": ">u4",
+    "int32": ">i4",
+    "float32": ">f4",
+    "float": ">f4",
+}
+
+Decoder = Callable[[bytes], Dict[str, Any]]
+
+
+class _Group(NamedTuple):
+    """Points of one block read through the same dtype view."""
+
+    dtype: str
+    names: Tuple[str, ...]
+    offsets: Any
+    calls: Tuple[Tuple[int, Transform], ...]
+
+
+class VectorBlockDecoder:
+    """Decodes every point of a block with a handful of NumPy operations.
+
+    Points with a linear transform (``scale``/``offset`` and folded chains)
+    are gathered from their typed views into one float array and scaled by a
+    single multiply-add; the rest are gathered per dtype and, when their
+    transform is not linear (``round``, ``mask``, ...), passed through the
+    compiled callable one by one. Results match :class:`BlockDecoder`.
+    """
+
+    __slots__ = (
+        "block",
+        "_bits",
+        "_windows",
+        "_scaled",
+        "_names",
+        "_factors",
+        "_biases",
+        "_plain",
+        "_lists",
+        "_floats",
+    )
+
+    def __init__(self, block: ReadBlock, transforms: Optional[Mapping[str, Transform]] = None) -> None:
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+        self.block = block
+        self._bits = block.function in BIT_FUNCTIONS
+        self._windows = max(0, block.count - 1)
+        scaled: Dict[str, List[Tuple[str, int, Tuple[float, float]]]] = {}
+        plain: Dict[str, List[Tuple[str, int, Transform]]] = {}
+        self._lists: List[Tuple[str, int, int]] = []
+        for point, offset in block.points:
+            if point.is_bit and point.length > 1:
+                self._lists.append((point.name, offset, point.length))
+                continue
+            if point.is_bit or point.data_type == "bool":
+                plain.setdefault("bool", []).append((point.name, offset, identity))
+                continue
+            transform = (transforms or {}).get(point.name) or register_transform(point)
+            affine = affine_parameters(transform)
+            dtype = WORD_DTYPES.get(point.data_type or "uint16", ">u2")
+            if affine is not None and affine != (1.0, 0.0):
+                scaled.setdefault(dtype, []).append((point.name, offset, affine))
+            else:
+                plain.setdefault(dtype, []).append((point.name, offset, transform))
+        self._scaled = tuple(
+            (dtype, np.array([offset for _, offset, _ in entries], dtype=np.intp))
+            for dtype, entries in scaled.items()
+        )
+        ordered = [entry for entries in scaled.values() for entry in entries]
+        self._names = tuple(name for name, _, _ in ordered)
+        self._factors = np.array([affine[0] for _, _, affine in ordered])
+        self._biases = np.array([affine[1] for _, _, affine in ordered])
+        self._plain = tuple(
+            _Group(
+                dtype=dtype,
+                names=tuple(name for name, _, _ in entries),
+                offsets=np.array([offset for _, offset, _ in entries], dtype=np.intp),
+                calls=tuple(
+                    (index, transform)
+                    for index, (_, _, transform) in enumerate(entries)
+                    if transform is not identity
+                ),
+            )
+            for dtype, entries in plain.items()
+        )
+        # Random or uninitialised float32 registers may hold signalling NaNs.
+        self._floats = ">f4" in scaled or ">f4" in plain
+
+    def __call__(self, payload: bytes) -> Dict[str, Any]:
+        if self._floats:
+            with np.errstate(invalid="ignore"):
+                return self._decode(payload)
+        return self._decode(payload)
+
+    def _decode(self, payload: bytes) -> Dict[str, Any]:
+        if self._bits:
+            items = np.unpackbits(np.frombuffer(payload, dtype=np.uint8), bitorder="little")
+        else:
+            items = np.frombuffer(payload, dtype=">u2")
+        result: Dict[str, Any] = {}
+        if self._scaled:
+            parts = [self._view(dtype, payload, items)[offsets] for dtype, offsets in self._scaled]
+            values = parts[0] if len(parts) == 1 else np.concatenate(parts)
+            result.update(zip(self._names, (values * self._factors + self._biases).tolist()))
+        for group in self._plain:
+            gathered = self._view(group.dtype, payload, items)[group.offsets]
+            decoded = (gathered != 0 if group.dtype == "bool" else gathered).tolist()
+            for index, transform in group.calls:
+                decoded[index] = transform(decoded[index])
+            result.update(zip(group.names, decoded))
+        for name, offset, length in self._lists:
+            result[name] = (items[offset : offset + length] != 0).tolist()
+        return result
+
+    def _view(self, dtype: str, payload: bytes, items: Any) -> Any:
+        if dtype in (">u2", "bool"):
+            return items
+        if dtype == ">i2":
+            return items.view(">i2")
+        # Every two-word window of the payload, one word apart, without a copy.
+        return np.ndarray(shape=(self._windows,), dtype=dtype, buffer=payload, strides=(2,))
+
+
+def make_decoder(
+    block: ReadBlock,
+    transforms: Optional[Mapping[str, Transform]] = None,
+    *,
+    vectorized: bool = True,
+) -> Decoder:
+    """NumPy decoder for blocks of ``VECTOR_MIN_POINTS`` or more when available, else :class:`BlockDecoder`."""
+
+    if vectorized and HAVE_NUMPY and len(block.points) >= VECTOR_MIN_POINTS:
+        return VectorBlockDecoder(block, transforms)
+    return BlockDecoder(block, transforms)
@@ -0,0 +1,120 @@
+"""Group actuator writes of one slave into FC15/FC16 block writes."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from agritroller.modbus.crc import append_crc, check_crc
+from agritroller.modbus.registers import (
+    PollPoint,
+    build_read_request,
+    encode_point,
+    read_payload,
+    unpack_bits,
+    unpack_words,
+)
+
+# Read function of a writable table -> (single write, multiple write) function codes.
+WRITE_FUNCTIONS = {1: (5, 15), 3: (6, 16)}
+# Largest quantity a single write may carry (Modbus application protocol, 6.11-6.12).
+MAX_WRITE_BITS = 1968
+MAX_WRITE_REGISTERS = 123
+
+
+class WriteBlock(NamedTuple):
+    """One write request covering a contiguous run of coils or holding registers."""
+
+    function: int
+    address: int
+    values: Tuple[int, ...]
+
+    @property
+    def read_function(self) -> int:
+        return 1 if self.function in (5, 15) else 3
+
+
+def is_writable(point: PollPoint) -> bool:
+    return point.function in WRITE_FUNCTIONS
+
+
+def plan_writes(
+    writes: Iterable[Tuple[PollPoint, Any]],
+    specs: Optional[Mapping[str, Any]] = None,
+) -> List[WriteBlock]:
+    """Encode ``(point, value)`` pairs and merge them into the fewest requests.
+
+    ``specs`` maps point names to the transform they are read with, as for
+    :func:`encode_point`.
+
+    Later writes to the same bit or word win. Only strictly adjacent addresses
+    are merged: unlike a read, a write cannot pad over a hole without
+    clobbering whatever lives there. A run of one item uses FC5/FC6.
+    """
+
+    tables: Dict[int, Dict[int, int]] = {}
+    for point, value in writes:
+        if not is_writable(point):
+            raise ValueError(f"'{point.name}' is not a coil or holding register")
+        table = tables.setdefault(point.function, {})
+        for offset, item in enumerate(encode_point(point, value, (specs or {}).get(point.name))):
+            table[point.address + offset] = item
+    blocks: List[WriteBlock] = []
+    for function in sorted(tables):
+        limit = MAX_WRITE_BITS if function == 1 else MAX_WRITE_REGISTERS
+        run: List[int] = []
+        start = 0
+        for address, item in sorted(tables[function].items()):
+            if run and address == start + len(run) and len(run) < limit:
+                run.append(item)
+                continue
+            if run:
+                blocks.append(_block(function, start, run))
+            start, run = address, [item]
+        if run:
+            blocks.append(_block(function, start, run))
+    return blocks
+
+
+def _block(function: int, start: int, run: List[int]) -> WriteBlock:
+    single, multiple = WRITE_FUNCTIONS[function]
+    return WriteBlock(single if len(run) == 1 else multiple, start, tuple(run))
+
+
+def build_write_request(address: int, block: WriteBlock) -> bytes:
+    header = bytes([address & 0xFF, block.function, (block.address >> 8) & 0xFF, block.address & 0xFF])
+    if block.function == 5:
+        return append_crc(header + (b"\xff\x00" if block.values[0] else b"\x00\x00"))
+    if block.function == 6:
+        return append_crc(header + block.values[0].to_bytes(2, "big"))
+    count = len(block.values)
+    if block.function == 15:
+        packed = bytearray((count + 7) // 8)
+        for index, value in enumerate(block.values):
+            if value:
+                packed[index // 8] |= 1 << (index % 8)
+        data = bytes(packed)
+    else:
+        data = b"".join(value.to_bytes(2, "big") for value in block.values)
+    return append_crc(header + count.to_bytes(2, "big") + bytes([len(data)]) + data)
+
+
+def write_acknowledged(response: bytes, request: bytes) -> bool:
+    """A write succeeded when the slave echoes the first six bytes of the request."""
+
+    return len(response) == 8 and check_crc(response) and response[:6] == request[:6]
+
+
+def build_readback_request(address: int, block: WriteBlock) -> bytes:
+    return build_read_request(address, block.read_function, block.address, len(block.values))
+
+
+def readback_values(response: bytes, address: int, block: WriteBlock) -> Optional[Tuple[int, ...]]:
+    """Bits or words returned by the read-back of ``block``, or ``None`` if the reply is unusable."""
+
+    count = len(block.values)
+    payload = read_payload(response, address, block.read_function, count)
+    if payload is None:
+        return None
+    if block.read_function == 1:
+        return tuple(unpack_bits(payload, count))
+    return tuple(unpack_words(payload))
@@ -14,6 +14,8 @@ from .peripheral import PeripheralControllerService
 from .module_configs import ModuleConfigService
 from .rs485 import RS485Service
 from .scheduler import SchedulerService
+from .telemetry import TelemetryService
+from .telemetry_rollups import TelemetryRollupService
 from .templates import TemplateService
 from .versioning import VersioningService
 from .wifi import WifiService
@@ -33,6 +35,8 @@ __all__ = [
     "ModuleConfigService",
     "RS485Service",
     "SchedulerService",
+    "TelemetryService",
+    "TelemetryRollupService",
     "LogicService",
     "ModbusScannerService",
     "FrontendBridgeService",
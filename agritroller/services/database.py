@@ -10,6 +10,22 @@ from agritroller.db import get_migrations
 from agritroller.services.base import BootstrapContext, Service
 
 
+def connect(path: Path | str) -> sqlite3.Connection:
+    """Open a connection to the application database with the shared settings.
+
+    Services that commit from worker threads open their own connection with
+    this instead of writing through ``db_conn``: sqlite3 keeps one transaction
+    per connection, so writers sharing it would commit or roll back each
+    other's statements. WAL lets them read while another connection writes.
+    """
+
+    conn = sqlite3.connect(path, check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA foreign_keys=ON;")
+    return conn
+
+
 class DatabaseService(Service):
     """Handles storage and retrieval of system state."""
 
@@ -22,13 +38,7 @@ class DatabaseService(Service):
         db_path = Path(self.config.path)
         db_path.parent.mkdir(parents=True, exist_ok=True)
         self.logger.info("Opening SQLite database at %s", db_path)
-        self.connection = sqlite3.connect(
-            db_path,
-            check_same_thread=False,
-            detect_types=sqlite3.PARSE_DECLTYPES,
-        )
-        self.connection.row_factory = sqlite3.Row
-        self._configure_connection(self.connection)
+        self.connection = connect(db_path)
         self._apply_migrations(self.connection)
         self.context.state["db_conn"] = self.connection
         self.context.state["db_path"] = db_path
@@ -41,10 +51,6 @@ class DatabaseService(Service):
         self.context.state.pop("db_path", None)
         self.connection = None
 
-    def _configure_connection(self, conn: sqlite3.Connection) -> None:
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA foreign_keys=ON;")
-
     def _apply_migrations(self, conn: sqlite3.Connection) -> None:
         conn.execute(
             """
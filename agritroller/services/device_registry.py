@@ -5,7 +5,7 @@ from __future__ import annotations
 import asyncio
 import json
 import sqlite3
-from typing import Any, Dict, List, Literal, Optional, Sequence
+from typing import Any, Dict, List, Literal, Mapping, Optional, Sequence, Set
 
 from agritroller.config import RS485Config, SerialConfig
 from agritroller.services.base import BootstrapContext, Service
@@ -72,7 +72,7 @@ class DeviceRegistryService(Service):
     ) -> Dict[str, Any]:
         self._validate_kind(kind)
         self._ensure_device_type_exists(device_type_slug)
-        self._ensure_unique_port(port)
+        self._ensure_unique_port(port, kind=kind, metadata=metadata)
         conn = self._get_conn()
         meta = json.dumps(metadata or {}, ensure_ascii=False)
         mapping_json = json.dumps(mapping or {}, ensure_ascii=False)
@@ -99,6 +99,118 @@ class DeviceRegistryService(Service):
             raise RuntimeError("Failed to read device after insert")
         return device
 
+    def create_rs485_slaves(
+        self,
+        slaves: Sequence[Mapping[str, Any]],
+        *,
+        skip_existing: bool = False,
+    ) -> Dict[str, Any]:
+        """Register discovered Modbus slaves as RS-485 devices in one transaction.
+
+        Each entry needs ``port``, ``baudrate`` and ``address`` and may carry
+        ``name``, ``metadata``, ``device_type_slug``, ``mapping`` and ``enabled``.
+        The slave address is stored as ``metadata.modbus_address``. Every entry
+        is validated before anything is written; addresses already registered
+        on a port abort the import unless ``skip_existing`` is set, in which
+        case they are returned under ``skipped``.
+        """
+
+        conn = self._get_conn()
+        for slug in {str(slave.get("device_type_slug") or "generic_empty") for slave in slaves}:
+            self._ensure_device_type_exists(slug)
+        ports = {str(slave["port"]).lower() for slave in slaves}
+        taken: Dict[str, Set[Optional[int]]] = {port: set() for port in ports}
+        blocked: Set[str] = set()
+        if ports:
+            placeholders = ", ".join("?" for _ in ports)
+            rows = conn.execute(
+                f"SELECT kind, port, metadata FROM devices WHERE lower(port) IN ({placeholders})",  # noqa: S608
+                tuple(ports),
+            ).fetchall()
+            for row in rows:
+                if row["kind"] != "rs485":
+                    blocked.add(row["port"].lower())
+                    continue
+                address = self._modbus_address(self._safe_load_json(row["metadata"]))
+                if address is not None:
+                    taken[row["port"].lower()].add(address)
+        inserts: List[tuple[Any, ...]] = []
+        skipped: List[Dict[str, Any]] = []
+        for slave in slaves:
+            port = str(slave["port"])
+            address = int(slave["address"])
+            if not 1 <= address <= 247:
+                raise ValueError(f"Modbus address {address} is out of range")
+            if port.lower() in blocked:
+                raise ValueError(f"Port {port} is already assigned to another device")
+            if address in taken[port.lower()]:
+                if skip_existing:
+                    skipped.append({"port": port, "address": address})
+                    continue
+                raise ValueError(f"Modbus address {address} on {port} is already registered")
+            taken[port.lower()].add(address)
+            metadata = {**(slave.get("metadata") or {}), "modbus_address": address}
+            inserts.append(
+                (
+                    "rs485",
+                    slave.get("name") or f"Modbus {address} ({port})",
+                    port,
+                    int(slave["baudrate"]),
+                    json.dumps(metadata, ensure_ascii=False),
+                    1 if slave.get("enabled", True) else 0,
+                    slave.get("device_type_slug") or "generic_empty",
+                    json.dumps(slave.get("mapping") or {}, ensure_ascii=False),
+                )
+            )
+        device_ids: List[int] = []
+        with conn:
+            for values in inserts:
+                cursor = conn.execute(
+                    """
+                    INSERT INTO devices (kind, name, port, baudrate, metadata, enabled, device_type_slug, mapping)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    values,
+                )
+                device_ids.append(int(cursor.lastrowid))
+        created: List[Dict[str, Any]] = []
+        if device_ids:
+            placeholders = ", ".join("?" for _ in device_ids)
+            rows = conn.execute(
+                f"SELECT * FROM devices WHERE id IN ({placeholders}) ORDER BY id ASC",  # noqa: S608
+                tuple(device_ids),
+            ).fetchall()
+            created = [self._row_to_dict(row) for row in rows]
+        return {"created": created, "skipped": skipped}
+
+    def update_device_statuses(
+        self,
+        device_ids: Sequence[int],
+        *,
+        status: str,
+        status_message: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """Set the same port status on several devices with one statement."""
+
+        if not device_ids:
+            return []
+        conn = self._get_conn()
+        placeholders = ", ".join("?" for _ in device_ids)
+        with conn:
+            conn.execute(
+                f"""
+                UPDATE devices
+                SET status = ?, status_message = ?, status_checked_at = CURRENT_TIMESTAMP
+                WHERE id IN ({placeholders})
+                """,  # noqa: S608 - placeholders only
+                (status, status_message, *device_ids),
+            )
+        rows = conn.execute(
+            f"SELECT * FROM devices WHERE id IN ({placeholders}) ORDER BY id ASC",  # noqa: S608
+            tuple(device_ids),
+        ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
     def update_device(
         self,
         device_id: int,
@@ -115,6 +227,16 @@ class DeviceRegistryService(Service):
         conn = self._get_conn()
         updates = []
         params: List[Any] = []
+        if port is not None or kind is not None or metadata is not None:
+            current = self.get_device(device_id)
+            if not current:
+                raise LookupError(f"Device {device_id} not found")
+            self._ensure_unique_port(
+                port if port is not None else current["port"],
+                exclude_id=device_id,
+                kind=kind if kind is not None else current["kind"],
+                metadata=metadata if metadata is not None else current["metadata"],
+            )
         if kind is not None:
             self._validate_kind(kind)
             updates.append("kind = ?")
@@ -123,7 +245,6 @@ class DeviceRegistryService(Service):
             updates.append("name = ?")
             params.append(name)
         if port is not None:
-            self._ensure_unique_port(port, exclude_id=device_id)
             updates.append("port = ?")
             params.append(port)
         if baudrate is not None:
@@ -270,16 +391,41 @@ class DeviceRegistryService(Service):
         if kind not in ("rs485", "peripheral"):
             raise ValueError(f"Unsupported device type: {kind}")
 
-    def _ensure_unique_port(self, port: str, exclude_id: Optional[int] = None) -> None:
+    def _ensure_unique_port(
+        self,
+        port: str,
+        exclude_id: Optional[int] = None,
+        *,
+        kind: Optional[str] = None,
+        metadata: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        """Reject a second device on ``port``.
+
+        RS-485 devices may share a bus as long as their
+        ``metadata.modbus_address`` differs; peripherals need the port alone.
+        """
+
         conn = self._get_conn()
-        query = "SELECT id FROM devices WHERE lower(port) = lower(?)"
+        query = "SELECT id, kind, metadata FROM devices WHERE lower(port) = lower(?)"
         params: List[Any] = [port]
         if exclude_id is not None:
             query += " AND id != ?"
             params.append(exclude_id)
-        row = conn.execute(query, tuple(params)).fetchone()
-        if row:
-            raise ValueError(f"Port {port} is already assigned to another device")
+        address = self._modbus_address(metadata)
+        for row in conn.execute(query, tuple(params)).fetchall():
+            if kind != "rs485" or row["kind"] != "rs485":
+                raise ValueError(f"Port {port} is already assigned to another device")
+            if self._modbus_address(self._safe_load_json(row["metadata"])) == address:
+                if address is None:
+                    raise ValueError(f"Port {port} is already assigned to another device")
+                raise ValueError(f"Modbus address {address} on {port} is already registered")
+
+    @staticmethod
+    def _modbus_address(metadata: Optional[Mapping[str, Any]]) -> Optional[int]:
+        try:
+            return int((metadata or {})["modbus_address"])
+        except (KeyError, TypeError, ValueError):
+            return None
 
     @staticmethod
     def _safe_load_json(raw: Any) -> Dict[str, Any]:
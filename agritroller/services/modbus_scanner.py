@@ -3,14 +3,40 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import dataclasses
+import functools
+import sqlite3
 import time
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 from uuid import uuid4
 
-import serial
-
+from agritroller.config import ModbusScannerConfig
+from agritroller.modbus.crc import append_crc, crc16
+from agritroller.modbus.fingerprint import FingerprintPlan, Probe
+from agritroller.modbus.framing import expected_byte_count, parse_exception
+from agritroller.modbus.timing import AdaptiveTimeout
+from agritroller.modbus.transport import SerialTransport, open_transport
 from agritroller.services.base import BootstrapContext, Service
+from agritroller.services.event_bus import EventBus, EventPayload
+from agritroller.services.scan_cache import SCAN_MODE_FULL, SCAN_MODES, ScanAddressCache
+from agritroller.services.scan_jobs import FINISHED_STATUSES, PAUSED_STATUS, ScanJobStore
 
 
 @dataclass
@@ -25,19 +51,105 @@ class ScanParams:
     timeout: float
     device_id: Optional[int] = None
     device_name: Optional[str] = None
+    adaptive_timeout: bool = False
+    min_timeout: float = 0.02
+    max_timeout: Optional[float] = None
+    parity: str = "N"
+    identify: bool = False
+    mode: str = SCAN_MODE_FULL
+    force: bool = False
+    addresses: Optional[List[int]] = None
+    skipped: int = 0
+
+    def address_list(self) -> List[int]:
+        if self.addresses is not None:
+            return self.addresses
+        return list(range(self.start_address, self.end_address + 1))
+
+
+PRIORITY_ACTUATOR = 0
+PRIORITY_INTERACTIVE = 10
+PRIORITY_POLL = 20
+PRIORITY_SCAN = 30
+
+LATENCY_SAMPLES = 1024
+
+PRIORITY_NAMES = {
+    PRIORITY_ACTUATOR: "actuator",
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_POLL: "poll",
+    PRIORITY_SCAN: "scan",
+}
+
+TransactFn = Callable[..., Awaitable[bytes]]
+
+
+@dataclass
+class Transaction:
+    """Single request/response exchange waiting for the port."""
+
+    request: bytes
+    timeout: float
+    baudrate: int
+    parity: str
+    priority: int
+    future: "asyncio.Future[bytes]"
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class PriorityStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    waiting: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    last_wait: float = 0.0
+    service_times: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+
+    def service_percentile(self, fraction: float) -> float:
+        if not self.service_times:
+            return 0.0
+        ordered = sorted(self.service_times)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        served = self.completed + self.failed
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "waiting": self.waiting,
+            "avg_wait_ms": round(self.total_wait / served * 1000, 3) if served else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "last_wait_ms": round(self.last_wait * 1000, 3),
+            "p50_service_ms": round(self.service_percentile(0.5) * 1000, 3),
+            "p99_service_ms": round(self.service_percentile(0.99) * 1000, 3),
+        }
 
 
 class PortWorker:
-    """Serial worker that executes queued Modbus jobs for a single port."""
+    """Owns one serial port and runs its transactions in priority order.
+
+    Every exchange on the port goes through :meth:`transact`. Scan jobs submit
+    one low-priority transaction per address, so interactive reads, polls and
+    actuator writes queued in the meantime run between two scan probes instead
+    of waiting for the whole sweep. Scan jobs themselves run one at a time.
+    """
 
     def __init__(self, port: str, service: "ModbusScannerService") -> None:
         self.port = port
         self.service = service
-        self.queue: asyncio.Queue[Tuple[str, ScanParams]] = asyncio.Queue()
+        self.queue: asyncio.PriorityQueue[Tuple[int, int, Transaction]] = asyncio.PriorityQueue()
         self.task: Optional[asyncio.Task[None]] = None
-        self.serial: Optional[serial.Serial] = None
-        self.current_baudrate: Optional[int] = None
+        self.transport: Optional[SerialTransport] = None
         self.running = False
+        self.stats: Dict[int, PriorityStats] = {priority: PriorityStats() for priority in PRIORITY_NAMES}
+        self.busy_time = 0.0
+        self._sequence = 0
+        self._scan_lock = asyncio.Lock()
+        self._scan_tasks: Set[asyncio.Task[None]] = set()
 
     def start(self) -> None:
         if self.task:
@@ -48,79 +160,183 @@ class PortWorker:
 
     async def stop(self) -> None:
         self.running = False
+        tasks = list(self._scan_tasks)
         if self.task:
-            self.task.cancel()
-            with asyncio.exceptions.SuppressCancelledError():
-                await self.task
-        self._close_serial()
+            tasks.append(self.task)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        while not self.queue.empty():
+            _, _, pending = self.queue.get_nowait()
+            if not pending.future.done():
+                pending.future.cancel()
+        self._close_transport()
         self.task = None
 
     async def enqueue(self, job_id: str, params: ScanParams) -> None:
-        await self.queue.put((job_id, params))
+        task = asyncio.get_running_loop().create_task(self._run_scan(job_id, params))
+        self._scan_tasks.add(task)
+        task.add_done_callback(self._scan_tasks.discard)
+
+    async def transact(
+        self,
+        request: bytes,
+        *,
+        timeout: float,
+        baudrate: int,
+        parity: str = "N",
+        priority: int = PRIORITY_INTERACTIVE,
+    ) -> bytes:
+        """Queue ``request`` and wait for the response frame (empty on timeout)."""
+
+        loop = asyncio.get_running_loop()
+        transaction = Transaction(
+            request=request,
+            timeout=timeout,
+            baudrate=baudrate,
+            parity=parity,
+            priority=priority,
+            future=loop.create_future(),
+        )
+        stats = self._stats_for(priority)
+        stats.submitted += 1
+        stats.waiting += 1
+        self._sequence += 1
+        self.queue.put_nowait((priority, self._sequence, transaction))
+        return await transaction.future
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "port": self.port,
+            "queue_depth": self.queue.qsize(),
+            "scan_jobs_waiting": max(0, len(self._scan_tasks) - (1 if self._scan_lock.locked() else 0)),
+            "busy_s": round(self.busy_time, 3),
+            "open": bool(self.transport and self.transport.is_open),
+            "priorities": {PRIORITY_NAMES.get(p, str(p)): stats.to_dict() for p, stats in self.stats.items()},
+        }
+
+    async def _run_scan(self, job_id: str, params: ScanParams) -> None:
+        job = self.service.jobs.get_live(job_id)
+        if not job:
+            return
+        transact = functools.partial(
+            self.transact,
+            baudrate=params.baudrate,
+            parity=params.parity,
+            priority=PRIORITY_SCAN,
+        )
+        try:
+            async with self._scan_lock:
+                if job["status"] == "queued":
+                    job["status"] = "running"
+                await self.service._scan_part(transact, job, params)
+        except asyncio.CancelledError:
+            # The worker is shutting down: keep the sweep resumable.
+            if not job.get("cancelled"):
+                job["pause_requested"] = True
+            raise
+        except Exception as exc:
+            self.service._record_failure(job, params, exc)
+        finally:
+            self.service._finish_part(job)
 
     async def _run(self) -> None:
         while self.running:
             try:
-                job_id, params = await self.queue.get()
+                _, _, transaction = await self.queue.get()
             except asyncio.CancelledError:
                 break
-            job = self.service.jobs.get(job_id)
-            if not job:
+            stats = self._stats_for(transaction.priority)
+            stats.waiting -= 1
+            if transaction.future.done():
+                # Caller gave up (cancelled) while the transaction was queued.
                 self.queue.task_done()
                 continue
-            job["status"] = "running"
+            waited = time.monotonic() - transaction.enqueued_at
+            stats.last_wait = waited
+            stats.total_wait += waited
+            stats.max_wait = max(stats.max_wait, waited)
+            started = time.monotonic()
             try:
-                await asyncio.to_thread(self._ensure_serial, params)
-                await asyncio.to_thread(self.service._scan_with_serial, self.serial, job, params)
-                if job.get("status") != "error":
-                    job["status"] = "completed"
-            except Exception as exc:  # pragma: no cover - defensive
-                job["status"] = "error"
-                job["error"] = str(exc)
-                self._close_serial()
+                transport = await self._ensure_transport(transaction)
+                response = await transport.transact(transaction.request, timeout=transaction.timeout)
+            except asyncio.CancelledError:
+                if not transaction.future.done():
+                    transaction.future.cancel()
+                raise
+            except Exception as exc:
+                stats.failed += 1
+                self._close_transport()
+                if not transaction.future.done():
+                    transaction.future.set_exception(exc)
+            else:
+                stats.completed += 1
+                if not transaction.future.done():
+                    transaction.future.set_result(response)
             finally:
+                elapsed = time.monotonic() - started
+                self.busy_time += elapsed
+                stats.service_times.append(elapsed)
                 self.queue.task_done()
 
-    def _ensure_serial(self, params: ScanParams) -> None:
-        reopen = False
-        if self.serial is None or not self.serial.is_open:
-            reopen = True
-        elif self.current_baudrate != params.baudrate:
-            self._close_serial()
-            reopen = True
-        if reopen:
-            self.serial = serial.Serial(
-                port=params.port,
-                baudrate=params.baudrate,
-                bytesize=8,
-                parity="N",
-                stopbits=1,
-                timeout=params.timeout,
+    async def _ensure_transport(self, transaction: Transaction) -> SerialTransport:
+        transport = self.transport
+        if transport is None or not transport.is_open:
+            transport = await asyncio.to_thread(
+                open_transport,
+                self.port,
+                baudrate=transaction.baudrate,
+                parity=transaction.parity,
+                timeout=transaction.timeout,
+                mode=self.service.config.transport,
             )
-            self.current_baudrate = params.baudrate
+            self.transport = transport
+        else:
+            transport.configure(baudrate=transaction.baudrate, parity=transaction.parity)
+        return transport
 
-    def _close_serial(self) -> None:
-        if self.serial:
-            try:
-                self.serial.close()
-            except Exception:
-                pass
-        self.serial = None
-        self.current_baudrate = None
+    def _stats_for(self, priority: int) -> PriorityStats:
+        stats = self.stats.get(priority)
+        if stats is None:
+            stats = self.stats[priority] = PriorityStats()
+        return stats
+
+    def _close_transport(self) -> None:
+        if self.transport:
+            self.transport.close()
+        self.transport = None
 
 
 class ModbusScannerService(Service):
     """Queues Modbus scan jobs per port, keeping serial connections alive."""
 
-    def __init__(self, context: BootstrapContext, default_timeout: float = 0.2) -> None:
+    def __init__(self, context: BootstrapContext, config: Optional[ModbusScannerConfig] = None) -> None:
         super().__init__("modbus_scanner", context)
-        self.default_timeout = default_timeout
-        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.config = config or ModbusScannerConfig()
+        self.default_timeout = self.config.default_timeout
+        self.jobs = ScanJobStore(
+            self.config,
+            serializer=self.serialize_job,
+            conn_getter=self._get_conn,
+            path_getter=lambda: self.context.state.get("db_path"),
+        )
+        self.address_cache = ScanAddressCache(
+            self.config,
+            conn_getter=self._get_conn,
+            path_getter=lambda: self.context.state.get("db_path"),
+        )
         self.workers: Dict[str, PortWorker] = {}
         self._lock = asyncio.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._publish_tasks: Set[asyncio.Task[None]] = set()
+        self._maintenance_task: Optional[asyncio.Task[None]] = None
 
     async def _start(self) -> None:
+        self._loop = asyncio.get_running_loop()
         self.context.state["modbus_scanner"] = self
+        self._maintenance_task = self._loop.create_task(self._maintain_jobs())
 
     async def _stop(self) -> None:
         self.context.state.pop("modbus_scanner", None)
@@ -128,8 +344,27 @@ class ModbusScannerService(Service):
         self.workers.clear()
         for worker in workers:
             await worker.stop()
+        if self._maintenance_task:
+            self._maintenance_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._maintenance_task
+            self._maintenance_task = None
+        # Stopped workers may have just checkpointed their jobs.
+        await self.jobs.flush()
+        await self.address_cache.flush()
+        self.jobs.close()
+        self.address_cache.close()
         self.jobs.clear()
 
+    async def _maintain_jobs(self) -> None:
+        """Archive queued job rows and address outcomes, and expire old jobs, every ``archive_interval`` seconds."""
+
+        while True:
+            await asyncio.sleep(max(0.05, self.config.archive_interval))
+            await self.jobs.flush()
+            await self.address_cache.flush()
+            self.jobs.prune()
+
     async def start_scan(
         self,
         *,
@@ -143,37 +378,184 @@ class ModbusScannerService(Service):
         timeout: Optional[float] = None,
         device_id: Optional[int] = None,
         device_name: Optional[str] = None,
+        adaptive_timeout: bool = False,
+        min_timeout: Optional[float] = None,
+        max_timeout: Optional[float] = None,
+        parity: str = "N",
+        identify: bool = False,
+        mode: str = SCAN_MODE_FULL,
+        force: bool = False,
     ) -> Dict[str, Any]:
-        params = ScanParams(
+        params = self._make_params(
             port=port,
             baudrate=baudrate,
+            parity=parity,
             start_address=start_address,
             end_address=end_address,
             register=register,
             function=function,
             count=count,
-            timeout=timeout or self.default_timeout,
+            timeout=timeout,
+            adaptive_timeout=adaptive_timeout,
+            min_timeout=min_timeout,
+            max_timeout=max_timeout,
             device_id=device_id,
             device_name=device_name,
+            identify=identify,
+            mode=mode,
+            force=force,
+        )
+        job = self._new_job(
+            "scan",
+            [params],
+            device_id=device_id,
+            device_name=device_name,
+            port=port,
+            adaptive_timeout=adaptive_timeout,
+            timeout=params.timeout,
+            identify=identify,
+            mode=mode,
+            _fingerprints=self._fingerprint_plan() if identify else None,
+        )
+        await self._enqueue_parts(job, [params])
+        return self.serialize_job(job)
+
+    async def start_discovery(
+        self,
+        *,
+        ports: Sequence[str],
+        baudrates: Sequence[int],
+        parities: Sequence[str] = ("N",),
+        start_address: int,
+        end_address: int,
+        register: int,
+        function: int = 3,
+        count: int = 1,
+        timeout: Optional[float] = None,
+        adaptive_timeout: bool = False,
+        min_timeout: Optional[float] = None,
+        max_timeout: Optional[float] = None,
+        identify: bool = False,
+        mode: str = SCAN_MODE_FULL,
+        force: bool = False,
+    ) -> Dict[str, Any]:
+        """Sweep every port/baudrate/parity combination as one job.
+
+        Each port gets its own worker so ports are scanned in parallel, while the
+        line settings of a single port are switched in place between sweeps.
+        Responders are merged into one result list keyed by port and address.
+        """
+
+        unique_ports = list(dict.fromkeys(ports))
+        unique_baudrates = list(dict.fromkeys(baudrates))
+        unique_parities = list(dict.fromkeys(parity.upper() for parity in parities))
+        if not unique_ports or not unique_baudrates or not unique_parities:
+            raise ValueError("At least one port, baudrate and parity are required")
+        parts = [
+            self._make_params(
+                port=port,
+                baudrate=baudrate,
+                parity=parity,
+                start_address=start_address,
+                end_address=end_address,
+                register=register,
+                function=function,
+                count=count,
+                timeout=timeout,
+                adaptive_timeout=adaptive_timeout,
+                min_timeout=min_timeout,
+                max_timeout=max_timeout,
+                identify=identify,
+                mode=mode,
+                force=force,
+            )
+            for port in unique_ports
+            for baudrate in unique_baudrates
+            for parity in unique_parities
+        ]
+        job = self._new_job(
+            "discovery",
+            parts,
+            port=None,
+            ports=unique_ports,
+            baudrates=unique_baudrates,
+            parities=unique_parities,
+            adaptive_timeout=adaptive_timeout,
+            timeout=parts[0].timeout,
+            timeouts={},
+            identify=identify,
+            mode=mode,
+            _fingerprints=self._fingerprint_plan() if identify else None,
         )
-        job_id = uuid4().hex
-        job = {
-            "id": job_id,
+        await self._enqueue_parts(job, parts)
+        return self.serialize_job(job)
+
+    def _make_params(
+        self,
+        *,
+        timeout: Optional[float],
+        adaptive_timeout: bool,
+        min_timeout: Optional[float],
+        max_timeout: Optional[float],
+        **fields: Any,
+    ) -> ScanParams:
+        base_timeout = timeout or self.default_timeout
+        params = ScanParams(
+            timeout=(max_timeout or base_timeout) if adaptive_timeout else base_timeout,
+            adaptive_timeout=adaptive_timeout,
+            min_timeout=min_timeout if min_timeout is not None else ScanParams.min_timeout,
+            max_timeout=max_timeout,
+            **fields,
+        )
+        if params.mode not in SCAN_MODES:
+            raise ValueError(f"Unknown scan mode '{params.mode}'")
+        if params.mode != SCAN_MODE_FULL and not params.force:
+            params.addresses, params.skipped = self.address_cache.order(
+                params.port,
+                params.baudrate,
+                params.parity,
+                range(params.start_address, params.end_address + 1),
+                mode=params.mode,
+            )
+        return params
+
+    def _fingerprint_plan(self) -> FingerprintPlan:
+        service = self.context.state.get("module_config_service")
+        if service is None:
+            raise ValueError("Module configs are not loaded; identification is unavailable")
+        plan = FingerprintPlan.from_records(service.list_modules(), service.list_module_types())
+        if not len(plan):
+            raise ValueError("No module configs declare readable registers to identify devices")
+        return plan
+
+    def _new_job(self, kind: str, parts: List[ScanParams], **fields: Any) -> Dict[str, Any]:
+        job: Dict[str, Any] = {
+            "id": uuid4().hex,
+            "kind": kind,
             "status": "queued",
             "progress": 0,
-            "total": max(0, end_address - start_address + 1),
+            "total": sum(len(part.address_list()) for part in parts),
+            "skipped": sum(part.skipped for part in parts),
             "results": [],
             "error": None,
+            "errors": [],
             "started_at": time.time(),
-            "device_id": device_id,
-            "device_name": device_name,
-            "port": port,
+            "device_id": None,
+            "device_name": None,
+            "pending_parts": len(parts),
+            "_seen": {},
         }
+        job.update(fields)
+        return job
+
+    async def _enqueue_parts(self, job: Dict[str, Any], parts: List[ScanParams]) -> None:
         async with self._lock:
-            self.jobs[job_id] = job
-            worker = self._get_or_create_worker(port)
-            await worker.enqueue(job_id, params)
-        return self.serialize_job(job)
+            self.jobs.add(job)
+            checkpoints = job.setdefault("checkpoints", {})
+            for part in parts:
+                checkpoints[self._part_key(part)] = {"params": part, "next": 0}
+                worker = self._get_or_create_worker(part.port)
+                await worker.enqueue(job["id"], part)
 
     def _get_or_create_worker(self, port: str) -> PortWorker:
         worker = self.workers.get(port)
@@ -183,56 +565,400 @@ class ModbusScannerService(Service):
             worker.start()
         return worker
 
-    def _scan_with_serial(self, ser: Optional[serial.Serial], job: Dict[str, Any], params: ScanParams) -> None:
-        if ser is None or not ser.is_open:
-            raise RuntimeError("Serial connection unavailable")
-        try:
-            for address in range(params.start_address, params.end_address + 1):
-                if job.get("cancelled"):
-                    job["status"] = "cancelled"
-                    break
-                request = self._build_request(address, params.register, params.count, params.function)
-                ser.reset_input_buffer()
-                ser.write(request)
-                expected_len = 5 + params.count * 2
-                response = ser.read(expected_len)
-                job["progress"] += 1
-                if not self._valid_response(response, address, params.function, params.count):
+    async def _scan_part(self, transact: TransactFn, job: Dict[str, Any], params: ScanParams) -> None:
+        estimator: Optional[AdaptiveTimeout] = None
+        if params.adaptive_timeout:
+            estimator = AdaptiveTimeout(ceiling=params.timeout, floor=params.min_timeout)
+        checkpoint = job.setdefault("checkpoints", {}).setdefault(
+            self._part_key(params), {"params": params, "next": 0}
+        )
+        for index, address in enumerate(params.address_list()):
+            if job.get("cancelled"):
+                job["status"] = "cancelled"
+                break
+            if job.get("pause_requested"):
+                break
+            checkpoint["next"] = index
+            timeout = estimator.current if estimator else params.timeout
+            request = self._build_request(address, params.register, params.count, params.function)
+            sent_at = time.monotonic()
+            response = await transact(request, timeout=timeout)
+            elapsed = time.monotonic() - sent_at
+            checkpoint["next"] = index + 1
+            job["progress"] += 1
+            self._publish_progress(job)
+            exception_code: Optional[int] = None
+            if self._valid_response(response, address, params.function, params.count):
+                value: Optional[int] = self._parse_value(response, params.count, params.function)
+            else:
+                # An exception reply still proves a slave lives at this address.
+                exception_code = parse_exception(response)
+                if exception_code is None or response[0] != address:
+                    if not response:
+                        self.address_cache.record(params.port, params.baudrate, params.parity, address, False)
                     continue
-                value = self._parse_value(response, params.count)
-                job["results"].append(
-                    {
-                        "address": address,
-                        "register": params.register,
-                        "function": params.function,
-                        "raw": response.hex(),
-                        "value": value,
-                        "device_type_slug": job.get("device_type_slug"),
-                    }
+                value = None
+            self.address_cache.record(params.port, params.baudrate, params.parity, address, True)
+            if estimator:
+                estimator.observe(elapsed)
+                self._note_timeout(job, params, estimator.current)
+            result: Dict[str, Any] = {
+                "address": address,
+                "register": params.register,
+                "function": params.function,
+                "raw": response.hex(),
+                "value": value,
+                "exception": exception_code,
+                "device_type_slug": job.get("device_type_slug"),
+            }
+            plan: Optional[FingerprintPlan] = job.get("_fingerprints")
+            if params.identify and plan is not None and (params.port, address) not in job.get("_seen", {}):
+                known: Dict[Probe, Optional[bool]] = {}
+                if params.count == 1:
+                    known[Probe(params.function, params.register)] = exception_code is None
+                match = await plan.identify(
+                    functools.partial(
+                        self._probe,
+                        transact,
+                        address,
+                        timeout=estimator.current if estimator else params.timeout,
+                    ),
+                    known=known,
                 )
-        except Exception as exc:
-            job["status"] = "error"
-            job["error"] = str(exc)
+                result["device_type_slug"] = match.slug
+                result["fingerprint"] = match.to_dict()
+            self._record_result(job, params, result)
+
+    async def _probe(
+        self, transact: TransactFn, address: int, probe: Probe, *, timeout: float
+    ) -> Optional[bool]:
+        request = self._build_request(address, probe.address, 1, probe.function)
+        response = await transact(request, timeout=timeout)
+        if self._valid_response(response, address, probe.function, 1):
+            return True
+        if parse_exception(response) is not None and response[0] == address:
+            return False
+        return None
+
+    def _record_result(self, job: Dict[str, Any], params: ScanParams, result: Dict[str, Any]) -> None:
+        result.update(port=params.port, baudrate=params.baudrate, parity=params.parity)
+        key = (params.port, result["address"])
+        seen: Dict[Tuple[str, int], Dict[str, Any]] = job.setdefault("_seen", {})
+        existing = seen.get(key)
+        if existing is not None:
+            # Same slave answering under other line settings; keep the first hit.
+            existing.setdefault("also_seen", []).append({"baudrate": params.baudrate, "parity": params.parity})
+            return
+        seen[key] = result
+        job["results"].append(result)
+        index = len(job["results"]) - 1
+        self._publish(
+            "rs485.scan.result",
+            {"job_id": job.get("id"), "index": index, "result": result},
+        )
+
+    @staticmethod
+    def _part_key(params: ScanParams) -> str:
+        return f"{params.port}@{params.baudrate}{params.parity}"
+
+    def _note_timeout(self, job: Dict[str, Any], params: ScanParams, value: float) -> None:
+        job["timeout"] = value
+        if job.get("kind") == "discovery":
+            job["timeouts"][self._part_key(params)] = value
+
+    @staticmethod
+    def _remaining_parts(job: Dict[str, Any]) -> List[ScanParams]:
+        remaining: List[ScanParams] = []
+        for checkpoint in job.get("checkpoints", {}).values():
+            params: ScanParams = checkpoint["params"]
+            addresses = params.address_list()[checkpoint["next"] :]
+            if addresses:
+                remaining.append(dataclasses.replace(params, addresses=addresses, skipped=0))
+        return remaining
+
+    def _record_failure(self, job: Dict[str, Any], params: ScanParams, exc: Exception) -> None:
+        self.logger.warning("Scan of %s @ %s failed: %s", params.port, params.baudrate, exc)
+        if job.get("kind") == "discovery":
+            job["errors"].append({"port": params.port, "baudrate": params.baudrate, "error": str(exc)})
+            return
+        job["status"] = "error"
+        job["error"] = str(exc)
+
+    def _finish_part(self, job: Dict[str, Any]) -> None:
+        job["pending_parts"] = max(0, job.get("pending_parts", 1) - 1)
+        if job["pending_parts"]:
+            return
+        if job.pop("pause_requested", False) and job["status"] in ("queued", "running"):
+            parts = self._remaining_parts(job)
+            if parts:
+                self._park_job(job, parts)
+                return
+        if job["status"] in ("queued", "running"):
+            if job.get("kind") == "discovery" and len(job["errors"]) >= len(job["ports"]) * len(
+                job["baudrates"]
+            ) * len(job["parities"]):
+                job["status"] = "error"
+                job["error"] = "All discovery sweeps failed"
+            else:
+                job["status"] = "completed"
+        job["finished_at"] = time.time()
+        job.pop("_seen", None)
+        job.pop("_fingerprints", None)
+        job.pop("checkpoints", None)
+        self._publish_progress(job, force=True)
+        try:
+            self.jobs.finish(job)
+        except sqlite3.Error:
+            self.logger.exception("Failed to archive scan job %s", job["id"])
+
+    def _park_job(self, job: Dict[str, Any], parts: List[ScanParams]) -> None:
+        job["status"] = PAUSED_STATUS
+        job["paused_at"] = time.time()
+        job["remaining"] = sum(len(part.address_list()) for part in parts)
+        job["next_addresses"] = {self._part_key(part): part.address_list()[0] for part in parts}
+        self._publish_progress(job, force=True)
+        try:
+            self.jobs.checkpoint(job, [dataclasses.asdict(part) for part in parts])
+        except sqlite3.Error:
+            self.logger.exception("Failed to checkpoint scan job %s", job["id"])
+
+    async def pause_job(self, job_id: str) -> Dict[str, Any]:
+        """Ask a queued or running job to stop after the current probe and checkpoint."""
+
+        job = self.jobs.get_live(job_id)
+        if job is None:
+            raise LookupError(f"Scan job {job_id} not found")
+        if job["status"] not in ("queued", "running"):
+            raise ValueError(f"Scan job is {job['status']} and cannot be paused")
+        job["pause_requested"] = True
+        return self.serialize_job(job)
+
+    async def resume_job(self, job_id: str) -> Dict[str, Any]:
+        """Re-queue a paused job from its checkpoint, restoring it from SQLite if needed."""
+
+        job = self.jobs.get_live(job_id)
+        if job is not None:
+            if job["status"] != PAUSED_STATUS:
+                raise ValueError(f"Scan job is {job['status']} and cannot be resumed")
+            parts = self._remaining_parts(job)
+        else:
+            restored = self.jobs.load_paused(job_id)
+            if restored is None:
+                raise LookupError(f"Paused scan job {job_id} not found")
+            job, raw_parts = restored
+            parts = [ScanParams(**raw) for raw in raw_parts]
+        if job.get("identify"):
+            job["_fingerprints"] = self._fingerprint_plan()
+        job.update(status="queued", pending_parts=len(parts), checkpoints={})
+        for key in ("paused_at", "remaining", "next_addresses"):
+            job.pop(key, None)
+        job.setdefault("errors", [])
+        job["_seen"] = {(result["port"], result["address"]): result for result in job["results"]}
+        self.jobs.discard_archived(job_id)
+        await self._enqueue_parts(job, parts)
+        return self.serialize_job(job)
+
+    async def cancel_job(self, job_id: str) -> Dict[str, Any]:
+        job = self.jobs.get_live(job_id)
+        if job is None:
+            restored = self.jobs.load_paused(job_id)
+            if restored is None:
+                raise LookupError(f"Scan job {job_id} not found")
+            job = restored[0]
+            self.jobs.add(job)
+        if job["status"] in FINISHED_STATUSES:
+            raise ValueError(f"Scan job is already {job['status']}")
+        job["cancelled"] = True
+        was_paused = job["status"] == PAUSED_STATUS
+        job["status"] = "cancelled"
+        if was_paused:
+            # No worker holds a paused job; finish it here.
+            job["pending_parts"] = 1
+            self._finish_part(job)
+        return self.serialize_job(job)
+
+    def _publish_progress(self, job: Dict[str, Any], *, force: bool = False) -> None:
+        now = time.monotonic()
+        interval = self.config.progress_event_interval
+        if not force and now - job.get("_progress_published", 0.0) < interval:
+            return
+        job["_progress_published"] = now
+        self._publish(
+            "rs485.scan.progress",
+            {
+                "job_id": job.get("id"),
+                "kind": job.get("kind", "scan"),
+                "status": job.get("status"),
+                "progress": job.get("progress", 0),
+                "total": job.get("total", 0),
+                "result_count": len(job.get("results", [])),
+                "timeout": job.get("timeout"),
+            },
+        )
+
+    def _publish(self, event_type: str, payload: Dict[str, Any]) -> None:
+        bus = self.context.state.get("event_bus")
+        loop = self._loop
+        if not isinstance(bus, EventBus) or loop is None or loop.is_closed():
+            return
+        event: EventPayload = {
+            "type": event_type,
+            "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+            "payload": payload,
+            "notify": False,
+        }
+        task = loop.create_task(bus.publish(event))
+        self._publish_tasks.add(task)
+        task.add_done_callback(self._publish_tasks.discard)
+
+    def get_worker(self, port: str) -> PortWorker:
+        """Return the worker that owns ``port``, starting it if needed."""
+
+        return self._get_or_create_worker(port)
+
+    def clear_address_cache(self, port: Optional[str] = None) -> int:
+        return self.address_cache.clear(port)
+
+    def port_stats(self) -> List[Dict[str, Any]]:
+        return [worker.snapshot() for worker in self.workers.values()]
+
+    async def read_registers(
+        self,
+        *,
+        port: str,
+        baudrate: int,
+        address: int,
+        register: int,
+        function: int = 3,
+        count: int = 1,
+        timeout: Optional[float] = None,
+        parity: str = "N",
+        priority: int = PRIORITY_INTERACTIVE,
+    ) -> Dict[str, Any]:
+        """Perform a single read on ``port`` ahead of any queued scan probes."""
+
+        worker = self._get_or_create_worker(port)
+        response = await worker.transact(
+            self._build_request(address, register, count, function),
+            timeout=timeout or self.default_timeout,
+            baudrate=baudrate,
+            parity=parity,
+            priority=priority,
+        )
+        result: Dict[str, Any] = {
+            "port": port,
+            "address": address,
+            "register": register,
+            "function": function,
+            "raw": response.hex(),
+            "value": None,
+            "exception": None,
+            "responded": bool(response),
+        }
+        if self._valid_response(response, address, function, count):
+            result["value"] = self._parse_value(response, count, function)
+        else:
+            result["exception"] = parse_exception(response)
+            result["responded"] = result["exception"] is not None
+        return result
 
     def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
         return self.jobs.get(job_id)
 
-    def list_jobs(self) -> List[Dict[str, Any]]:
-        return list(self.jobs.values())
+    def registration_entries(
+        self,
+        job_id: str,
+        *,
+        addresses: Optional[Iterable[int]] = None,
+        names: Optional[Mapping[int, str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Turn a job's responders into ``DeviceRegistryService.create_rs485_slaves`` entries.
 
-    def serialize_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
-        return {
+        ``addresses`` selects which responders to register (all by default).
+        """
+
+        job = self.get_job(job_id)
+        if not job:
+            raise LookupError(f"Scan job {job_id} not found")
+        selected = None if addresses is None else set(addresses)
+        names = names or {}
+        entries: List[Dict[str, Any]] = []
+        for result in job["results"]:
+            address = int(result["address"])
+            if selected is not None and address not in selected:
+                continue
+            module = result.get("device_type_slug")
+            entries.append(
+                {
+                    "port": result["port"],
+                    "baudrate": result["baudrate"],
+                    "address": address,
+                    "name": names.get(address) or (f"{module} #{address}" if module else None),
+                    "metadata": {
+                        "parity": result.get("parity", "N"),
+                        "module_slug": module,
+                        "scan_job_id": job_id,
+                    },
+                }
+            )
+        return entries
+
+    def list_jobs(
+        self,
+        *,
+        offset: int = 0,
+        limit: int = 20,
+        status: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        total, items = self.jobs.list_jobs(offset=offset, limit=limit, status=status)
+        return {"total": total, "offset": offset, "limit": limit, "items": items}
+
+    def _get_conn(self) -> Optional[sqlite3.Connection]:
+        conn = self.context.state.get("db_conn")
+        return conn if isinstance(conn, sqlite3.Connection) else None
+
+    def serialize_job(self, job: Dict[str, Any], *, since: Optional[int] = None) -> Dict[str, Any]:
+        """Serialize ``job``; with ``since`` only results after that index are included."""
+
+        results = job.get("results", [])
+        offset = min(max(0, since), len(results)) if since is not None else 0
+        serialized = {
             "id": job["id"],
+            "kind": job.get("kind", "scan"),
             "status": job["status"],
             "progress": job.get("progress", 0),
             "total": job.get("total", 0),
-            "results": job.get("results", []),
+            "results": results[offset:] if offset else results,
+            "results_offset": offset,
+            "result_count": len(results),
             "error": job.get("error"),
             "started_at": job.get("started_at"),
+            "finished_at": job.get("finished_at"),
             "device_id": job.get("device_id"),
             "device_name": job.get("device_name"),
             "port": job.get("port"),
+            "adaptive_timeout": job.get("adaptive_timeout", False),
+            "timeout": job.get("timeout"),
+            "identify": job.get("identify", False),
+            "mode": job.get("mode", SCAN_MODE_FULL),
+            "skipped": job.get("skipped", 0),
+            "pause_requested": bool(job.get("pause_requested")),
         }
+        if serialized["status"] == PAUSED_STATUS:
+            serialized.update(
+                paused_at=job.get("paused_at"),
+                remaining=job.get("remaining", 0),
+                next_addresses=job.get("next_addresses", {}),
+            )
+        if serialized["kind"] == "discovery":
+            serialized.update(
+                ports=job.get("ports", []),
+                baudrates=job.get("baudrates", []),
+                parities=job.get("parities", []),
+                timeouts=job.get("timeouts", {}),
+                errors=job.get("errors", []),
+            )
+        return serialized
 
     @staticmethod
     def _build_request(address: int, register: int, count: int, function: int) -> bytes:
@@ -246,8 +972,7 @@ class ModbusScannerService(Service):
                 count & 0xFF,
             ]
         )
-        crc = ModbusScannerService._crc16(pdu)
-        return pdu + crc.to_bytes(2, byteorder="little")
+        return append_crc(pdu)
 
     @staticmethod
     def _valid_response(response: bytes, address: int, function: int, count: int) -> bool:
@@ -257,31 +982,22 @@ class ModbusScannerService(Service):
             return False
         data_len = response[2]
         expected_len = 3 + data_len + 2
-        if data_len != count * 2 or len(response) < expected_len:
+        if data_len != expected_byte_count(function, count) or len(response) < expected_len:
             return False
         body = response[: expected_len - 2]
         crc = int.from_bytes(response[expected_len - 2 : expected_len], byteorder="little")
-        return crc == ModbusScannerService._crc16(body)
+        return crc == crc16(body)
 
     @staticmethod
-    def _parse_value(response: bytes, count: int) -> int:
+    def _parse_value(response: bytes, count: int, function: int = 3) -> int:
         data_len = response[2]
         data = response[3 : 3 + data_len]
+        if function in (1, 2):
+            bits = int.from_bytes(data, byteorder="little", signed=False)
+            return bits & ((1 << count) - 1)
         if len(data) < 2:
             return 0
         value = int.from_bytes(data[:2], byteorder="big", signed=False)
         if count > 1 and len(data) >= count * 2:
             value = int.from_bytes(data[: count * 2], byteorder="big", signed=False)
         return value
-
-    @staticmethod
-    def _crc16(data: bytes) -> int:
-        crc = 0xFFFF
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x0001:
-                    crc = (crc >> 1) ^ 0xA001
-                else:
-                    crc >>= 1
-        return crc & 0xFFFF
@@ -318,6 +318,8 @@ class ModuleConfigService(Service):
         self.parser = ModuleConfigParser()
         self._modules: List[ModuleDef] = []
         self._module_types: List[ModuleTypeDef] = []
+        # Bumped on every (re)load so consumers can drop plans built from older configs.
+        self.revision = 0
 
     async def _start(self) -> None:
         user_dir = Path(self.config.user_configs_dir)
@@ -407,6 +409,7 @@ class ModuleConfigService(Service):
             raise
         self._modules = parsed.modules
         self._module_types = parsed.module_types
+        self.revision += 1
         self._persist(conn, parsed)
         self.context.state["module_configs"] = [m.to_record() for m in self._modules]
         self.context.state["module_config_types"] = [t.to_record() for t in self._module_types]
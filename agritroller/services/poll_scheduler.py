@@ -0,0 +1,149 @@
+"""Deadline scheduling of RS-485 polls that share one bus."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from agritroller.modbus.framing import character_time, expected_byte_count, inter_frame_gap
+from agritroller.modbus.registers import ReadBlock
+
+REQUEST_CHARACTERS = 8  # address, function, start, quantity, CRC
+RESPONSE_OVERHEAD = 5  # address, function, byte count, CRC
+ACHIEVED_SMOOTHING = 0.2
+MIN_INTERVAL = 0.05
+# Priority of devices that do not set ``poll_priority``; lower numbers are more urgent.
+DEFAULT_POLL_PRIORITY = 10
+
+
+def transaction_time(block: ReadBlock, baudrate: int, *, turnaround: float) -> float:
+    """Bus time of one read: both frames, their 3.5T gaps and the slave's turnaround."""
+
+    characters = REQUEST_CHARACTERS + RESPONSE_OVERHEAD + expected_byte_count(block.function, block.count)
+    return characters * character_time(baudrate) + 2 * inter_frame_gap(baudrate) + turnaround
+
+
+@dataclass
+class PollTiming:
+    """Requested and achieved poll rate of one device.
+
+    As with port worker priorities, a lower ``priority`` is more urgent: such
+    devices are polled first when due together and stretched last.
+    """
+
+    requested: float
+    priority: int = DEFAULT_POLL_PRIORITY
+    cost: float = 0.0
+    effective: float = 0.0
+    next_due: float = 0.0
+    completed: int = 0
+    overruns: int = 0
+    achieved: Optional[float] = None
+    last_completed: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        self.requested = max(MIN_INTERVAL, self.requested)
+        self.effective = self.effective or self.requested
+
+    @property
+    def load(self) -> float:
+        """Share of the bus this device needs at its requested rate."""
+
+        return self.cost / self.requested
+
+    def complete(self, now: float) -> None:
+        if self.last_completed is not None:
+            interval = now - self.last_completed
+            self.achieved = (
+                interval
+                if self.achieved is None
+                else self.achieved + ACHIEVED_SMOOTHING * (interval - self.achieved)
+            )
+        first = self.last_completed is None
+        self.last_completed = now
+        self.completed += 1
+        if first:
+            # The schedule starts at the first poll; there was no earlier deadline to miss.
+            self.next_due = now + self.effective
+        else:
+            self.next_due += self.effective
+        if self.next_due < now:
+            # The bus could not serve this device before its next deadline.
+            self.overruns += 1
+            self.next_due = now
+
+    def defer(self, now: float, delay: float) -> None:
+        self.next_due = now + delay
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "priority": self.priority,
+            "requested_interval_s": round(self.requested, 4),
+            "effective_interval_s": round(self.effective, 4),
+            "achieved_interval_s": round(self.achieved, 4) if self.achieved is not None else None,
+            "requested_hz": round(1 / self.requested, 3),
+            "achieved_hz": round(1 / self.achieved, 3) if self.achieved else None,
+            "stretched": self.effective > self.requested,
+            "cost_ms": round(self.cost * 1000, 3),
+            "completed": self.completed,
+            "overruns": self.overruns,
+        }
+
+
+class BusSchedule:
+    """Fits the requested poll rates of one bus into its capacity.
+
+    The bus is treated as a single server: a device costs ``cost / interval``
+    of it. When the requested rates add up to more than ``capacity``, the
+    least urgent devices (highest ``priority`` number) get their intervals
+    stretched first (up to ``max_stretch`` times), then the next priority
+    level, and so on. Whatever
+    still does not fit is reported as an overload and shows up as per-device
+    overruns.
+    """
+
+    def __init__(self, *, capacity: float = 0.8, max_stretch: float = 10.0) -> None:
+        self.capacity = max(0.01, capacity)
+        self.max_stretch = max(1.0, max_stretch)
+        self.requested_utilization = 0.0
+        self.utilization = 0.0
+        self.overloaded = False
+
+    def fit(self, timings: Iterable[PollTiming], *, fixed_load: float = 0.0) -> None:
+        """Set ``effective`` intervals; ``fixed_load`` is bus time that cannot be stretched."""
+
+        entries = list(timings)
+        for timing in entries:
+            timing.effective = timing.requested
+        total = fixed_load + sum(timing.load for timing in entries)
+        self.requested_utilization = total
+        for priority in sorted({timing.priority for timing in entries}, reverse=True):
+            if total <= self.capacity:
+                break
+            group = [timing for timing in entries if timing.priority == priority]
+            group_load = sum(timing.load for timing in group)
+            rest = total - group_load
+            if rest + group_load / self.max_stretch <= self.capacity:
+                factor = group_load / (self.capacity - rest)
+            else:
+                factor = self.max_stretch
+            for timing in group:
+                timing.effective = timing.requested * factor
+            total = rest + group_load / factor
+        self.utilization = total
+        self.overloaded = total > self.capacity
+
+    @staticmethod
+    def due(timings: Dict[int, PollTiming], now: float) -> List[int]:
+        """Keys of the entries whose deadline has passed, earliest and most important first."""
+
+        ready = [(timing.next_due, timing.priority, key) for key, timing in timings.items() if timing.next_due <= now]
+        return [key for _, _, key in sorted(ready)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "requested_utilization": round(self.requested_utilization, 4),
+            "utilization": round(self.utilization, 4),
+            "overloaded": self.overloaded,
+        }
@@ -56,18 +56,30 @@ class PortMonitorService(Service):
         skip_unchanged: bool = False,
     ) -> List[Dict[str, Any]]:
         registry = self._get_registry()
-        devices = registry.list_devices()
         results: List[Dict[str, Any]] = []
-        for device in devices:
-            try:
-                updated = await self.refresh_device(
-                    device["id"],
+        for devices in self._group_by_port(registry.list_devices()).values():
+            results.extend(
+                await self._refresh_devices(
+                    devices,
                     notify_on_change_only=notify_on_change_only,
                     skip_if_unchanged=skip_unchanged,
                 )
-                results.append(updated)
-            except LookupError:
-                continue
+            )
+        return results
+
+    async def refresh_ports(
+        self,
+        device_ids: List[int],
+        *,
+        notify_on_change_only: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Refresh ``device_ids`` with a single probe per distinct port."""
+
+        registry = self._get_registry()
+        devices = [device for device in map(registry.get_device, device_ids) if device]
+        results: List[Dict[str, Any]] = []
+        for group in self._group_by_port(devices).values():
+            results.extend(await self._refresh_devices(group, notify_on_change_only=notify_on_change_only))
         return results
 
     async def refresh_device(
@@ -77,22 +89,51 @@ class PortMonitorService(Service):
         notify_on_change_only: bool = False,
         skip_if_unchanged: bool = False,
     ) -> Dict[str, Any]:
-        registry = self._get_registry()
-        device = registry.get_device(device_id)
+        device = self._get_registry().get_device(device_id)
         if not device:
             raise LookupError(f"Device {device_id} not found")
-        status, message = await asyncio.to_thread(self._probe_port, device)
-        changed = status != device.get("status") or (message or "") != (device.get("status_message") or "")
-        if skip_if_unchanged and not changed:
-            return device
-        updated = registry.update_device_status(
-            device_id,
+        refreshed = await self._refresh_devices(
+            [device],
+            notify_on_change_only=notify_on_change_only,
+            skip_if_unchanged=skip_if_unchanged,
+        )
+        return refreshed[0]
+
+    async def _refresh_devices(
+        self,
+        devices: List[Dict[str, Any]],
+        *,
+        notify_on_change_only: bool = False,
+        skip_if_unchanged: bool = False,
+    ) -> List[Dict[str, Any]]:
+        # Devices sharing a bus (the gateway and its Modbus slaves) get one probe.
+        status, message = await asyncio.to_thread(self._probe_port, devices[0])
+        unchanged: List[Dict[str, Any]] = []
+        changed: List[Dict[str, Any]] = []
+        for device in devices:
+            same = status == device.get("status") and (message or "") == (device.get("status_message") or "")
+            (unchanged if same else changed).append(device)
+        stale = changed if skip_if_unchanged else devices
+        updated = self._get_registry().update_device_statuses(
+            [device["id"] for device in stale],
             status=status,
             status_message=message,
         )
-        if not notify_on_change_only or changed:
-            await self._broadcast_status(updated)
-        return updated
+        changed_ids = {device["id"] for device in changed}
+        reported = [device for device in updated if not notify_on_change_only or device["id"] in changed_ids]
+        # Every device gets its event; only the first one carries the port's notification.
+        for index, device in enumerate(reported):
+            await self._broadcast_status(device, notify=index == 0, sharing=len(reported))
+        results = {device["id"]: device for device in (unchanged if skip_if_unchanged else [])}
+        results.update((device["id"], device) for device in updated)
+        return [results[device["id"]] for device in devices]
+
+    @staticmethod
+    def _group_by_port(devices: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for device in devices:
+            groups.setdefault(str(device["port"]).lower(), []).append(device)
+        return groups
 
     def _probe_port(self, device: Dict[str, Any]) -> Tuple[str, str]:
         port_path = device["port"]
@@ -106,13 +147,13 @@ class PortMonitorService(Service):
         except (SerialException, OSError) as exc:
             return self.STATUS_BUSY, str(exc)
 
-    async def _broadcast_status(self, device: Dict[str, Any]) -> None:
+    async def _broadcast_status(self, device: Dict[str, Any], *, notify: bool = True, sharing: int = 1) -> None:
         bus = self._get_event_bus()
         status = device.get("status", self.STATUS_UNKNOWN)
         severity = self._severity_for_status(status)
         message = device.get("status_message") or "Статус порта не определён"
         timestamp = datetime.now(tz=timezone.utc).isoformat()
-        event = {
+        event: Dict[str, Any] = {
             "type": "device.port_status",
             "timestamp": timestamp,
             "payload": {
@@ -123,14 +164,19 @@ class PortMonitorService(Service):
                 "message": message,
                 "checked_at": device.get("status_checked_at") or timestamp,
             },
-            "notify": True,
-            "notification": {
+            "notify": notify,
+        }
+        if notify:
+            event["notification"] = {
                 "severity": severity,
-                "message": f"{device['name']}: {message}",
+                "message": (
+                    f"{device['port']}: {message} (устройств: {sharing})"
+                    if sharing > 1
+                    else f"{device['name']}: {message}"
+                ),
                 "source": "port_monitor",
                 "created_at": timestamp,
-            },
-        }
+            }
         await bus.publish(event)
 
     async def _watch_ports(self) -> None:
@@ -3,30 +3,608 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, List, Optional
+import contextlib
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 from agritroller.config import RS485Config
+from agritroller.modbus.framing import parse_exception
+from agritroller.modbus.planner import ReadPlanner
+from agritroller.modbus.registers import (
+    PollPoint,
+    ReadBlock,
+    build_read_request,
+    encode_point,
+    read_payload,
+)
+from agritroller.modbus.transforms import Transform, TransformCache
+from agritroller.modbus.vectorized import Decoder, make_decoder
+from agritroller.modbus.writes import (
+    WriteBlock,
+    build_readback_request,
+    build_write_request,
+    is_writable,
+    plan_writes,
+    readback_values,
+    write_acknowledged,
+)
 from agritroller.services.base import BootstrapContext, Service
 from agritroller.services.device_registry import DeviceRegistryService
+from agritroller.services.event_bus import EventBus, EventPayload
+from agritroller.services.modbus_scanner import PRIORITY_ACTUATOR, PRIORITY_POLL, ModbusScannerService, PortWorker
+from agritroller.services.poll_scheduler import DEFAULT_POLL_PRIORITY, BusSchedule, PollTiming, transaction_time
+from agritroller.services.telemetry import TelemetryService
 from agritroller.services.templates import TemplateService
 
 
+@dataclass
+class PollTarget:
+    """A registered slave together with the reads that cover its module."""
+
+    device_id: int
+    name: str
+    port: str
+    baudrate: int
+    parity: str
+    address: int
+    module: str
+    points: List[PollPoint]
+    blocks: List[ReadBlock]
+    revision: int = 0
+    # Effective transform spec per point name, compiled into ``transforms`` and inverted for writes.
+    specs: Dict[str, Any] = field(default_factory=dict)
+    transforms: Dict[str, Transform] = field(default_factory=dict)
+    decoders: Dict[ReadBlock, Decoder] = field(default_factory=dict)
+    timing: PollTiming = field(default_factory=lambda: PollTiming(requested=1.0))
+    online: Optional[bool] = None
+    polls: int = 0
+    failures: int = 0
+    last_poll_s: float = 0.0
+
+    def key(self) -> tuple[Any, ...]:
+        return (self.port, self.baudrate, self.parity, self.address, self.module)
+
+
+@dataclass
+class PendingCommand:
+    """Actuator writes for one slave collected during the batching window."""
+
+    target: PollTarget
+    writes: Dict[str, Tuple[PollPoint, Any]] = field(default_factory=dict)
+    verify: bool = False
+    waiters: List[asyncio.Future[Dict[str, Any]]] = field(default_factory=list)
+    task: Optional[asyncio.Task[None]] = None
+
+
 class RS485Service(Service):
-    """Loads user templates and exchanges messages with RS-485 devices."""
+    """Loads user templates and polls RS-485 devices described by module configs.
+
+    Every enabled RS-485 device whose metadata names a Modbus address and a
+    module (``module_slug``, as set by scan imports) is polled with the block
+    reads planned by :class:`ReadPlanner`. Each device asks for its own
+    interval (``poll_interval_s`` in its metadata or device type settings,
+    else ``poll_interval``); a :class:`BusSchedule` per port fits those rates
+    into the bus time available at its baudrate and polls are started in
+    deadline order. Due polls run concurrently through the scanner's port
+    worker at ``PRIORITY_POLL``, so the bus never idles between slaves while
+    actuator and interactive requests still go first. A slave that stays
+    silent costs one timeout per attempt and is then retried every
+    ``poll_offline_interval``. Replies are decoded by one decoder per block
+    (NumPy-backed for large blocks when available, see ``numpy_decode``),
+    with the device's mapping chains compiled once by a
+    :class:`TransformCache`.
+
+    Actuator commands for the same slave that arrive within
+    ``command_window`` are sent together: adjacent coils go out as one FC15
+    and adjacent holding registers as one FC16, at ``PRIORITY_ACTUATOR``.
+    """
 
     def __init__(self, context: BootstrapContext, config: RS485Config) -> None:
         super().__init__("rs485", context)
         self.config = config
         self._active_template: Optional[Dict[str, Any]] = None
         self._devices: List[Dict[str, Any]] = []
+        self._targets: Dict[int, PollTarget] = {}
+        self._port_tasks: Dict[str, asyncio.Task[None]] = {}
+        self._schedules: Dict[str, BusSchedule] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._supervisor: Optional[asyncio.Task[None]] = None
+        self._unknown_modules: set[tuple[int, str]] = set()
+        self._pending: Dict[int, PendingCommand] = {}
+        self.transforms = TransformCache()
+        self.planner = ReadPlanner(
+            max_register_gap=config.read_max_register_gap,
+            max_bit_gap=config.read_max_bit_gap,
+        )
 
     async def _start(self) -> None:
         await self._load_devices()
         await self._load_template(self.config.default_template_slug)
+        self.context.state["rs485_service"] = self
+        if self.config.poll_enabled:
+            self.sync_targets()
+            self._supervisor = asyncio.get_running_loop().create_task(self._supervise())
 
     async def _stop(self) -> None:
         self.logger.info("Stopping RS-485 service")
-        await asyncio.sleep(0)
+        self.context.state.pop("rs485_service", None)
+        tasks = list(self._port_tasks.values())
+        tasks.extend(pending.task for pending in self._pending.values() if pending.task)
+        if self._supervisor:
+            tasks.append(self._supervisor)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._port_tasks.clear()
+        self._pending.clear()
+        self._supervisor = None
+
+    def poll_stats(self) -> Dict[str, Any]:
+        return {
+            "interval": self.config.poll_interval,
+            "ports": {
+                port: {**schedule.to_dict(), "devices": sum(1 for t in self._targets.values() if t.port == port)}
+                for port, schedule in self._schedules.items()
+            },
+            "devices": [
+                {
+                    "device_id": target.device_id,
+                    "port": target.port,
+                    "address": target.address,
+                    "module": target.module,
+                    "online": target.online,
+                    "reads": len(target.blocks),
+                    "polls": target.polls,
+                    "failures": target.failures,
+                    "last_poll_ms": round(target.last_poll_s * 1000, 3),
+                    **target.timing.to_dict(),
+                }
+                for target in self._targets.values()
+            ],
+        }
+
+    def sync_targets(self) -> None:
+        """Rebuild poll targets from the device registry and module configs."""
+
+        registry = self.context.state.get("device_registry")
+        scanner = self.context.state.get("modbus_scanner")
+        if not isinstance(registry, DeviceRegistryService) or not isinstance(scanner, ModbusScannerService):
+            return
+        catalog, revision = self._catalog()
+        device_types = {device_type["slug"]: device_type for device_type in registry.list_device_types()}
+        targets: Dict[int, PollTarget] = {}
+        for device in registry.list_devices(kind="rs485"):
+            target = self._build_target(device, catalog, revision, device_types)
+            if target is None:
+                continue
+            previous = self._targets.get(target.device_id)
+            if previous is not None and previous.key() == target.key() and previous.revision == revision:
+                # Keep block splits learned from exception replies.
+                target.blocks = previous.blocks
+                if previous.transforms is target.transforms:
+                    target.decoders = previous.decoders
+            if previous is not None and previous.key() == target.key():
+                previous.timing.requested = target.timing.requested
+                previous.timing.priority = target.timing.priority
+                target.timing = previous.timing
+                target.online = previous.online
+                target.polls = previous.polls
+                target.failures = previous.failures
+            targets[target.device_id] = target
+        removed = [device_id for device_id in self._targets if device_id not in targets]
+        self._targets = targets
+        self.transforms.retain(targets)
+        telemetry = self.context.state.get("telemetry_service")
+        if isinstance(telemetry, TelemetryService):
+            telemetry.latest.discard(removed)
+        ports = {target.port for target in targets.values()}
+        for target in targets.values():
+            target.timing.cost = sum(
+                transaction_time(block, target.baudrate, turnaround=self.config.poll_turnaround)
+                for block in target.blocks
+            )
+        for port in list(self._port_tasks):
+            if port not in ports:
+                self._port_tasks.pop(port).cancel()
+                self._schedules.pop(port, None)
+                self._wakeups.pop(port, None)
+        for port in ports - self._port_tasks.keys():
+            self._schedules[port] = BusSchedule(
+                capacity=self.config.poll_bus_capacity,
+                max_stretch=self.config.poll_max_stretch,
+            )
+            self._wakeups[port] = asyncio.Event()
+            self._port_tasks[port] = asyncio.get_running_loop().create_task(
+                self._poll_port(scanner.get_worker(port), port)
+            )
+        for port in ports:
+            self._refit(port)
+            self._wakeups[port].set()
+
+    async def command(self, device_id: int, values: Mapping[str, Any], *, verify: bool = False) -> Dict[str, Any]:
+        """Write actuator ``values`` (point name -> value) to an RS-485 device.
+
+        Commands for the same device issued within ``command_window`` share
+        one batch and every caller gets the batch result. With ``verify`` the
+        written range is read back and compared. Raises ``LookupError`` for an
+        unknown device and ``ValueError`` for unknown, read-only or invalid
+        values.
+        """
+
+        if not values:
+            raise ValueError("No values to write")
+        target = self._command_target(device_id)
+        points = {point.name: point for point in target.points}
+        writes: Dict[str, Tuple[PollPoint, Any]] = {}
+        for name, value in values.items():
+            point = points.get(name)
+            if point is None:
+                raise ValueError(f"Module '{target.module}' has no point '{name}'")
+            if not is_writable(point):
+                raise ValueError(f"'{name}' is not a coil or holding register")
+            encode_point(point, value, target.specs.get(name))
+            writes[name] = (point, value)
+        pending = self._pending.get(device_id)
+        if pending is None:
+            pending = self._pending[device_id] = PendingCommand(target)
+            pending.task = asyncio.get_running_loop().create_task(self._flush_commands(device_id))
+        pending.writes.update(writes)
+        pending.verify = pending.verify or verify
+        waiter: asyncio.Future[Dict[str, Any]] = asyncio.get_running_loop().create_future()
+        pending.waiters.append(waiter)
+        return await waiter
+
+    def _command_target(self, device_id: int) -> PollTarget:
+        target = self._targets.get(device_id)
+        if target is not None:
+            return target
+        registry = self.context.state.get("device_registry")
+        device = registry.get_device(device_id) if isinstance(registry, DeviceRegistryService) else None
+        if not device or device.get("kind") != "rs485":
+            raise LookupError(f"RS-485 device {device_id} not found")
+        catalog, revision = self._catalog()
+        device_types = {device_type["slug"]: device_type for device_type in registry.list_device_types()}
+        target = self._build_target(device, catalog, revision, device_types)
+        if target is None:
+            raise LookupError(f"RS-485 device {device_id} has no Modbus address or known module")
+        return target
+
+    def _catalog(self) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        modules = self.context.state.get("module_config_service")
+        catalog = {record["slug"]: record for record in modules.list_modules()} if modules else {}
+        return catalog, int(getattr(modules, "revision", 0))
+
+    async def _flush_commands(self, device_id: int) -> None:
+        pending = self._pending[device_id]
+        try:
+            await asyncio.sleep(self.config.command_window)
+            self._pending.pop(device_id, None)
+            result = await self._write(pending)
+        except asyncio.CancelledError:
+            for waiter in pending.waiters:
+                waiter.cancel()
+            raise
+        except Exception as exc:
+            for waiter in pending.waiters:
+                if not waiter.done():
+                    waiter.set_exception(exc)
+            return
+        for waiter in pending.waiters:
+            if not waiter.done():
+                waiter.set_result(result)
+
+    async def _write(self, pending: PendingCommand) -> Dict[str, Any]:
+        target = pending.target
+        scanner = self.context.state.get("modbus_scanner")
+        if not isinstance(scanner, ModbusScannerService):
+            raise RuntimeError("Modbus scanner unavailable")
+        worker = scanner.get_worker(target.port)
+        blocks = plan_writes(pending.writes.values(), target.specs)
+        errors: List[str] = []
+        written: List[WriteBlock] = []
+        for block in blocks:
+            request = build_write_request(target.address, block)
+            response = await self._transact(worker, target, request)
+            if write_acknowledged(response, request):
+                written.append(block)
+                continue
+            code = parse_exception(response)
+            errors.append(
+                f"FC{block.function} at {block.address:#06x}: "
+                + (f"exception {code:#04x}" if code is not None else "no valid reply")
+            )
+            if not response:
+                break
+        verified: Optional[bool] = None
+        if pending.verify and written:
+            verified = True
+            for block in written:
+                response = await self._transact(worker, target, build_readback_request(target.address, block))
+                actual = readback_values(response, target.address, block)
+                if actual != block.values:
+                    verified = False
+                    errors.append(f"Read-back of {block.address:#06x} returned {list(actual or [])}")
+        values = {name: value for name, (_, value) in pending.writes.items()}
+        ok = not errors and len(written) == len(blocks)
+        result = {
+            "device_id": target.device_id,
+            "port": target.port,
+            "address": target.address,
+            "values": values,
+            "writes": len(blocks),
+            "ok": ok,
+            "verified": verified,
+            "errors": errors,
+        }
+        telemetry = self.context.state.get("telemetry_service")
+        if ok and isinstance(telemetry, TelemetryService):
+            telemetry.latest.update(target.device_id, values)
+        await self._publish(
+            "rs485.command",
+            {key: result[key] for key in ("device_id", "port", "address", "values", "ok", "verified")},
+        )
+        return result
+
+    async def _transact(self, worker: PortWorker, target: PollTarget, request: bytes) -> bytes:
+        return await worker.transact(
+            request,
+            timeout=self.config.command_timeout,
+            baudrate=target.baudrate,
+            parity=target.parity,
+            priority=PRIORITY_ACTUATOR,
+        )
+
+    @staticmethod
+    def _type_poll_interval(device_type: Optional[Dict[str, Any]]) -> Optional[float]:
+        for setting in (device_type or {}).get("settings_schema") or []:
+            if setting.get("name") == "poll_interval_s" and setting.get("default") is not None:
+                return float(setting["default"])
+        return None
+
+    @staticmethod
+    def _transform_specs(
+        device: Dict[str, Any],
+        device_type: Optional[Dict[str, Any]],
+        points: List[PollPoint],
+    ) -> Dict[str, Any]:
+        """Per-point transforms: device ``mapping``, else type ``mapping_defaults``, else the register's."""
+
+        mapping = device.get("mapping") or {}
+        defaults = (device_type or {}).get("mapping_defaults") or {}
+        return {
+            point.name: mapping.get(point.name) or defaults.get(point.name) or point.transform for point in points
+        }
+
+    def _refit(self, port: str) -> None:
+        """Recompute effective intervals of ``port`` from the reachable devices."""
+
+        schedule = self._schedules.get(port)
+        if schedule is None:
+            return
+        online: List[PollTiming] = []
+        fixed = 0.0
+        for target in self._targets.values():
+            if target.port != port:
+                continue
+            if target.online is False:
+                # Offline slaves cost one timeout per retry and are not stretched.
+                fixed += self.config.poll_timeout / max(self.config.poll_timeout, self.config.poll_offline_interval)
+            else:
+                online.append(target.timing)
+        was_overloaded = schedule.overloaded
+        schedule.fit(online, fixed_load=fixed)
+        if schedule.overloaded and not was_overloaded:
+            self.logger.warning(
+                "RS-485 polls on %s need %.0f%% of the bus; intervals stretched to the limit",
+                port,
+                schedule.requested_utilization * 100,
+            )
+
+    def _build_target(
+        self,
+        device: Dict[str, Any],
+        catalog: Dict[str, Dict[str, Any]],
+        revision: int,
+        device_types: Dict[str, Dict[str, Any]],
+    ) -> Optional[PollTarget]:
+        metadata = device.get("metadata") or {}
+        slug = metadata.get("module_slug") or metadata.get("module")
+        if not device.get("enabled", True) or not slug or metadata.get("modbus_address") is None:
+            return None
+        record = catalog.get(str(slug))
+        if record is None:
+            if (device["id"], slug) not in self._unknown_modules:
+                self._unknown_modules.add((device["id"], slug))
+                self.logger.warning("RS-485 device #%s references unknown module '%s'", device["id"], slug)
+            return None
+        points, blocks = self.planner.for_module(record, revision=revision)
+        if not points:
+            return None
+        device_type = device_types.get(str(device.get("device_type_slug")))
+        specs = self._transform_specs(device, device_type, points)
+        return PollTarget(
+            device_id=int(device["id"]),
+            name=str(device["name"]),
+            port=str(device["port"]),
+            baudrate=int(device["baudrate"]),
+            parity=str(metadata.get("parity") or "N"),
+            address=int(metadata["modbus_address"]),
+            module=str(slug),
+            points=points,
+            blocks=list(blocks),
+            revision=revision,
+            specs=specs,
+            transforms=self.transforms.for_device(int(device["id"]), specs),
+            timing=PollTiming(
+                requested=float(
+                    metadata.get("poll_interval_s")
+                    or self._type_poll_interval(device_type)
+                    or self.config.poll_interval
+                ),
+                priority=int(
+                    DEFAULT_POLL_PRIORITY if metadata.get("poll_priority") is None else metadata["poll_priority"]
+                ),
+            ),
+        )
+
+    async def _supervise(self) -> None:
+        interval = max(0.5, self.config.device_refresh_interval)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.sync_targets()
+            except Exception:  # pragma: no cover - defensive logging
+                self.logger.exception("Failed to refresh RS-485 poll targets")
+
+    async def _poll_port(self, worker: PortWorker, port: str) -> None:
+        wakeup = self._wakeups[port]
+        inflight: Dict[int, asyncio.Task[None]] = {}
+
+        def finished(device_id: int) -> None:
+            inflight.pop(device_id, None)
+            wakeup.set()
+
+        try:
+            while True:
+                wakeup.clear()
+                now = time.monotonic()
+                timings = {
+                    target.device_id: target.timing
+                    for target in self._targets.values()
+                    if target.port == port and target.device_id not in inflight
+                }
+                for device_id in BusSchedule.due(timings, now):
+                    task = asyncio.get_running_loop().create_task(
+                        self._poll_target(worker, self._targets[device_id])
+                    )
+                    inflight[device_id] = task
+                    task.add_done_callback(lambda _, device_id=device_id: finished(device_id))
+                    timings.pop(device_id)
+                deadline = min((timing.next_due for timing in timings.values()), default=None)
+                delay = self.config.device_refresh_interval if deadline is None else deadline - now
+                timer = asyncio.get_running_loop().call_later(max(0.0, delay), wakeup.set)
+                try:
+                    await wakeup.wait()
+                finally:
+                    timer.cancel()
+        finally:
+            for task in inflight.values():
+                task.cancel()
+
+    async def _poll_target(self, worker: PortWorker, target: PollTarget) -> None:
+        started = time.monotonic()
+        values: Dict[str, Any] = {}
+        errors = 0
+        for block in list(target.blocks):
+            response = await worker.transact(
+                build_read_request(target.address, block.function, block.address, block.count),
+                timeout=self.config.poll_timeout,
+                baudrate=target.baudrate,
+                parity=target.parity,
+                priority=PRIORITY_POLL,
+            )
+            if not response:
+                # A silent slave would time out on every remaining read too.
+                now = time.monotonic()
+                target.polls += 1
+                target.failures += 1
+                target.last_poll_s = now - started
+                target.timing.defer(now, self.config.poll_offline_interval)
+                await self._set_online(target, False)
+                return
+            payload = read_payload(response, target.address, block.function, block.count)
+            if payload is None:
+                if len(block.points) > 1 and parse_exception(response) is not None:
+                    # The slave refused the merged range (typically an unmapped
+                    # hole); read these points one by one from now on.
+                    self._split_block(target, block)
+                errors += 1
+                continue
+            decoder = target.decoders.get(block)
+            if decoder is None:
+                decoder = target.decoders[block] = make_decoder(
+                    block, target.transforms, vectorized=self.config.numpy_decode
+                )
+            values.update(decoder(payload))
+        now = time.monotonic()
+        target.polls += 1
+        target.last_poll_s = now - started
+        if not values:
+            # The slave answers but nothing decoded (exceptions, bad CRCs): a
+            # failed poll, retried after the usual interval.
+            target.failures += 1
+            target.timing.defer(now, target.timing.effective)
+            return
+        target.timing.complete(now)
+        await self._set_online(target, True)
+        telemetry = self.context.state.get("telemetry_service")
+        if isinstance(telemetry, TelemetryService):
+            telemetry.record(target.device_id, values)
+        await self._publish(
+            "rs485.poll",
+            {
+                "device_id": target.device_id,
+                "port": target.port,
+                "address": target.address,
+                "module": target.module,
+                "values": values,
+                "errors": errors,
+            },
+        )
+
+    def _split_block(self, target: PollTarget, block: ReadBlock) -> None:
+        index = target.blocks.index(block)
+        target.blocks[index : index + 1] = self.planner.split(block)
+        self.logger.info(
+            "Splitting FC%d read at %#06x for RS-485 device #%s after an exception reply",
+            block.function,
+            block.address,
+            target.device_id,
+        )
+
+    async def _set_online(self, target: PollTarget, online: bool) -> None:
+        previous, target.online = target.online, online
+        if previous != online:
+            self._refit(target.port)
+        if previous == online or (previous is None and online):
+            return
+        message = f"{target.name}: {'на связи' if online else 'не отвечает'}"
+        await self._publish(
+            "rs485.device.status",
+            {"device_id": target.device_id, "port": target.port, "address": target.address, "online": online},
+            notification={"severity": "ok" if online else "warning", "message": message},
+        )
+
+    async def _publish(
+        self,
+        event_type: str,
+        payload: Dict[str, Any],
+        *,
+        timestamp: Optional[str] = None,
+        notification: Optional[Dict[str, str]] = None,
+    ) -> None:
+        bus = self.context.state.get("event_bus")
+        if not isinstance(bus, EventBus):
+            return
+        timestamp = timestamp or datetime.now(tz=timezone.utc).isoformat()
+        event: EventPayload = {
+            "type": event_type,
+            "timestamp": timestamp,
+            "payload": payload,
+            "notify": notification is not None,
+        }
+        if notification is not None:
+            event["notification"] = {
+                "severity": notification["severity"],  # type: ignore[typeddict-item]
+                "message": notification["message"],
+                "source": "rs485",
+                "created_at": timestamp,
+            }
+        await bus.publish(event)
 
     async def _load_template(self, slug: str) -> None:
         template_service: TemplateService | None = self.context.state.get("template_service")
@@ -0,0 +1,190 @@
+"""Cache of recent per-address scan outcomes, persisted in SQLite."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from agritroller.config import ModbusScannerConfig
+from agritroller.services.database import connect
+
+SCAN_MODE_FULL = "full"
+SCAN_MODE_QUICK = "quick"
+SCAN_MODE_SKIP = "skip"
+SCAN_MODES = (SCAN_MODE_FULL, SCAN_MODE_QUICK, SCAN_MODE_SKIP)
+
+LineKey = Tuple[str, int, str]
+CacheKey = Tuple[str, int, str, int]
+
+logger = logging.getLogger("agritroller.scan_cache")
+
+
+class ScanAddressCache:
+    """Remembers which addresses answered on a port/baudrate/parity.
+
+    Entries older than ``address_cache_ttl`` are ignored. Outcomes are staged
+    in memory while a sweep runs and written to ``scan_address_cache`` in one
+    transaction by :meth:`flush`, so a 247-address sweep costs one commit.
+    Like the job archive, that commit runs on a worker thread over a
+    connection of its own; lookups load through ``conn_getter``.
+    """
+
+    def __init__(
+        self,
+        config: ModbusScannerConfig,
+        *,
+        conn_getter: Callable[[], Optional[sqlite3.Connection]],
+        path_getter: Callable[[], Optional[Path]],
+    ) -> None:
+        self.config = config
+        self._conn_getter = conn_getter
+        self._path_getter = path_getter
+        self._lines: Dict[LineKey, Dict[int, Tuple[bool, float]]] = {}
+        self._dirty: Dict[CacheKey, Tuple[bool, float]] = {}
+        self._writer: Optional[sqlite3.Connection] = None
+        self._flush_lock = asyncio.Lock()
+
+    def lookup(self, port: str, baudrate: int, parity: str, address: int) -> Optional[bool]:
+        """Return the last fresh outcome for ``address`` or ``None`` if unknown."""
+
+        entry = self._line(port, baudrate, parity).get(address)
+        if entry is None or not self._fresh(entry[1]):
+            return None
+        return entry[0]
+
+    def record(self, port: str, baudrate: int, parity: str, address: int, responded: bool) -> None:
+        entry = (responded, time.time())
+        self._line(port, baudrate, parity)[address] = entry
+        self._dirty[(port, baudrate, parity, address)] = entry
+
+    def order(
+        self,
+        port: str,
+        baudrate: int,
+        parity: str,
+        addresses: Iterable[int],
+        *,
+        mode: str,
+    ) -> Tuple[List[int], int]:
+        """Return ``(addresses to probe, skipped count)`` for a scan ``mode``.
+
+        ``quick`` probes known responders first, then unknown addresses and
+        known-empty ones last; ``skip`` leaves the known-empty ones out.
+        """
+
+        candidates = list(addresses)
+        if mode == SCAN_MODE_FULL:
+            return candidates, 0
+        responders: List[int] = []
+        unknown: List[int] = []
+        empty: List[int] = []
+        for address in candidates:
+            outcome = self.lookup(port, baudrate, parity, address)
+            bucket = unknown if outcome is None else responders if outcome else empty
+            bucket.append(address)
+        if mode == SCAN_MODE_SKIP:
+            return responders + unknown, len(empty)
+        return responders + unknown + empty, 0
+
+    async def flush(self) -> int:
+        """Commit staged outcomes in one transaction; returns how many were written.
+
+        On failure they stay staged for the next call, unless a newer outcome
+        for the same address was recorded meanwhile.
+        """
+
+        async with self._flush_lock:
+            batch, self._dirty = self._dirty, {}
+            if not batch or self._path_getter() is None:
+                # Without a database the outcomes only live in memory.
+                return 0
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except (sqlite3.Error, RuntimeError):
+                logger.exception("Failed to persist %d scan address outcomes", len(batch))
+                for key, entry in batch.items():
+                    self._dirty.setdefault(key, entry)
+                return 0
+        return len(batch)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _write(self, batch: Dict[CacheKey, Tuple[bool, float]]) -> None:
+        rows = [
+            (port, baudrate, parity, address, int(responded), checked_at)
+            for (port, baudrate, parity, address), (responded, checked_at) in batch.items()
+        ]
+        conn = self._writer_conn()
+        with conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO scan_address_cache (
+                    port, baudrate, parity, address, responded, checked_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            if self.config.address_cache_ttl > 0:
+                conn.execute(
+                    "DELETE FROM scan_address_cache WHERE checked_at < ?",
+                    (time.time() - self.config.address_cache_ttl,),
+                )
+
+    def _writer_conn(self) -> sqlite3.Connection:
+        if self._writer is None:
+            path = self._path_getter()
+            if path is None:
+                raise RuntimeError("Database unavailable for the scan address cache")
+            self._writer = connect(path)
+        return self._writer
+
+    def clear(self, port: Optional[str] = None) -> int:
+        """Forget cached outcomes for ``port`` (or every port); returns rows removed."""
+
+        self._lines = {key: line for key, line in self._lines.items() if port is not None and key[0] != port}
+        self._dirty = {key: entry for key, entry in self._dirty.items() if port is not None and key[0] != port}
+        conn = self._conn_getter()
+        if conn is None:
+            return 0
+        with conn:
+            if port is None:
+                cursor = conn.execute("DELETE FROM scan_address_cache")
+            else:
+                cursor = conn.execute("DELETE FROM scan_address_cache WHERE port = ?", (port,))
+        return cursor.rowcount
+
+    def _line(self, port: str, baudrate: int, parity: str) -> Dict[int, Tuple[bool, float]]:
+        key = (port, baudrate, parity)
+        line = self._lines.get(key)
+        if line is None:
+            line = self._lines[key] = self._load(key)
+        return line
+
+    def _load(self, key: LineKey) -> Dict[int, Tuple[bool, float]]:
+        conn = self._conn_getter()
+        if conn is None:
+            return {}
+        rows = conn.execute(
+            """
+            SELECT address, responded, checked_at FROM scan_address_cache
+            WHERE port = ? AND baudrate = ? AND parity = ?
+            """,
+            key,
+        ).fetchall()
+        return {
+            int(row["address"]): (bool(row["responded"]), float(row["checked_at"]))
+            for row in rows
+            if self._fresh(float(row["checked_at"]))
+        }
+
+    def _fresh(self, checked_at: float) -> bool:
+        ttl = self.config.address_cache_ttl
+        return ttl <= 0 or time.time() - checked_at <= ttl
@@ -0,0 +1,313 @@
+"""Bounded in-memory store for Modbus scan jobs with SQLite archival."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agritroller.config import ModbusScannerConfig
+from agritroller.services.database import connect
+
+logger = logging.getLogger("agritroller.scan_jobs")
+
+FINISHED_STATUSES = frozenset({"completed", "error", "cancelled"})
+PAUSED_STATUS = "paused"
+# Jobs in these states have an up-to-date row in ``scan_jobs``.
+ARCHIVED_STATUSES = FINISHED_STATUSES | {PAUSED_STATUS}
+
+JobSerializer = Callable[[Dict[str, Any]], Dict[str, Any]]
+# ``scan_jobs`` column values of a job, or ``None`` to delete its row.
+ArchiveRow = Optional[Tuple[Any, ...]]
+
+_UPSERT_JOB = """
+    INSERT OR REPLACE INTO scan_jobs (
+        id, kind, status, port, started_at, finished_at, result_count, summary, results, checkpoint
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class ScanJobStore:
+    """Keeps live scan jobs in LRU order and evicts finished ones.
+
+    Running, queued and paused jobs are never evicted. Finished jobs are
+    dropped once they exceed ``max_job_age`` or when more than ``max_jobs`` are
+    held; when archival is enabled they are written to the ``scan_jobs`` table
+    first so they stay queryable.
+
+    Archive writes never run on the event loop: :meth:`finish`,
+    :meth:`checkpoint` and :meth:`discard_archived` only queue the row, and
+    :meth:`flush` commits the queue in one transaction on a worker thread over
+    a connection of its own. A job is not evicted while its row is queued.
+    Reads go through the shared ``conn_getter`` connection.
+    """
+
+    def __init__(
+        self,
+        config: ModbusScannerConfig,
+        *,
+        serializer: JobSerializer,
+        conn_getter: Callable[[], Optional[sqlite3.Connection]],
+        path_getter: Callable[[], Optional[Path]],
+    ) -> None:
+        self.config = config
+        self._serializer = serializer
+        self._conn_getter = conn_getter
+        self._path_getter = path_getter
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending: Dict[str, ArchiveRow] = {}
+        self._writer: Optional[sqlite3.Connection] = None
+        self._flush_lock = asyncio.Lock()
+
+    def __contains__(self, job_id: object) -> bool:
+        return job_id in self._jobs
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def add(self, job: Dict[str, Any]) -> None:
+        self._jobs[job["id"]] = job
+        self._jobs.move_to_end(job["id"])
+        self.prune()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            self._jobs.move_to_end(job_id)
+            return job
+        return self._load_archived(job_id)
+
+    def get_live(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return ``job_id`` only if it is held in memory."""
+
+        return self._jobs.get(job_id)
+
+    def values(self) -> List[Dict[str, Any]]:
+        return list(self._jobs.values())
+
+    def clear(self) -> None:
+        self._jobs.clear()
+
+    def finish(self, job: Dict[str, Any]) -> None:
+        """Mark ``job`` finished, queue its archive row if configured and prune the store."""
+
+        job.setdefault("finished_at", time.time())
+        if self.config.archive_completed:
+            self._archive(job)
+        self.prune()
+
+    def checkpoint(self, job: Dict[str, Any], parts: List[Dict[str, Any]]) -> None:
+        """Queue a paused ``job`` with its remaining ``parts`` so it can resume after a restart.
+
+        Checkpoints are written whenever a database is available, even with
+        archival disabled, and are never trimmed by ``max_archived_jobs``.
+        """
+
+        self._archive(job, checkpoint=parts)
+
+    def load_paused(self, job_id: str) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """Rebuild a paused job and its remaining scan parts from the archive."""
+
+        conn = self._conn_getter()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT summary, results, checkpoint FROM scan_jobs WHERE id = ? AND status = ?",
+            (job_id, PAUSED_STATUS),
+        ).fetchone()
+        if not row or not row["checkpoint"]:
+            return None
+        job = self._row_summary(row)
+        for key in ("archived", "result_count", "results_offset"):
+            job.pop(key, None)
+        try:
+            job["results"] = json.loads(row["results"])
+            parts = json.loads(row["checkpoint"])
+        except json.JSONDecodeError:
+            return None
+        return job, parts
+
+    def discard_archived(self, job_id: str) -> None:
+        if self._conn_getter() is not None:
+            self._pending[job_id] = None
+
+    async def flush(self) -> int:
+        """Commit queued archive rows in one transaction; returns how many were written.
+
+        On failure the rows stay queued for the next call, unless a newer row
+        for the same job was queued meanwhile.
+        """
+
+        async with self._flush_lock:
+            batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except (sqlite3.Error, RuntimeError):
+                logger.exception("Failed to archive %d scan jobs", len(batch))
+                for job_id, row in batch.items():
+                    self._pending.setdefault(job_id, row)
+                return 0
+        self.prune()
+        return len(batch)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def prune(self, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        max_age = self.config.max_job_age
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.get("status") in FINISHED_STATUSES and job_id not in self._pending
+        ]
+        for job_id in finished:
+            finished_at = self._jobs[job_id].get("finished_at") or now
+            if max_age > 0 and now - finished_at > max_age:
+                del self._jobs[job_id]
+        overflow = len(self._jobs) - max(0, self.config.max_jobs)
+        if overflow <= 0:
+            return
+        # OrderedDict iteration starts at the least recently used entry.
+        for job_id in [job_id for job_id in self._jobs if job_id in finished]:
+            if overflow <= 0:
+                break
+            if job_id in self._jobs:
+                del self._jobs[job_id]
+                overflow -= 1
+
+    def list_jobs(
+        self,
+        *,
+        offset: int = 0,
+        limit: int = 20,
+        status: Optional[str] = None,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return ``(total, page)`` of job summaries, newest first, without results."""
+
+        conn = self._conn_getter() if self.config.archive_completed else None
+        # Jobs whose row is still queued are listed from memory, not from a stale row.
+        live = [
+            self._summarize(self._serializer(job))
+            for job_id, job in self._jobs.items()
+            if (conn is None or job.get("status") not in ARCHIVED_STATUSES or job_id in self._pending)
+            and (status is None or job.get("status") == status)
+        ]
+        live.sort(key=lambda item: item.get("started_at") or 0, reverse=True)
+        if conn is None:
+            return len(live), live[offset : offset + limit]
+
+        clauses: List[str] = []
+        params: List[Any] = []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if self._pending:
+            clauses.append(f"id NOT IN ({', '.join('?' * len(self._pending))})")
+            params.extend(self._pending)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        archived_total = conn.execute(
+            f"SELECT COUNT(1) AS total FROM scan_jobs{where}",  # noqa: S608 - static where clause
+            tuple(params),
+        ).fetchone()["total"]
+        page = live[offset : offset + limit]
+        remaining = limit - len(page)
+        if remaining > 0:
+            archive_offset = max(0, offset - len(live))
+            rows = conn.execute(
+                f"""
+                SELECT summary FROM scan_jobs{where}
+                ORDER BY started_at DESC
+                LIMIT ? OFFSET ?
+                """,  # noqa: S608 - static where clause
+                tuple(params + [remaining, archive_offset]),
+            ).fetchall()
+            page.extend(self._row_summary(row) for row in rows)
+        return len(live) + archived_total, page
+
+    def _archive(self, job: Dict[str, Any], *, checkpoint: Optional[List[Dict[str, Any]]] = None) -> None:
+        if self._conn_getter() is None:
+            return
+        serialized = self._serializer(job)
+        results = serialized.pop("results", [])
+        summary = self._summarize({**serialized, "results": results})
+        # Serialized now, while the job cannot change under the writer thread.
+        self._pending[job["id"]] = (
+            job["id"],
+            serialized.get("kind", "scan"),
+            serialized.get("status"),
+            serialized.get("port"),
+            serialized.get("started_at") or time.time(),
+            job.get("finished_at"),
+            len(results),
+            json.dumps(summary, ensure_ascii=False),
+            json.dumps(results, ensure_ascii=False),
+            json.dumps(checkpoint) if checkpoint is not None else None,
+        )
+
+    def _write(self, batch: Dict[str, ArchiveRow]) -> None:
+        conn = self._writer_conn()
+        with conn:
+            conn.executemany(
+                "DELETE FROM scan_jobs WHERE id = ?",
+                [(job_id,) for job_id, row in batch.items() if row is None],
+            )
+            conn.executemany(_UPSERT_JOB, [row for row in batch.values() if row is not None])
+            if self.config.max_archived_jobs > 0:
+                conn.execute(
+                    """
+                    DELETE FROM scan_jobs
+                    WHERE status != ? AND id NOT IN (
+                        SELECT id FROM scan_jobs WHERE status != ? ORDER BY started_at DESC LIMIT ?
+                    )
+                    """,
+                    (PAUSED_STATUS, PAUSED_STATUS, self.config.max_archived_jobs),
+                )
+
+    def _writer_conn(self) -> sqlite3.Connection:
+        if self._writer is None:
+            path = self._path_getter()
+            if path is None:
+                raise RuntimeError("Database unavailable for scan job archival")
+            self._writer = connect(path)
+        return self._writer
+
+    def _load_archived(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._conn_getter()
+        if conn is None:
+            return None
+        row = conn.execute("SELECT summary, results FROM scan_jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        job = self._row_summary(row)
+        job.pop("result_count", None)
+        try:
+            job["results"] = json.loads(row["results"])
+        except json.JSONDecodeError:
+            job["results"] = []
+        return job
+
+    @staticmethod
+    def _summarize(serialized: Dict[str, Any]) -> Dict[str, Any]:
+        summary = {key: value for key, value in serialized.items() if key != "results"}
+        summary["result_count"] = len(serialized.get("results") or [])
+        return summary
+
+    @staticmethod
+    def _row_summary(row: sqlite3.Row) -> Dict[str, Any]:
+        try:
+            summary = json.loads(row["summary"])
+        except json.JSONDecodeError:
+            summary = {}
+        summary["archived"] = True
+        return summary
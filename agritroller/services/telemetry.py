@@ -0,0 +1,371 @@
+"""Buffered writer for sensor and actuator readings."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import math
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from agritroller.config import TelemetryConfig
+from agritroller.services.base import BootstrapContext, Service
+from agritroller.services.database import connect
+from agritroller.services.telemetry_rollups import TIER_NAMES, TIER_PERIODS, load_watermarks
+from agritroller.telemetry import MODES, LatestValueCache, TelemetryArchive, bucket_width, lttb, minmax_buckets
+
+# (device_id, point name, Unix milliseconds, value)
+Sample = Tuple[int, str, int, float]
+# (rollup tier name, "archive" or "raw", start ms, end ms)
+Source = Tuple[str, int, int]
+
+_RANGE_QUERIES = {
+    (False, "lttb"): "SELECT ts, value FROM telemetry WHERE point_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+    (False, "minmax"): (
+        "SELECT ts, value, value, value, 1 FROM telemetry WHERE point_id = ? AND ts >= ? AND ts < ? ORDER BY ts"
+    ),
+    (True, "lttb"): (
+        "SELECT ts, avg_value FROM telemetry_rollups"
+        " WHERE point_id = ? AND period = ? AND ts >= ? AND ts < ? ORDER BY ts"
+    ),
+    (True, "minmax"): (
+        "SELECT ts, min_value, max_value, avg_value, count FROM telemetry_rollups"
+        " WHERE point_id = ? AND period = ? AND ts >= ? AND ts < ? ORDER BY ts"
+    ),
+}
+
+
+class TelemetryService(Service):
+    """Buffers readings in memory and writes them to SQLite in batches.
+
+    ``record`` only appends to a list, so the poll loop never waits on the
+    database. A flusher task commits the buffer as one transaction every
+    ``flush_interval`` seconds, or as soon as ``flush_rows`` samples are
+    waiting, on a worker thread over a connection of its own, so the batch
+    never shares a transaction with writes made through ``db_conn``. If the
+    card cannot keep up the buffer is capped at ``max_buffer`` samples and
+    the oldest ones are dropped. Samples behind the archive watermark go to
+    ``telemetry_late`` instead, for the archive to merge into its segments.
+
+    Every recorded value also lands in :attr:`latest`, a
+    :class:`LatestValueCache` that serves dashboards without touching SQLite
+    (kept even when persistence is disabled).
+    """
+
+    def __init__(self, context: BootstrapContext, config: TelemetryConfig) -> None:
+        super().__init__("telemetry", context)
+        self.config = config
+        self._buffer: List[Sample] = []
+        self._flushing: List[Sample] = []
+        self.latest = LatestValueCache()
+        self.archive = TelemetryArchive(config, conn_getter=lambda: context.state.get("db_conn"))
+        self._point_ids: Dict[Tuple[int, str], int] = {}
+        self._writer: Optional[sqlite3.Connection] = None
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failures = 0
+        self.last_flush_s = 0.0
+        self.last_batch = 0
+
+    async def _start(self) -> None:
+        self.context.state["telemetry_service"] = self
+        if self.config.enabled:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _stop(self) -> None:
+        self.context.state.pop("telemetry_service", None)
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def record(self, device_id: int, values: Mapping[str, Any], *, timestamp: Optional[float] = None) -> int:
+        """Queue the numeric ``values`` of a device; returns how many were kept.
+
+        Booleans are stored as 0/1; lists, strings and non-finite numbers are
+        skipped (they still update :attr:`latest`).
+        """
+
+        now = time.time() if timestamp is None else timestamp
+        self.latest.update(device_id, values, timestamp=now)
+        if not self.config.enabled:
+            return 0
+        ts = int(now * 1000)
+        kept = 0
+        for name, value in values.items():
+            if isinstance(value, bool):
+                number = 1.0 if value else 0.0
+            elif isinstance(value, (int, float)) and math.isfinite(value):
+                number = float(value)
+            else:
+                continue
+            self._buffer.append((device_id, name, ts, number))
+            kept += 1
+        overflow = len(self._buffer) - max(1, self.config.max_buffer)
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.dropped += overflow
+        if len(self._buffer) >= self.config.flush_rows:
+            self._wakeup.set()
+        return kept
+
+    async def flush(self) -> int:
+        """Write everything buffered so far in one transaction."""
+
+        async with self._flush_lock:
+            batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            started = time.monotonic()
+            self._flushing = batch
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except (sqlite3.Error, RuntimeError):
+                self.failures += 1
+                self.logger.exception("Failed to write %d telemetry samples", len(batch))
+                # Keep the samples for the next attempt; the oldest go first if over the cap.
+                self._buffer[:0] = batch
+                overflow = len(self._buffer) - max(1, self.config.max_buffer)
+                if overflow > 0:
+                    del self._buffer[:overflow]
+                    self.dropped += overflow
+                return 0
+            finally:
+                self._flushing = []
+            self.flushes += 1
+            self.written += len(batch)
+            self.last_batch = len(batch)
+            self.last_flush_s = time.monotonic() - started
+            return len(batch)
+
+    def oldest_unflushed(self) -> Optional[int]:
+        """Oldest timestamp (ms) still buffered or being written, if any."""
+
+        pending = [sample[2] for sample in self._flushing]
+        pending.extend(sample[2] for sample in self._buffer)
+        return min(pending) if pending else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.config.enabled,
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "last_batch": self.last_batch,
+            "last_flush_ms": round(self.last_flush_s * 1000, 3),
+            "points": len(self._point_ids),
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            timer = loop.call_later(max(0.01, self.config.flush_interval), self._wakeup.set)
+            try:
+                await self._wakeup.wait()
+            finally:
+                timer.cancel()
+            self._wakeup.clear()
+            await self.flush()
+
+    def _write(self, batch: List[Sample]) -> None:
+        conn = self._writer_conn()
+        with conn:
+            # Holding the write lock from the start keeps the archive watermark from moving under the batch.
+            conn.execute("BEGIN IMMEDIATE")
+            ids = self._resolve_points(conn, {(device_id, name) for device_id, name, _, _ in batch})
+            rows = [(ids[(device_id, name)], ts, value) for device_id, name, ts, value in batch]
+            row = conn.execute("SELECT watermark FROM telemetry_archive_state WHERE id = 1").fetchone()
+            if self.config.archive_enabled and row is not None:
+                # Those days are sealed already; the archive merges these into their segments.
+                sealed = int(row[0])
+                late = [sample for sample in rows if sample[1] < sealed]
+                if late:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO telemetry_late (point_id, ts, value) VALUES (?, ?, ?)", late
+                    )
+                    rows = [sample for sample in rows if sample[1] >= sealed]
+            conn.executemany("INSERT OR REPLACE INTO telemetry (point_id, ts, value) VALUES (?, ?, ?)", rows)
+        # Only cache ids of rows that are known to be committed.
+        self._point_ids.update(ids)
+
+    def _resolve_points(self, conn: sqlite3.Connection, keys: Set[Tuple[int, str]]) -> Dict[Tuple[int, str], int]:
+        ids = {key: self._point_ids[key] for key in keys if key in self._point_ids}
+        missing = [key for key in keys if key not in ids]
+        if missing:
+            conn.executemany("INSERT OR IGNORE INTO telemetry_points (device_id, name) VALUES (?, ?)", missing)
+            for device_id, name in missing:
+                row = conn.execute(
+                    "SELECT id FROM telemetry_points WHERE device_id = ? AND name = ?",
+                    (device_id, name),
+                ).fetchone()
+                ids[(device_id, name)] = int(row[0])
+        return ids
+
+    def point_ids(
+        self,
+        device_id: Optional[int] = None,
+        names: Optional[Iterable[str]] = None,
+    ) -> Dict[Tuple[int, str], int]:
+        """Stored points, optionally limited to a device and point names."""
+
+        conn = self._get_conn()
+        query = "SELECT id, device_id, name FROM telemetry_points"
+        params: List[Any] = []
+        if device_id is not None:
+            query += " WHERE device_id = ?"
+            params.append(device_id)
+        wanted = set(names) if names is not None else None
+        return {
+            (int(row[1]), str(row[2])): int(row[0])
+            for row in conn.execute(query, params).fetchall()
+            if wanted is None or row[2] in wanted
+        }
+
+    async def query_range(
+        self,
+        device_id: int,
+        names: Optional[Iterable[str]] = None,
+        *,
+        start: float,
+        end: float,
+        points: int = 500,
+        mode: str = "lttb",
+    ) -> Dict[str, Any]:
+        """Stored values of a device between ``start`` and ``end`` (Unix seconds), downsampled.
+
+        Every series is reduced to at most ``points`` rows (and all series
+        together to ``range_max_points``), whatever the span. ``lttb`` rows are
+        ``[ts, value]``; ``minmax`` rows are ``[ts, min, max, avg, count]`` with
+        ``ts`` the bucket start. Timestamps are Unix milliseconds. Spans are
+        read from the coarsest rollup tier no wider than a bucket, up to its
+        watermark, then from finer tiers and finally raw samples, archived
+        ones from their segment files (rollup rows stand for their average in
+        ``lttb`` mode).
+        Raises ``ValueError`` for an unknown mode or an empty span.
+        """
+
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(MODES)}")
+        start_ms, end_ms = int(start * 1000), int(end * 1000)
+        if end_ms <= start_ms:
+            raise ValueError("end must be after start")
+        return await asyncio.to_thread(
+            self._query_range, device_id, list(names) if names else None, start_ms, end_ms, points, mode
+        )
+
+    def _query_range(
+        self,
+        device_id: int,
+        names: Optional[List[str]],
+        start: int,
+        end: int,
+        points: int,
+        mode: str,
+    ) -> Dict[str, Any]:
+        ids = sorted(self.point_ids(device_id, names).items(), key=lambda item: item[0][1])
+        budget = max(3, min(points, self.config.range_max_points // max(1, len(ids))))
+        # LTTB adds the first and last sample on top of one sample per bucket.
+        width = bucket_width(start, end, budget - 2 if mode == "lttb" else budget)
+        sources = self._range_sources(start, end, width)
+        series = [
+            {"name": name, "data": self._series(device_id, point_id, sources, start, width, mode)}
+            for (_, name), point_id in ids
+        ]
+        return {
+            "device_id": device_id,
+            "start": start,
+            "end": end,
+            "mode": mode,
+            "bucket_ms": width,
+            "sources": [{"tier": tier, "start": low, "end": high} for tier, low, high in sources],
+            "columns": ["ts", "value"] if mode == "lttb" else ["ts", "min", "max", "avg", "count"],
+            "series": series,
+        }
+
+    def _range_sources(self, start: int, end: int, width: int) -> List[Source]:
+        """Split ``[start, end)`` between rollup tiers (coarsest first), the archive and raw samples."""
+
+        watermarks = load_watermarks(self._get_conn())
+        sources: List[Source] = []
+        position = start
+        for period in sorted(watermarks, reverse=True):
+            if period > width or period not in TIER_NAMES:
+                continue
+            high = min(end, watermarks[period])
+            if high > position:
+                sources.append((TIER_NAMES[period], position, high))
+                position = high
+        archived = self.archive.watermark()
+        if archived is not None and position < min(end, archived):
+            sources.append(("archive", position, min(end, archived)))
+            position = min(end, archived)
+        if position < end:
+            sources.append(("raw", position, end))
+        return sources
+
+    def _series(
+        self,
+        device_id: int,
+        point_id: int,
+        sources: List[Source],
+        start: int,
+        width: int,
+        mode: str,
+    ) -> List[List[float]]:
+        reduce = lttb if mode == "lttb" else minmax_buckets
+        chunks = self._chunks(device_id, point_id, sources, mode)
+        return [list(row) for row in reduce(chunks, start, width, vectorized=self.config.numpy_downsample)]
+
+    def _chunks(
+        self,
+        device_id: int,
+        point_id: int,
+        sources: List[Source],
+        mode: str,
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        """Rows of every source in time order, ``range_chunk_rows`` at a time."""
+
+        size = max(1, self.config.range_chunk_rows)
+        for tier, low, high in sources:
+            if tier == "archive":
+                for rows in self.archive.read(device_id, point_id, low, high, size):
+                    yield rows if mode == "lttb" else [(ts, value, value, value, 1) for ts, value in rows]
+                continue
+            period = TIER_PERIODS.get(tier)
+            cursor = self._get_conn().cursor()
+            # Plain tuples instead of sqlite3.Row: cheaper, and NumPy takes them as is.
+            cursor.row_factory = None
+            try:
+                if period is None:
+                    cursor.execute(_RANGE_QUERIES[(False, mode)], (point_id, low, high))
+                else:
+                    cursor.execute(_RANGE_QUERIES[(True, mode)], (point_id, period, low, high))
+                yield from iter(lambda: cursor.fetchmany(size), [])
+            finally:
+                cursor.close()
+
+    def _writer_conn(self) -> sqlite3.Connection:
+        if self._writer is None:
+            path = self.context.state.get("db_path")
+            if path is None:
+                raise RuntimeError("Database unavailable for telemetry")
+            self._writer = connect(path)
+        return self._writer
+
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = self.context.state.get("db_conn")
+        if not isinstance(conn, sqlite3.Connection):
+            raise RuntimeError("Database connection unavailable for telemetry")
+        return conn
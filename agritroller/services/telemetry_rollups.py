@@ -0,0 +1,327 @@
+"""Incremental 1m/1h/1d telemetry rollups, archiving and per-tier retention."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from agritroller.config import TelemetryConfig
+from agritroller.services.base import BootstrapContext, Service
+from agritroller.services.database import connect
+from agritroller.telemetry import TelemetryArchive
+
+# (name, bucket width in ms), finest first; each tier is built from the one before it.
+ROLLUP_TIERS: Tuple[Tuple[str, int], ...] = (("1m", 60_000), ("1h", 3_600_000), ("1d", 86_400_000))
+TIER_NAMES = {period: name for name, period in ROLLUP_TIERS}
+TIER_PERIODS = dict(ROLLUP_TIERS)
+
+DAY_MS = 86_400_000
+
+# ``last_value`` comes from the newest row of the bucket, found again through the primary key.
+_ROLLUP_RAW = """
+    INSERT OR REPLACE INTO telemetry_rollups
+        (point_id, period, ts, min_value, max_value, avg_value, count, last_value)
+    SELECT g.point_id, :period, g.bucket, g.low, g.high, g.mean, g.samples, t.value
+    FROM (
+        SELECT point_id, ts - ts % :period AS bucket, MIN(value) AS low, MAX(value) AS high,
+               AVG(value) AS mean, COUNT(value) AS samples, MAX(ts) AS last_ts
+        FROM telemetry
+        WHERE point_id IN (SELECT id FROM telemetry_points) AND ts >= :start AND ts < :end
+        GROUP BY point_id, bucket
+    ) AS g
+    JOIN telemetry AS t ON t.point_id = g.point_id AND t.ts = g.last_ts
+"""
+
+_ROLLUP_TIER = """
+    INSERT OR REPLACE INTO telemetry_rollups
+        (point_id, period, ts, min_value, max_value, avg_value, count, last_value)
+    SELECT g.point_id, :period, g.bucket, g.low, g.high, g.mean, g.samples, r.last_value
+    FROM (
+        SELECT point_id, ts - ts % :period AS bucket, MIN(min_value) AS low, MAX(max_value) AS high,
+               SUM(avg_value * count) / SUM(count) AS mean, SUM(count) AS samples, MAX(ts) AS last_ts
+        FROM telemetry_rollups
+        WHERE point_id IN (SELECT id FROM telemetry_points) AND period = :source
+          AND ts >= :start AND ts < :end
+        GROUP BY point_id, bucket
+    ) AS g
+    JOIN telemetry_rollups AS r ON r.point_id = g.point_id AND r.period = :source AND r.ts = g.last_ts
+"""
+
+
+def load_watermarks(conn: sqlite3.Connection) -> Dict[int, int]:
+    """Rollup period -> timestamp before which that tier is complete."""
+
+    return {
+        int(row[0]): int(row[1])
+        for row in conn.execute("SELECT period, watermark FROM telemetry_rollup_state").fetchall()
+    }
+
+
+class TelemetryRollupService(Service):
+    """Builds rollup tiers incrementally and trims expired rows.
+
+    Every ``rollup_interval`` seconds each tier aggregates the buckets of its
+    source (raw samples for 1m, then 1m for 1h and 1h for 1d) that lie between
+    its stored watermark and the source's own horizon, ``rollup_batch_periods``
+    buckets per transaction, so processed data is never scanned again. Raw
+    samples are only considered once they are ``rollup_delay`` seconds old
+    and older than anything the telemetry writer still holds in memory
+    (including batches re-queued after a failed flush), so no sample lands
+    behind the 1m watermark. Buckets are aligned to UTC.
+
+    With ``archive_enabled``, rolled-up days of raw samples older than
+    ``archive_after_hours`` are then sealed into :class:`TelemetryArchive`
+    segments, after merging any samples that were written behind the
+    archive watermark into the segments of their days.
+
+    Retention finally deletes rows older than each tier's ``*_retention_days``
+    point by point, ``retention_batch_rows`` per transaction, and never rows
+    that the next tier has not rolled up yet. Raw rows are instead removed
+    once sealed when the archive is on, and segments expire after
+    ``archive_retention_days``.
+
+    All of this runs on worker threads over the service's own connection,
+    so its transactions never mix with writes made through ``db_conn``.
+    """
+
+    def __init__(self, context: BootstrapContext, config: TelemetryConfig) -> None:
+        super().__init__("telemetry_rollups", context)
+        self.config = config
+        self._conn: Optional[sqlite3.Connection] = None
+        self.archive = TelemetryArchive(config, conn_getter=self._get_conn)
+        self._task: Optional[asyncio.Task[None]] = None
+        self._lock = asyncio.Lock()
+        self.runs = 0
+        self.rolled: Dict[str, int] = {name: 0 for name, _ in ROLLUP_TIERS}
+        self.archived = 0
+        self.deleted: Dict[str, int] = {"raw": 0, **{name: 0 for name, _ in ROLLUP_TIERS}, "archive": 0}
+        self.last_run_s = 0.0
+
+    async def _start(self) -> None:
+        self.context.state["telemetry_rollups"] = self
+        if self.config.enabled:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _stop(self) -> None:
+        self.context.state.pop("telemetry_rollups", None)
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def run_once(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Roll up, archive and apply retention as of ``now`` (Unix seconds)."""
+
+        async with self._lock:
+            started = time.monotonic()
+            now_ms = int((time.time() if now is None else now) * 1000)
+            rolled = await self.roll_up(now_ms) if self.config.rollups_enabled else {}
+            archived = await self.seal(now_ms) if self.config.archive_enabled else {}
+            deleted = await self.enforce_retention(now_ms)
+            self.runs += 1
+            self.last_run_s = time.monotonic() - started
+            return {"rolled": rolled, "archived": archived, "deleted": deleted}
+
+    async def roll_up(self, now_ms: int) -> Dict[str, int]:
+        horizon = self._horizon(now_ms)
+        source: Optional[int] = None
+        rolled: Dict[str, int] = {}
+        for name, period in ROLLUP_TIERS:
+            watermark = await asyncio.to_thread(self._watermark, period, source)
+            if watermark is None:
+                break
+            limit = horizon - horizon % period
+            step = period * max(1, self.config.rollup_batch_periods)
+            rows = 0
+            while watermark < limit:
+                end = min(limit, watermark + step)
+                rows += await asyncio.to_thread(self._roll_window, period, source, watermark, end)
+                watermark = end
+            rolled[name] = rows
+            self.rolled[name] += rows
+            # The next tier may only aggregate buckets this one has completed.
+            horizon, source = watermark, period
+        return rolled
+
+    async def seal(self, now_ms: int) -> Dict[str, int]:
+        """Move whole days of raw samples into archive segments, oldest first."""
+
+        totals = {"days": 0, "segments": 0, "samples": 0, "bytes": 0, "late": 0}
+        batch = max(1, self.config.retention_batch_rows)
+        while True:
+            merged = await asyncio.to_thread(self.archive.merge_late, batch)
+            if not merged or not merged["samples"]:
+                break
+            totals["late"] += merged["samples"]
+        # Never past samples the writer has yet to commit.
+        cutoff = min(now_ms - int(self.config.archive_after_hours * 3_600_000), self._horizon(now_ms))
+        if self.config.rollups_enabled:
+            # Only days the 1m tier has already aggregated.
+            watermarks = await asyncio.to_thread(load_watermarks, self._get_conn())
+            cutoff = min(cutoff, watermarks.get(TIER_PERIODS["1m"], 0))
+        while True:
+            sealed = await asyncio.to_thread(self.archive.seal_day, cutoff)
+            if sealed is None:
+                break
+            totals["days"] += 1
+            for key in ("segments", "samples", "bytes"):
+                totals[key] += sealed[key]
+        self.archived += totals["samples"]
+        return totals
+
+    async def enforce_retention(self, now_ms: int) -> Dict[str, int]:
+        conn = self._get_conn()
+        watermarks = await asyncio.to_thread(load_watermarks, conn)
+        archived = await asyncio.to_thread(self.archive.watermark)
+        point_ids = await asyncio.to_thread(
+            lambda: [int(row[0]) for row in conn.execute("SELECT id FROM telemetry_points").fetchall()]
+        )
+        days = {
+            None: self.config.raw_retention_days,
+            60_000: self.config.rollup_1m_retention_days,
+            3_600_000: self.config.rollup_1h_retention_days,
+            86_400_000: self.config.rollup_1d_retention_days,
+        }
+        tiers: List[Optional[int]] = [None, *(period for _, period in ROLLUP_TIERS)]
+        batch = max(1, self.config.retention_batch_rows)
+        deleted: Dict[str, int] = {}
+        for position, period in enumerate(tiers):
+            if period is None and self.config.archive_enabled:
+                # Sealed samples are in segment files now.
+                cutoff = archived or 0
+            elif days[period] <= 0:
+                continue
+            else:
+                cutoff = now_ms - int(days[period] * DAY_MS)
+                following = tiers[position + 1] if position + 1 < len(tiers) else None
+                if self.config.rollups_enabled and following is not None:
+                    cutoff = min(cutoff, watermarks.get(following, 0))
+            name = "raw" if period is None else TIER_NAMES[period]
+            count = 0
+            for point_id in point_ids:
+                while True:
+                    removed = await asyncio.to_thread(self._delete_batch, period, point_id, cutoff, batch)
+                    count += removed
+                    if removed < batch:
+                        break
+            deleted[name] = count
+            self.deleted[name] += count
+        if self.config.archive_retention_days > 0:
+            expired = await asyncio.to_thread(
+                self.archive.expire, now_ms - int(self.config.archive_retention_days * DAY_MS)
+            )
+            deleted["archive"] = expired
+            self.deleted["archive"] += expired
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        archive: Dict[str, Any] = {}
+        try:
+            watermarks = load_watermarks(self._get_conn())
+            archive = dict(self.archive.stats())
+        except (sqlite3.Error, RuntimeError):
+            watermarks = {}
+        return {
+            "enabled": self.config.rollups_enabled,
+            "runs": self.runs,
+            "last_run_ms": round(self.last_run_s * 1000, 3),
+            "watermarks": {name: watermarks.get(period) for name, period in ROLLUP_TIERS},
+            "rolled": dict(self.rolled),
+            "archived": self.archived,
+            "deleted": dict(self.deleted),
+            "archive": {"enabled": self.config.archive_enabled, **archive},
+        }
+
+    def _horizon(self, now_ms: int) -> int:
+        """Raw samples before this are on disk: past ``rollup_delay`` and older than anything unflushed."""
+
+        horizon = now_ms - int(self.config.rollup_delay * 1000)
+        telemetry = self.context.state.get("telemetry_service")
+        # A batch re-queued after a failed flush can be far older than rollup_delay.
+        pending = telemetry.oldest_unflushed() if telemetry is not None else None
+        return horizon if pending is None else min(horizon, pending)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except (sqlite3.Error, RuntimeError):
+                self.logger.exception("Telemetry rollup failed")
+            await asyncio.sleep(max(1.0, self.config.rollup_interval))
+
+    def _watermark(self, period: int, source: Optional[int]) -> Optional[int]:
+        """Stored watermark of a tier, else the start of the oldest source bucket."""
+
+        conn = self._get_conn()
+        row = conn.execute("SELECT watermark FROM telemetry_rollup_state WHERE period = ?", (period,)).fetchone()
+        if row is not None:
+            return int(row[0])
+        # Per-point MIN() subqueries use the primary key instead of scanning the table.
+        if source is None:
+            row = conn.execute(
+                "SELECT MIN((SELECT MIN(ts) FROM telemetry WHERE point_id = p.id)) FROM telemetry_points AS p"
+            ).fetchone()
+        else:
+            row = conn.execute(
+                """
+                SELECT MIN((SELECT MIN(ts) FROM telemetry_rollups WHERE point_id = p.id AND period = ?))
+                FROM telemetry_points AS p
+                """,
+                (source,),
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        first = int(row[0])
+        return first - first % period
+
+    def _roll_window(self, period: int, source: Optional[int], start: int, end: int) -> int:
+        conn = self._get_conn()
+        with conn:
+            cursor = conn.execute(
+                _ROLLUP_RAW if source is None else _ROLLUP_TIER,
+                {"period": period, "source": source, "start": start, "end": end},
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO telemetry_rollup_state (period, watermark) VALUES (?, ?)",
+                (period, end),
+            )
+        return max(0, cursor.rowcount)
+
+    def _delete_batch(self, period: Optional[int], point_id: int, cutoff: int, batch: int) -> int:
+        conn = self._get_conn()
+        with conn:
+            if period is None:
+                cursor = conn.execute(
+                    """
+                    DELETE FROM telemetry WHERE point_id = ? AND ts IN (
+                        SELECT ts FROM telemetry WHERE point_id = ? AND ts < ? ORDER BY ts LIMIT ?
+                    )
+                    """,
+                    (point_id, point_id, cutoff, batch),
+                )
+            else:
+                cursor = conn.execute(
+                    """
+                    DELETE FROM telemetry_rollups WHERE point_id = ? AND period = ? AND ts IN (
+                        SELECT ts FROM telemetry_rollups
+                        WHERE point_id = ? AND period = ? AND ts < ? ORDER BY ts LIMIT ?
+                    )
+                    """,
+                    (point_id, period, point_id, period, cutoff, batch),
+                )
+        return max(0, cursor.rowcount)
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            path = self.context.state.get("db_path")
+            if path is None:
+                raise RuntimeError("Database unavailable for telemetry rollups")
+            self._conn = connect(path)
+        return self._conn
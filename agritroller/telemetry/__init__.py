@@ -0,0 +1,18 @@
+"""Telemetry storage helpers shared by the telemetry services."""
+
+from .archive import TelemetryArchive, read_blocks, read_segment, write_segment
+from .downsample import MODES, bucket_width, lttb, minmax_buckets
+from .latest_values import LatestValue, LatestValueCache
+
+__all__ = [
+    "LatestValue",
+    "LatestValueCache",
+    "MODES",
+    "TelemetryArchive",
+    "bucket_width",
+    "lttb",
+    "minmax_buckets",
+    "read_blocks",
+    "read_segment",
+    "write_segment",
+]
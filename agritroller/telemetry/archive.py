@@ -0,0 +1,317 @@
+"""Sealed raw telemetry in Gorilla-compressed segment files.
+
+Once a UTC day of raw samples is older than ``archive_after_hours`` (and
+rolled up), it is written to one segment file per device under
+``archive_dir``::
+
+    <device_id>/<YYYYMMDD>.seg
+
+A segment starts with a small index, one entry per point with its first and
+last timestamp, sample count and the offset of its block, followed by one
+:mod:`~agritroller.telemetry.gorilla` block per point. Readers map the file
+and decode only the blocks of the points they were asked for. The
+``telemetry_segments`` table catalogs the files so a range query finds them
+without listing directories.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from agritroller.config import TelemetryConfig
+from agritroller.telemetry import gorilla
+
+logger = logging.getLogger("agritroller.telemetry.archive")
+
+MAGIC = b"AGTS"
+VERSION = 1
+DAY_MS = 86_400_000
+# magic, version, point count, segment start ms, segment end ms
+HEADER = struct.Struct(">4sBxHqq")
+# point id, first ts, last ts, samples, block offset, block length
+ENTRY = struct.Struct(">IqqIII")
+
+# (point id, first ts, last ts, samples, encoded block)
+Block = Tuple[int, int, int, int, bytes]
+Row = Tuple[int, float]
+
+
+def write_segment(path: Path, start: int, end: int, blocks: Sequence[Block]) -> int:
+    """Write a segment atomically; returns its size in bytes."""
+
+    offset = HEADER.size + ENTRY.size * len(blocks)
+    index: List[bytes] = []
+    for point_id, first, last, samples, data in blocks:
+        index.append(ENTRY.pack(point_id, first, last, samples, offset, len(data)))
+        offset += len(data)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(".tmp")
+    with open(temporary, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, VERSION, len(blocks), start, end))
+        handle.writelines(index)
+        for block in blocks:
+            handle.write(block[4])
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+    return offset
+
+
+def read_segment(path: Path, point_id: int, start: int, end: int) -> Tuple[List[int], List[float]]:
+    """Samples of one point in ``[start, end)`` from a memory-mapped segment.
+
+    Raises ``ValueError`` if the file is not a segment.
+    """
+
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        if len(view) < HEADER.size:
+            raise ValueError(f"{path} is truncated")
+        magic, version, points, _, _ = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a telemetry segment")
+        for position in range(points):
+            entry, first, last, samples, offset, _ = ENTRY.unpack_from(view, HEADER.size + position * ENTRY.size)
+            if entry != point_id:
+                continue
+            if last < start or first >= end:
+                break
+            timestamps, values = gorilla.decode(view, samples, offset)
+            low, high = bisect.bisect_left(timestamps, start), bisect.bisect_left(timestamps, end)
+            return timestamps[low:high], values[low:high]
+    return [], []
+
+
+def read_blocks(path: Path) -> Dict[int, Tuple[List[int], List[float]]]:
+    """Every point of a segment, decoded; raises ``ValueError`` if the file is not a segment."""
+
+    with open(path, "rb") as handle:
+        view = handle.read()
+    if len(view) < HEADER.size:
+        raise ValueError(f"{path} is truncated")
+    magic, version, points, _, _ = HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a telemetry segment")
+    blocks: Dict[int, Tuple[List[int], List[float]]] = {}
+    for position in range(points):
+        point_id, _, _, samples, offset, _ = ENTRY.unpack_from(view, HEADER.size + position * ENTRY.size)
+        blocks[point_id] = gorilla.decode(view, samples, offset)
+    return blocks
+
+
+class TelemetryArchive:
+    """Seals old raw samples into segment files and reads them back.
+
+    Everything before the archive watermark lives in segments only; a day is
+    sealed in one go and the watermark moves in the same transaction that
+    catalogs its files, so a crash in between just rewrites that day.
+    Removing the sealed rows from ``telemetry`` is left to the retention pass.
+    Samples written behind the watermark afterwards wait in ``telemetry_late``
+    until :meth:`merge_late` rewrites their day's segment with them.
+    Sealing and expiry commit on whatever ``conn_getter`` returns, so the
+    writer hands in a connection of its own rather than ``db_conn``.
+    """
+
+    def __init__(
+        self,
+        config: TelemetryConfig,
+        *,
+        conn_getter: Callable[[], Optional[sqlite3.Connection]],
+    ) -> None:
+        self.config = config
+        self._conn_getter = conn_getter
+
+    def watermark(self) -> Optional[int]:
+        row = self._conn().execute("SELECT watermark FROM telemetry_archive_state WHERE id = 1").fetchone()
+        return int(row[0]) if row is not None else None
+
+    def seal_day(self, cutoff: int) -> Optional[Dict[str, int]]:
+        """Seal the oldest unsealed day if it ends before ``cutoff``; ``None`` when there is none."""
+
+        conn = self._conn()
+        start = self.watermark()
+        if start is None:
+            row = conn.execute(
+                "SELECT MIN((SELECT MIN(ts) FROM telemetry WHERE point_id = p.id)) FROM telemetry_points AS p"
+            ).fetchone()
+            if row is None or row[0] is None:
+                return None
+            start = int(row[0]) - int(row[0]) % DAY_MS
+        end = start + DAY_MS
+        if end > cutoff:
+            return None
+        devices: Dict[int, List[Block]] = {}
+        for point in conn.execute("SELECT id, device_id FROM telemetry_points ORDER BY id").fetchall():
+            rows = conn.execute(
+                """
+                SELECT ts, value FROM telemetry
+                WHERE point_id = ? AND ts >= ? AND ts < ? AND value IS NOT NULL
+                ORDER BY ts
+                """,
+                (point[0], start, end),
+            ).fetchall()
+            if rows:
+                timestamps = [int(row[0]) for row in rows]
+                data = gorilla.encode(timestamps, [float(row[1]) for row in rows])
+                devices.setdefault(int(point[1]), []).append(
+                    (int(point[0]), timestamps[0], timestamps[-1], len(timestamps), data)
+                )
+        day = time.strftime("%Y%m%d", time.gmtime(start / 1000))
+        catalog = []
+        for device_id, blocks in devices.items():
+            relative = f"{device_id}/{day}.seg"
+            size = write_segment(Path(self.config.archive_dir) / relative, start, end, blocks)
+            catalog.append((device_id, start, end, relative, len(blocks), sum(block[3] for block in blocks), size))
+        sealed = sum(entry[5] for entry in catalog)
+        with conn:
+            # With the write lock held nothing can land in the day before the watermark moves past it.
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """
+                SELECT SUM((SELECT COUNT(value) FROM telemetry WHERE point_id = p.id AND ts >= ? AND ts < ?))
+                FROM telemetry_points AS p
+                """,
+                (start, end),
+            ).fetchone()
+            if (row[0] or 0) != sealed:
+                logger.info("Telemetry for %s arrived while sealing it; sealing again", day)
+                return None
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO telemetry_segments
+                    (device_id, start_ts, end_ts, path, points, samples, bytes)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                catalog,
+            )
+            conn.execute("INSERT OR REPLACE INTO telemetry_archive_state (id, watermark) VALUES (1, ?)", (end,))
+        return {
+            "start": start,
+            "segments": len(catalog),
+            "samples": sealed,
+            "bytes": sum(entry[6] for entry in catalog),
+        }
+
+    def merge_late(self, limit: int) -> Optional[Dict[str, int]]:
+        """Rewrite the segments of up to ``limit`` late samples with them; ``None`` when none wait.
+
+        Segments that cannot be read are left alone, along with their late
+        samples.
+        """
+
+        conn = self._conn()
+        rows = conn.execute(
+            """
+            SELECT l.point_id, l.ts, l.value, p.device_id FROM telemetry_late AS l
+            JOIN telemetry_points AS p ON p.id = l.point_id
+            ORDER BY l.point_id, l.ts LIMIT ?
+            """,
+            (max(1, limit),),
+        ).fetchall()
+        if not rows:
+            return None
+        days: Dict[Tuple[int, int], List[Tuple[int, int, Optional[float]]]] = {}
+        for point_id, ts, value, device_id in rows:
+            days.setdefault((int(device_id), int(ts) - int(ts) % DAY_MS), []).append((int(point_id), int(ts), value))
+        catalog = []
+        merged: List[Tuple[int, int, Optional[float]]] = []
+        for (device_id, start), late in days.items():
+            relative = f"{device_id}/{time.strftime('%Y%m%d', time.gmtime(start / 1000))}.seg"
+            row = conn.execute(
+                "SELECT path FROM telemetry_segments WHERE device_id = ? AND start_ts = ?", (device_id, start)
+            ).fetchone()
+            series: Dict[int, Dict[int, float]] = {}
+            if row is not None:
+                relative = row[0]
+                try:
+                    for point_id, (timestamps, values) in read_blocks(Path(self.config.archive_dir) / relative).items():
+                        series[point_id] = dict(zip(timestamps, values))
+                except (OSError, ValueError) as exc:
+                    logger.warning("Cannot merge late telemetry into segment %s: %s", relative, exc)
+                    continue
+            for point_id, ts, value in late:
+                if value is not None:
+                    series.setdefault(point_id, {})[ts] = float(value)
+            blocks: List[Block] = []
+            for point_id in sorted(series):
+                timestamps = sorted(series[point_id])
+                data = gorilla.encode(timestamps, [series[point_id][ts] for ts in timestamps])
+                blocks.append((point_id, timestamps[0], timestamps[-1], len(timestamps), data))
+            if blocks:
+                size = write_segment(Path(self.config.archive_dir) / relative, start, start + DAY_MS, blocks)
+                catalog.append(
+                    (device_id, start, start + DAY_MS, relative, len(blocks), sum(block[3] for block in blocks), size)
+                )
+            merged.extend(late)
+        with conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO telemetry_segments
+                    (device_id, start_ts, end_ts, path, points, samples, bytes)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                catalog,
+            )
+            # A sample rewritten in the meantime stays queued for the next merge.
+            conn.executemany("DELETE FROM telemetry_late WHERE point_id = ? AND ts = ? AND value IS ?", merged)
+        return {"segments": len(catalog), "samples": len(merged)}
+
+    def read(self, device_id: int, point_id: int, start: int, end: int, size: int) -> Iterator[List[Row]]:
+        """Archived samples of a point in ``[start, end)``, ``size`` rows at a time."""
+
+        segments = self._conn().execute(
+            """
+            SELECT path FROM telemetry_segments
+            WHERE device_id = ? AND start_ts < ? AND end_ts > ?
+            ORDER BY start_ts
+            """,
+            (device_id, end, start),
+        ).fetchall()
+        for segment in segments:
+            path = Path(self.config.archive_dir) / segment[0]
+            try:
+                timestamps, values = read_segment(path, point_id, start, end)
+            except (OSError, ValueError) as exc:
+                logger.warning("Skipping telemetry segment %s: %s", path, exc)
+                continue
+            for index in range(0, len(timestamps), max(1, size)):
+                stop = index + max(1, size)
+                yield list(zip(timestamps[index:stop], values[index:stop]))
+
+    def expire(self, cutoff: int) -> int:
+        """Delete segments that end before ``cutoff``; returns the samples removed."""
+
+        conn = self._conn()
+        expired = conn.execute(
+            "SELECT device_id, start_ts, path, samples FROM telemetry_segments WHERE end_ts <= ?", (cutoff,)
+        ).fetchall()
+        if not expired:
+            return 0
+        with conn:
+            conn.executemany(
+                "DELETE FROM telemetry_segments WHERE device_id = ? AND start_ts = ?",
+                [(row[0], row[1]) for row in expired],
+            )
+        # Files go after the catalog rows: a crash leaves an orphan file, never a dangling entry.
+        for row in expired:
+            (Path(self.config.archive_dir) / row[2]).unlink(missing_ok=True)
+        return sum(int(row[3]) for row in expired)
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        row = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(samples), 0), COALESCE(SUM(bytes), 0) FROM telemetry_segments"
+        ).fetchone()
+        return {"watermark": self.watermark(), "segments": row[0], "samples": row[1], "bytes": row[2]}
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = self._conn_getter()
+        if not isinstance(conn, sqlite3.Connection):
+            raise RuntimeError("Database connection unavailable for the telemetry archive")
+        return conn
@@ -0,0 +1,182 @@
+"""Reduce long telemetry series to a point budget for charts.
+
+Both reducers consume time-ordered rows in chunks, as handed out by
+``cursor.fetchmany``, over a span split into equal time buckets. They never
+hold more than two buckets of samples, so a week of 1 s data costs the same
+memory as an hour of it.
+
+``minmax_buckets`` takes ``(ts, min, max, avg, count)`` rows (a raw sample is
+``(ts, v, v, v, 1)``, a rollup row is already aggregated) and yields the same
+shape per non-empty bucket so spikes survive; ``lttb`` takes ``(ts, value)``
+rows and keeps real samples, one per bucket chosen with
+Largest-Triangle-Three-Buckets, plus the first and the last one. When NumPy is
+installed it does the per-chunk bucket math.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the board image
+    np = None  # type: ignore[assignment]
+
+HAVE_NUMPY = np is not None
+
+MODES = ("lttb", "minmax")
+
+# Smallest LTTB bucket worth handing to NumPy.
+LTTB_VECTOR_MIN = 64
+
+Row = Tuple[int, float]
+# (ts or bucket start, min, max, avg, count)
+Bucket = Tuple[int, float, float, float, int]
+
+
+def bucket_width(start: int, end: int, buckets: int) -> int:
+    """Width in ms of ``buckets`` equal buckets covering ``[start, end)``."""
+
+    return max(1, -(-(end - start) // max(1, buckets)))
+
+
+def minmax_buckets(
+    chunks: Iterable[Sequence[Bucket]],
+    start: int,
+    width: int,
+    *,
+    vectorized: bool = True,
+) -> Iterator[Bucket]:
+    """Min, max, average and count of every non-empty bucket, oldest first."""
+
+    reduce = _reduce_numpy if vectorized and HAVE_NUMPY else _reduce_python
+    carry: Optional[List[float]] = None
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buckets = reduce(chunk, start, width)
+        if carry is not None:
+            # The previous chunk may have stopped in the middle of a bucket.
+            if buckets[0][0] == carry[0]:
+                buckets[0] = _merge(carry, buckets[0])
+            else:
+                yield _bucket(carry, start, width)
+        for bucket in buckets[:-1]:
+            yield _bucket(bucket, start, width)
+        carry = buckets[-1]
+    if carry is not None:
+        yield _bucket(carry, start, width)
+
+
+def _reduce_python(chunk: Sequence[Bucket], start: int, width: int) -> List[List[float]]:
+    # Buckets are [index, min, max, sum, count] until they are emitted.
+    buckets: List[List[float]] = []
+    bucket: Optional[List[float]] = None
+    for ts, low, high, mean, count in chunk:
+        index = (ts - start) // width
+        if bucket is None or index != bucket[0]:
+            bucket = [index, low, high, mean * count, count]
+            buckets.append(bucket)
+            continue
+        if low < bucket[1]:
+            bucket[1] = low
+        if high > bucket[2]:
+            bucket[2] = high
+        bucket[3] += mean * count
+        bucket[4] += count
+    return buckets
+
+
+def _reduce_numpy(chunk: Sequence[Bucket], start: int, width: int) -> List[List[float]]:
+    data = np.array(chunk, dtype=np.float64)
+    counts = data[:, 4]
+    index = (data[:, 0].astype(np.int64) - start) // width
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(index)) + 1))
+    return [
+        list(bucket)
+        for bucket in zip(
+            index[starts].tolist(),
+            np.minimum.reduceat(data[:, 1], starts).tolist(),
+            np.maximum.reduceat(data[:, 2], starts).tolist(),
+            np.add.reduceat(data[:, 3] * counts, starts).tolist(),
+            np.add.reduceat(counts, starts).tolist(),
+        )
+    ]
+
+
+def _merge(left: List[float], right: List[float]) -> List[float]:
+    return [left[0], min(left[1], right[1]), max(left[2], right[2]), left[3] + right[3], left[4] + right[4]]
+
+
+def _bucket(bucket: List[float], start: int, width: int) -> Bucket:
+    index, low, high, total, count = bucket
+    return start + int(index) * width, low, high, total / count, int(count)
+
+
+def lttb(
+    chunks: Iterable[Sequence[Row]],
+    start: int,
+    width: int,
+    *,
+    vectorized: bool = True,
+) -> Iterator[Row]:
+    """The first and last sample plus the most significant sample of each bucket.
+
+    A bucket's sample is the one spanning the largest triangle with the sample
+    kept before it and the average of the following bucket, so a bucket is
+    decided as soon as the next one is complete.
+    """
+
+    pick = _pick_numpy if vectorized and HAVE_NUMPY else _pick_python
+    anchor: Optional[Row] = None
+    pending: List[Row] = []
+    current: List[Row] = []
+    index: Optional[int] = None
+    sum_ts = sum_value = 0.0
+    for chunk in chunks:
+        for row in chunk:
+            if anchor is None:
+                anchor = row
+                yield row
+                continue
+            bucket = (row[0] - start) // width
+            if bucket == index:
+                current.append(row)
+                sum_ts += row[0]
+                sum_value += row[1]
+                continue
+            if pending:
+                anchor = pick(anchor, pending, (sum_ts / len(current), sum_value / len(current)))
+                yield anchor
+            pending, current, index = current, [row], bucket
+            sum_ts, sum_value = row[0], row[1]
+    if anchor is None or not current:
+        return
+    last = current[-1]
+    if pending:
+        anchor = pick(anchor, pending, (sum_ts / len(current), sum_value / len(current)))
+        yield anchor
+    if len(current) > 1:
+        yield pick(anchor, current[:-1], last)
+    yield last
+
+
+def _pick_python(anchor: Row, bucket: Sequence[Row], following: Tuple[float, float]) -> Row:
+    ax, ay = anchor
+    cx, cy = following
+    best, largest = bucket[0], -1.0
+    for row in bucket:
+        area = abs((ax - cx) * (row[1] - ay) - (ax - row[0]) * (cy - ay))
+        if area > largest:
+            best, largest = row, area
+    return best
+
+
+def _pick_numpy(anchor: Row, bucket: Sequence[Row], following: Tuple[float, float]) -> Row:
+    if len(bucket) < LTTB_VECTOR_MIN:
+        return _pick_python(anchor, bucket, following)
+    ax, ay = anchor
+    cx, cy = following
+    data = np.array(bucket, dtype=np.float64)
+    area = np.abs((ax - cx) * (data[:, 1] - ay) - (ax - data[:, 0]) * (cy - ay))
+    return bucket[int(np.argmax(area))]
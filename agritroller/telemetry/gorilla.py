@@ -0,0 +1,155 @@
+"""Gorilla-style compression of a single time series.
+
+Follows the scheme of Facebook's Gorilla TSDB (Pelkonen et al., 2015):
+timestamps are stored as delta-of-deltas in variable-width buckets, so a
+steady poll costs one bit per sample, and each value is XORed with the
+previous one and only the meaningful bits are kept, so an unchanged reading
+also costs one bit. Timestamps are integer milliseconds, values float64, and
+round-trips are exact.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Any, List, Sequence, Tuple
+
+# Delta-of-delta buckets: (prefix, prefix bits, value bits), tried in order.
+_DOD_BUCKETS = ((0b10, 2, 7), (0b110, 3, 9), (0b1110, 4, 12))
+_DOD_FALLBACK = (0b1111, 4, 64)
+
+
+class BitWriter:
+    """Appends big-endian bit fields to a ``bytearray``."""
+
+    __slots__ = ("_buffer", "_acc", "_bits")
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, bits: int) -> None:
+        self._acc = (self._acc << bits) | (value & ((1 << bits) - 1))
+        self._bits += bits
+        while self._bits >= 8:
+            self._bits -= 8
+            self._buffer.append((self._acc >> self._bits) & 0xFF)
+        self._acc &= (1 << self._bits) - 1
+
+    def getvalue(self) -> bytes:
+        if self._bits:
+            return bytes(self._buffer) + bytes([(self._acc << (8 - self._bits)) & 0xFF])
+        return bytes(self._buffer)
+
+
+class BitReader:
+    """Reads big-endian bit fields from anything indexable by byte (bytes, mmap)."""
+
+    __slots__ = ("_data", "_pos", "_acc", "_bits")
+
+    def __init__(self, data: Any, offset: int = 0) -> None:
+        self._data = data
+        self._pos = offset
+        self._acc = 0
+        self._bits = 0
+
+    def read(self, bits: int) -> int:
+        while self._bits < bits:
+            self._acc = (self._acc << 8) | self._data[self._pos]
+            self._pos += 1
+            self._bits += 8
+        self._bits -= bits
+        value = self._acc >> self._bits
+        self._acc &= (1 << self._bits) - 1
+        return value
+
+
+def _signed(value: int, bits: int) -> int:
+    return value - (1 << bits) if value >> (bits - 1) else value
+
+
+def encode(timestamps: Sequence[int], values: Sequence[float]) -> bytes:
+    """Compress time-ordered ``timestamps`` (ms) and their ``values``."""
+
+    count = len(timestamps)
+    if count != len(values):
+        raise ValueError("timestamps and values differ in length")
+    if not count:
+        return b""
+    words = struct.unpack(f">{count}Q", struct.pack(f">{count}d", *values))
+    writer = BitWriter()
+    write = writer.write
+    write(timestamps[0], 64)
+    write(words[0], 64)
+    previous_ts, previous_delta, previous_word = timestamps[0], 0, words[0]
+    leading, trailing = -1, 0
+    for index in range(1, count):
+        ts = timestamps[index]
+        delta = ts - previous_ts
+        dod = delta - previous_delta
+        if dod == 0:
+            write(0, 1)
+        else:
+            for prefix, prefix_bits, bits in _DOD_BUCKETS:
+                if -(1 << (bits - 1)) <= dod < 1 << (bits - 1):
+                    break
+            else:
+                prefix, prefix_bits, bits = _DOD_FALLBACK
+            write(prefix, prefix_bits)
+            write(dod, bits)
+        previous_ts, previous_delta = ts, delta
+
+        word = words[index]
+        xor = word ^ previous_word
+        previous_word = word
+        if not xor:
+            write(0, 1)
+            continue
+        lead = min(31, 64 - xor.bit_length())
+        trail = (xor & -xor).bit_length() - 1
+        if leading >= 0 and lead >= leading and trail >= trailing:
+            # Fits the previous window of meaningful bits.
+            write(0b10, 2)
+            write(xor >> trailing, 64 - leading - trailing)
+            continue
+        leading, trailing = lead, trail
+        meaningful = 64 - lead - trail
+        write(0b11, 2)
+        write(lead, 5)
+        write(meaningful - 1, 6)
+        write(xor >> trail, meaningful)
+    return writer.getvalue()
+
+
+def decode(data: Any, count: int, offset: int = 0) -> Tuple[List[int], List[float]]:
+    """Inverse of :func:`encode` for ``count`` samples starting at byte ``offset`` of ``data``."""
+
+    if count <= 0:
+        return [], []
+    reader = BitReader(data, offset)
+    read = reader.read
+    ts = _signed(read(64), 64)
+    word = read(64)
+    timestamps = [ts]
+    words = [word]
+    delta = 0
+    leading = trailing = 0
+    for _ in range(count - 1):
+        if read(1):
+            for _prefix, prefix_bits, bits in _DOD_BUCKETS:
+                if not read(1):
+                    break
+            else:
+                bits = _DOD_FALLBACK[2]
+            delta += _signed(read(bits), bits)
+        ts += delta
+        timestamps.append(ts)
+
+        if read(1):
+            if read(1):
+                leading = read(5)
+                meaningful = read(6) + 1
+                trailing = 64 - leading - meaningful
+            word ^= read(64 - leading - trailing) << trailing
+        words.append(word)
+    return timestamps, list(struct.unpack(f">{count}d", struct.pack(f">{count}Q", *words)))
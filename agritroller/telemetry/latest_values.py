@@ -0,0 +1,121 @@
+"""In-memory current value of every device point."""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+
+class LatestValue:
+    """Last known value of one point and the cache version that set it."""
+
+    __slots__ = ("value", "ts", "version")
+
+    def __init__(self, value: Any, ts: int, version: int) -> None:
+        self.value = value
+        self.ts = ts
+        self.version = version
+
+
+class LatestValueCache:
+    """Current values keyed by device id and point name.
+
+    ``version`` grows by one for every update that changes at least one
+    value, and each entry remembers the version of its last change, so a
+    client that already holds version ``n`` asks for ``since=n`` and gets only
+    what changed (nothing at all when the version is unchanged). Repeated
+    identical readings refresh ``ts`` without bumping the version. Versions
+    start from the wall clock in milliseconds so they keep growing across
+    restarts.
+
+    Discarding a device bumps the version too and leaves a tombstone per
+    point, so a delta after an older version lists those points under
+    ``removed`` until they are updated again.
+    """
+
+    __slots__ = ("_devices", "_removed", "version")
+
+    def __init__(self) -> None:
+        self._devices: Dict[int, Dict[str, LatestValue]] = {}
+        self._removed: Dict[int, Dict[str, int]] = {}
+        self.version = int(time.time() * 1000)
+
+    def __len__(self) -> int:
+        return sum(len(points) for points in self._devices.values())
+
+    def update(self, device_id: int, values: Mapping[str, Any], *, timestamp: Optional[float] = None) -> bool:
+        """Store ``values`` of a device; returns whether anything changed."""
+
+        ts = int((time.time() if timestamp is None else timestamp) * 1000)
+        points = self._devices.setdefault(device_id, {})
+        version = self.version + 1
+        changed = False
+        for name, value in values.items():
+            entry = points.get(name)
+            if entry is None:
+                points[name] = LatestValue(value, ts, version)
+                changed = True
+            elif entry.value != value or type(entry.value) is not type(value):
+                entry.value, entry.ts, entry.version = value, ts, version
+                changed = True
+            else:
+                entry.ts = ts
+        if changed:
+            self.version = version
+            tombstones = self._removed.get(device_id)
+            if tombstones:
+                for name in values:
+                    tombstones.pop(name, None)
+                if not tombstones:
+                    del self._removed[device_id]
+        return changed
+
+    def discard(self, device_ids: Iterable[int]) -> None:
+        version = self.version + 1
+        removed = False
+        for device_id in device_ids:
+            points = self._devices.pop(device_id, None)
+            if points:
+                self._removed.setdefault(device_id, {}).update(dict.fromkeys(points, version))
+                removed = True
+        if removed:
+            self.version = version
+
+    def snapshot(self, *, device_id: Optional[int] = None, since: Optional[int] = None) -> Dict[str, Any]:
+        """Points changed after version ``since`` (all when omitted), optionally of one device.
+
+        With ``since``, points discarded after that version are listed under
+        ``removed``.
+        """
+
+        if since is not None and since >= self.version:
+            return {"version": self.version, "points": [], "removed": []}
+        if device_id is not None:
+            devices = {device_id: self._devices.get(device_id, {})}
+            tombstones = {device_id: self._removed.get(device_id, {})}
+        else:
+            devices = self._devices
+            tombstones = self._removed
+        removed: List[Dict[str, Any]] = []
+        if since is not None:
+            removed = [
+                {"device_id": owner, "name": name, "version": version}
+                for owner, names in tombstones.items()
+                for name, version in names.items()
+                if version > since
+            ]
+        points: List[Dict[str, Any]] = []
+        for owner, entries in devices.items():
+            for name, entry in entries.items():
+                if since is not None and entry.version <= since:
+                    continue
+                points.append(
+                    {
+                        "device_id": owner,
+                        "name": name,
+                        "value": entry.value,
+                        "ts": entry.ts,
+                        "version": entry.version,
+                    }
+                )
+        return {"version": self.version, "points": points, "removed": removed}
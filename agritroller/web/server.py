@@ -6,10 +6,11 @@ import asyncio
 import inspect
 import logging
 import os
+import sqlite3
 import contextlib
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Awaitable, Callable, Dict, List, Optional, cast
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
@@ -26,6 +27,9 @@ from agritroller.services.module_configs import ModuleConfigService
 from agritroller.services.modbus_scanner import ModbusScannerService
 from agritroller.services.notifications import NotificationService
 from agritroller.services.port_monitor import PortMonitorService
+from agritroller.services.rs485 import RS485Service
+from agritroller.services.telemetry import TelemetryService
+from agritroller.services.telemetry_rollups import TelemetryRollupService
 from agritroller.services.templates import TemplateService
 from agritroller.services.wifi import WifiService
 from agritroller.system import detect_serial_ports, gather_system_metrics
@@ -58,6 +62,18 @@ class WifiConnectPayload(BaseModel):
     password: Optional[str] = None
 
 
+class ScanImportPayload(BaseModel):
+    addresses: Optional[List[int]] = None
+    names: Dict[int, str] = Field(default_factory=dict)
+    device_type_slug: Optional[str] = None
+    skip_existing: bool = True
+
+
+class ActuatorCommandPayload(BaseModel):
+    values: Dict[str, Any] = Field(min_length=1)
+    verify: bool = False
+
+
 class ModbusScanPayload(BaseModel):
     model_config = ConfigDict(validate_by_name=True)
 
@@ -70,6 +86,48 @@ class ModbusScanPayload(BaseModel):
     function: int = Field(default=3, ge=1, le=4)
     count: int = Field(default=1, ge=1, le=4)
     timeout: float = Field(default=0.2, gt=0, lt=5)
+    adaptive_timeout: bool = False
+    min_timeout: float = Field(default=0.02, gt=0, lt=5)
+    max_timeout: Optional[float] = Field(default=None, gt=0, lt=5)
+    parity: str = Field(default="N", pattern="^[NEO]$")
+    identify: bool = False
+    mode: str = Field(default="full", pattern="^(full|quick|skip)$")
+    force: bool = False
+
+
+class ModbusDiscoveryPayload(BaseModel):
+    model_config = ConfigDict(validate_by_name=True)
+
+    ports: List[str] = Field(min_length=1)
+    baudrates: List[int] = Field(min_length=1)
+    parities: List[str] = Field(default_factory=lambda: ["N"], min_length=1)
+    start_address: int = Field(default=1, ge=1, le=247)
+    end_address: int = Field(default=247, ge=1, le=247)
+    register_address: int = Field(default=0, ge=0, le=65535, alias="register")
+    function: int = Field(default=3, ge=1, le=4)
+    count: int = Field(default=1, ge=1, le=4)
+    timeout: float = Field(default=0.2, gt=0, lt=5)
+    adaptive_timeout: bool = False
+    min_timeout: float = Field(default=0.02, gt=0, lt=5)
+    max_timeout: Optional[float] = Field(default=None, gt=0, lt=5)
+    identify: bool = False
+    mode: str = Field(default="full", pattern="^(full|quick|skip)$")
+    force: bool = False
+
+
+class ModbusReadPayload(BaseModel):
+    model_config = ConfigDict(validate_by_name=True)
+
+    port: Optional[str] = None
+    baudrate: Optional[int] = None
+    device_id: Optional[int] = None
+    address: int = Field(ge=1, le=247)
+    register_address: int = Field(ge=0, le=65535, alias="register")
+    function: int = Field(default=3, ge=1, le=4)
+    count: int = Field(default=1, ge=1, le=125)
+    timeout: float = Field(default=0.2, gt=0, lt=5)
+    # Defaults to the device's parity with ``device_id``, else "N".
+    parity: Optional[str] = Field(default=None, pattern="^[NEO]$")
 
 
 class RegisterSpec(BaseModel):
@@ -325,6 +383,7 @@ class WebServer:
                 )
             except ValueError as exc:
                 raise HTTPException(status_code=400, detail=str(exc)) from exc
+            self._refresh_poll_targets()
             monitor = self._get_port_monitor(optional=True)
             if monitor:
                 try:
@@ -360,6 +419,7 @@ class WebServer:
                 raise HTTPException(status_code=404, detail=str(exc)) from exc
             except ValueError as exc:
                 raise HTTPException(status_code=400, detail=str(exc)) from exc
+            self._refresh_poll_targets()
             if payload.port is not None or payload.baudrate is not None:
                 monitor = self._get_port_monitor(optional=True)
                 if monitor:
@@ -375,6 +435,7 @@ class WebServer:
             deleted = registry.delete_device(device_id)
             if not deleted:
                 raise HTTPException(status_code=404, detail="Device not found")
+            self._refresh_poll_targets()
             return Response(status_code=204)
 
         @self.app.post("/api/devices/{device_id}/refresh-port")
@@ -406,32 +467,208 @@ class WebServer:
                 raise HTTPException(status_code=400, detail="Port is required")
             if baudrate is None:
                 raise HTTPException(status_code=400, detail="Baudrate is required")
-            job = await scanner.start_scan(
-                port=port,
-                baudrate=baudrate,
-                start_address=payload.start_address,
-                end_address=payload.end_address,
-                register=payload.register_address,
-                function=payload.function,
-                count=payload.count,
-                timeout=payload.timeout,
-                device_id=device_id,
-                device_name=device_name,
-            )
-            return scanner.serialize_job(job)
+            try:
+                job = await scanner.start_scan(
+                    port=port,
+                    baudrate=baudrate,
+                    start_address=payload.start_address,
+                    end_address=payload.end_address,
+                    register=payload.register_address,
+                    function=payload.function,
+                    count=payload.count,
+                    timeout=payload.timeout,
+                    device_id=device_id,
+                    device_name=device_name,
+                    adaptive_timeout=payload.adaptive_timeout,
+                    min_timeout=payload.min_timeout,
+                    max_timeout=payload.max_timeout,
+                    parity=payload.parity,
+                    identify=payload.identify,
+                    mode=payload.mode,
+                    force=payload.force,
+                )
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc)) from exc
+            return job
+
+        @self.app.post("/api/rs485/discover", status_code=201)
+        async def start_modbus_discovery(payload: ModbusDiscoveryPayload) -> Any:
+            scanner = self._get_modbus_scanner()
+            if payload.start_address > payload.end_address:
+                raise HTTPException(status_code=400, detail="start_address must be <= end_address")
+            parities = [parity.upper() for parity in payload.parities]
+            if any(parity not in ("N", "E", "O") for parity in parities):
+                raise HTTPException(status_code=400, detail="Parity must be one of N, E, O")
+            try:
+                job = await scanner.start_discovery(
+                    ports=payload.ports,
+                    baudrates=payload.baudrates,
+                    parities=parities,
+                    start_address=payload.start_address,
+                    end_address=payload.end_address,
+                    register=payload.register_address,
+                    function=payload.function,
+                    count=payload.count,
+                    timeout=payload.timeout,
+                    adaptive_timeout=payload.adaptive_timeout,
+                    min_timeout=payload.min_timeout,
+                    max_timeout=payload.max_timeout,
+                    identify=payload.identify,
+                    mode=payload.mode,
+                    force=payload.force,
+                )
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc)) from exc
+            return job
+
+        @self.app.post("/api/rs485/read")
+        async def modbus_read(payload: ModbusReadPayload) -> Any:
+            scanner = self._get_modbus_scanner()
+            port = payload.port
+            baudrate = payload.baudrate
+            parity = payload.parity
+            if payload.device_id is not None:
+                device = self._get_device_registry().get_device(payload.device_id)
+                if not device or device.get("kind") != "rs485":
+                    raise HTTPException(status_code=404, detail="RS-485 device not found")
+                port = port or device["port"]
+                baudrate = baudrate or device["baudrate"]
+                # The same line settings the poller uses for this device.
+                parity = parity or (device.get("metadata") or {}).get("parity")
+            if not port:
+                raise HTTPException(status_code=400, detail="Port is required")
+            if baudrate is None:
+                raise HTTPException(status_code=400, detail="Baudrate is required")
+            try:
+                return await scanner.read_registers(
+                    port=port,
+                    baudrate=baudrate,
+                    address=payload.address,
+                    register=payload.register_address,
+                    function=payload.function,
+                    count=payload.count,
+                    timeout=payload.timeout,
+                    parity=str(parity or "N"),
+                )
+            except OSError as exc:
+                raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+        @self.app.get("/api/rs485/ports/stats")
+        async def modbus_port_stats() -> Any:
+            scanner = self._get_modbus_scanner()
+            return scanner.port_stats()
+
+        @self.app.get("/api/rs485/poll")
+        async def rs485_poll_stats() -> Any:
+            service = self._get_rs485_service()
+            return service.poll_stats()
+
+        @self.app.post("/api/rs485/devices/{device_id}/command")
+        async def rs485_command(device_id: int, payload: ActuatorCommandPayload) -> Any:
+            service = self._get_rs485_service()
+            try:
+                return await service.command(device_id, payload.values, verify=payload.verify)
+            except LookupError as exc:
+                raise HTTPException(status_code=404, detail=str(exc)) from exc
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc)) from exc
+            except (OSError, RuntimeError) as exc:
+                raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+        @self.app.get("/api/telemetry/stats")
+        async def telemetry_stats() -> Any:
+            stats = self._get_telemetry_service().stats()
+            rollups = self.context.state.get("telemetry_rollups")
+            if isinstance(rollups, TelemetryRollupService):
+                stats["rollups"] = rollups.stats()
+            return stats
+
+        @self.app.get("/api/telemetry/latest")
+        async def telemetry_latest(device_id: Optional[int] = None, since: Optional[int] = None) -> Any:
+            return self._get_telemetry_service().latest.snapshot(device_id=device_id, since=since)
+
+        @self.app.get("/api/telemetry/range")
+        async def telemetry_range(
+            device_id: int,
+            start: float,
+            end: float,
+            name: Optional[List[str]] = Query(None),
+            points: int = Query(500, ge=3, le=5000),
+            mode: str = Query("lttb"),
+        ) -> Any:
+            service = self._get_telemetry_service()
+            try:
+                return await service.query_range(device_id, name, start=start, end=end, points=points, mode=mode)
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc)) from exc
+            except (sqlite3.Error, RuntimeError) as exc:
+                raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+        @self.app.delete("/api/rs485/scan/cache")
+        async def clear_modbus_scan_cache(port: Optional[str] = Query(None)) -> Any:
+            scanner = self._get_modbus_scanner()
+            return {"removed": scanner.clear_address_cache(port)}
 
         @self.app.get("/api/rs485/scan")
-        async def list_modbus_scans() -> Any:
+        async def list_modbus_scans(
+            offset: Optional[int] = Query(None, ge=0),
+            limit: Optional[int] = Query(None, ge=1, le=200),
+            status: Optional[str] = None,
+        ) -> Any:
             scanner = self._get_modbus_scanner()
-            return [scanner.serialize_job(job) for job in scanner.list_jobs()]
+            if offset is None and limit is None and status is None:
+                # Unpaginated clients keep getting a bare list of the jobs held in memory.
+                return [scanner.serialize_job(job) for job in scanner.jobs.values()]
+            return scanner.list_jobs(offset=offset or 0, limit=limit or 20, status=status)
 
         @self.app.get("/api/rs485/scan/{job_id}")
-        async def get_modbus_scan(job_id: str) -> Any:
+        async def get_modbus_scan(job_id: str, since: Optional[int] = Query(None, ge=0)) -> Any:
             scanner = self._get_modbus_scanner()
             job = scanner.get_job(job_id)
             if not job:
                 raise HTTPException(status_code=404, detail="Scan job not found")
-            return scanner.serialize_job(job)
+            return scanner.serialize_job(job, since=since)
+
+        @self.app.post("/api/rs485/scan/{job_id}/pause")
+        async def pause_modbus_scan(job_id: str) -> Any:
+            scanner = self._get_modbus_scanner()
+            return await self._control_scan_job(scanner.pause_job, job_id)
+
+        @self.app.post("/api/rs485/scan/{job_id}/resume")
+        async def resume_modbus_scan(job_id: str) -> Any:
+            scanner = self._get_modbus_scanner()
+            return await self._control_scan_job(scanner.resume_job, job_id)
+
+        @self.app.post("/api/rs485/scan/{job_id}/cancel")
+        async def cancel_modbus_scan(job_id: str) -> Any:
+            scanner = self._get_modbus_scanner()
+            return await self._control_scan_job(scanner.cancel_job, job_id)
+
+        @self.app.post("/api/rs485/scan/{job_id}/import", status_code=201)
+        async def import_modbus_scan(job_id: str, payload: ScanImportPayload) -> Any:
+            scanner = self._get_modbus_scanner()
+            registry = self._get_device_registry()
+            try:
+                slaves = scanner.registration_entries(job_id, addresses=payload.addresses, names=payload.names)
+            except LookupError as exc:
+                raise HTTPException(status_code=404, detail=str(exc)) from exc
+            if payload.device_type_slug:
+                for slave in slaves:
+                    slave["device_type_slug"] = payload.device_type_slug
+            try:
+                imported = registry.create_rs485_slaves(slaves, skip_existing=payload.skip_existing)
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc)) from exc
+            self._refresh_poll_targets()
+            monitor = self._get_port_monitor(optional=True)
+            if monitor and imported["created"]:
+                try:
+                    imported["created"] = await monitor.refresh_ports(
+                        [device["id"] for device in imported["created"]]
+                    )
+                except Exception:  # pragma: no cover - best effort
+                    self.logger.exception("Failed to refresh device port status")
+            return imported
 
         @self.app.get("/api/notifications")
         async def list_notifications(
@@ -519,6 +756,23 @@ class WebServer:
             raise HTTPException(status_code=503, detail="Module config service unavailable")
         return service
 
+    def _refresh_poll_targets(self) -> None:
+        service = self.context.state.get("rs485_service")
+        if isinstance(service, RS485Service) and service.config.poll_enabled:
+            service.sync_targets()
+
+    def _get_rs485_service(self) -> RS485Service:
+        service = self.context.state.get("rs485_service")
+        if not isinstance(service, RS485Service):
+            raise HTTPException(status_code=503, detail="RS-485 service unavailable")
+        return service
+
+    def _get_telemetry_service(self) -> TelemetryService:
+        service = self.context.state.get("telemetry_service")
+        if not isinstance(service, TelemetryService):
+            raise HTTPException(status_code=503, detail="Telemetry service unavailable")
+        return service
+
     def _get_device_registry(self) -> DeviceRegistryService:
         registry = self.context.state.get("device_registry")
         if not isinstance(registry, DeviceRegistryService):
@@ -537,6 +791,16 @@ class WebServer:
             raise HTTPException(status_code=503, detail="Notification service unavailable")
         return service
 
+    async def _control_scan_job(
+        self, action: Callable[[str], Awaitable[Dict[str, Any]]], job_id: str
+    ) -> Dict[str, Any]:
+        try:
+            return await action(job_id)
+        except LookupError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+
     def _get_modbus_scanner(self) -> ModbusScannerService:
         service = self.context.state.get("modbus_scanner")
         if not isinstance(service, ModbusScannerService):
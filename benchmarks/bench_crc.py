@@ -0,0 +1,78 @@
+"""Micro-benchmark for the Modbus CRC implementations.
+
+Run with ``python -m benchmarks.bench_crc`` from the repository root.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import timeit
+from typing import Any, Dict, List
+
+from agritroller.modbus.crc import append_crc, check_crc, check_frames, crc16, crc16_bitwise
+
+
+def _make_frames(count: int, payload_words: int, seed: int) -> List[bytes]:
+    rng = random.Random(seed)
+    frames: List[bytes] = []
+    for _ in range(count):
+        address = rng.randint(1, 247)
+        payload = bytes(rng.getrandbits(8) for _ in range(payload_words * 2))
+        frames.append(append_crc(bytes([address, 3, len(payload)]) + payload))
+    return frames
+
+
+def _per_frame(seconds: float, frames: int, repeat: int) -> float:
+    return seconds / (frames * repeat) * 1e6
+
+
+def run(frames: int = 2000, payload_words: int = 4, repeat: int = 20, seed: int = 1) -> Dict[str, Any]:
+    batch = _make_frames(frames, payload_words, seed)
+    bodies = [frame[:-2] for frame in batch]
+
+    def bitwise() -> None:
+        for body in bodies:
+            crc16_bitwise(body)
+
+    def table() -> None:
+        for body in bodies:
+            crc16(body)
+
+    def per_frame() -> None:
+        for frame in batch:
+            check_crc(frame)
+
+    def batched() -> None:
+        check_frames(batch)
+
+    results: Dict[str, Any] = {
+        "frames": frames,
+        "frame_bytes": len(batch[0]),
+        "repeat": repeat,
+        "us_per_frame": {},
+    }
+    cases = (("bitwise", bitwise), ("table", table), ("check_crc", per_frame), ("check_frames", batched))
+    for name, func in cases:
+        elapsed = min(timeit.repeat(func, number=repeat, repeat=3))
+        results["us_per_frame"][name] = round(_per_frame(elapsed, frames, repeat), 3)
+    baseline = results["us_per_frame"]["bitwise"]
+    results["speedup"] = {
+        name: round(baseline / value, 2) if value else None
+        for name, value in results["us_per_frame"].items()
+    }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--payload-words", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.frames, args.payload_words, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Micro-benchmark for decoding block read replies.
+
+Compares value-by-value decoding (``unpack_words`` + ``decode_point``), the
+precompiled :class:`BlockDecoder` and, when NumPy is installed, the
+:class:`VectorBlockDecoder`. Run with ``python -m benchmarks.bench_decode``
+from the repository root.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import timeit
+from typing import Any, Dict, List
+
+from agritroller.modbus.registers import BlockDecoder, PollPoint, ReadBlock, decode_point, unpack_words
+from agritroller.modbus.vectorized import HAVE_NUMPY, VectorBlockDecoder
+
+# (data_type, transform) cycled over the block; two-word types take two words.
+LAYOUT = [
+    ("uint16", None),
+    ("int16", "scale:0.1"),
+    ("uint32", None),
+    ("float32", "scale:0.01"),
+    ("uint16", "scale:0.001"),
+    ("int32", "offset:-40"),
+]
+
+
+def _make_block(words: int) -> ReadBlock:
+    points: List[PollPoint] = []
+    address = 0
+    while True:
+        data_type, transform = LAYOUT[len(points) % len(LAYOUT)]
+        width = 2 if data_type in ("uint32", "int32", "float32") else 1
+        if address + width > words:
+            break
+        points.append(
+            PollPoint(f"p{len(points)}", "sensor", "holding_register", 3, address, width, data_type, transform)
+        )
+        address += width
+    return ReadBlock(3, 0, words, tuple((point, point.address) for point in points))
+
+
+def _per_block(seconds: float, payloads: int, repeat: int) -> float:
+    return seconds / (payloads * repeat) * 1e6
+
+
+def run(words: int = 64, payloads: int = 500, repeat: int = 10, seed: int = 1) -> Dict[str, Any]:
+    block = _make_block(words)
+    rng = random.Random(seed)
+    batch = [bytes(rng.getrandbits(8) for _ in range(words * 2)) for _ in range(payloads)]
+
+    def scalar() -> None:
+        for payload in batch:
+            items = unpack_words(payload)
+            {point.name: decode_point(point, items, offset) for point, offset in block.points}
+
+    compiled = BlockDecoder(block)
+
+    def block_decoder() -> None:
+        for payload in batch:
+            compiled(payload)
+
+    variants = [("scalar", scalar), ("block", block_decoder)]
+    if HAVE_NUMPY:
+        vector = VectorBlockDecoder(block)
+
+        def numpy_decoder() -> None:
+            for payload in batch:
+                vector(payload)
+
+        variants.append(("numpy", numpy_decoder))
+
+    results: Dict[str, Any] = {
+        "words": words,
+        "points": len(block.points),
+        "payloads": payloads,
+        "repeat": repeat,
+        "numpy": HAVE_NUMPY,
+        "us_per_block": {},
+    }
+    for name, func in variants:
+        elapsed = min(timeit.repeat(func, number=repeat, repeat=3))
+        results["us_per_block"][name] = round(_per_block(elapsed, payloads, repeat), 3)
+    baseline = results["us_per_block"]["scalar"]
+    results["speedup"] = {
+        name: round(baseline / value, 2) if value else None for name, value in results["us_per_block"].items()
+    }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--words", type=int, default=64, help="registers per block (max 125)")
+    parser.add_argument("--payloads", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(run(min(125, args.words), args.payloads, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
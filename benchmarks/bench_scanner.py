@@ -0,0 +1,212 @@
+"""End-to-end throughput benchmark for the RS-485 scan path.
+
+Every scenario starts a :class:`ModbusScannerService`, submits a sweep with
+``start_scan`` and waits for the job to finish, so probes travel through the
+port worker queue, the selected serial transport and a PTY to a simulated slave
+farm. The farm runs in a child process so its CPU time does not pollute the
+per-probe figures. Run with ``python -m benchmarks.bench_scanner`` from the
+repository root; results are printed (or written with ``--output``) as JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import platform
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Sequence
+
+from agritroller.config import AppConfig, ModbusScannerConfig
+from agritroller.modbus.simulator import SlaveBehaviour, VirtualBus, VirtualSlave
+from agritroller.modbus.transport import TRANSPORT_ASYNCIO, TRANSPORT_THREAD
+from agritroller.services.base import BootstrapContext
+from agritroller.services.event_bus import EventBus
+from agritroller.services.modbus_scanner import PRIORITY_SCAN, ModbusScannerService
+
+
+def _slave_addresses(addresses: int, density: float) -> List[int]:
+    wanted = max(1, round(addresses * density))
+    step = addresses / wanted
+    return sorted({1 + int(index * step) for index in range(wanted)})
+
+
+def _serve_bus(conn: Any, slaves: List[int], count: int, baudrate: int, latency: float) -> None:
+    registers = [{"name": "data", "register_type": "holding_register", "address": 0, "length": count}]
+    bus = VirtualBus(
+        [
+            VirtualSlave.from_registers(address, registers, behaviour=SlaveBehaviour(latency=latency))
+            for address in slaves
+        ],
+        baudrate=baudrate,
+    ).start()
+    conn.send(bus.path)
+    conn.recv()
+    bus.stop()
+
+
+class _SimulatedBus:
+    def __init__(self, slaves: List[int], *, count: int, baudrate: int, latency: float) -> None:
+        self._conn, child = multiprocessing.Pipe()
+        self._process = multiprocessing.get_context("fork").Process(
+            target=_serve_bus, args=(child, slaves, count, baudrate, latency), daemon=True
+        )
+
+    def __enter__(self) -> str:
+        self._process.start()
+        return str(self._conn.recv())
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._conn.send("stop")
+        self._process.join(timeout=5)
+
+
+def _percentile(values: Sequence[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def _run_scan(
+    path: str,
+    *,
+    transport: str,
+    addresses: int,
+    baudrate: int,
+    timeout: float,
+    count: int,
+) -> Dict[str, Any]:
+    context = BootstrapContext(config=AppConfig())
+    bus = context.state["event_bus"] = EventBus()
+    subscription = await bus.subscribe()
+    scanner = ModbusScannerService(context, ModbusScannerConfig(transport=transport, archive_completed=False))
+    await scanner.start()
+    peak_threads = threading.active_count()
+    executor_threads = 0
+    done = asyncio.Event()
+
+    async def sample_threads() -> None:
+        nonlocal peak_threads, executor_threads
+        while not done.is_set():
+            threads = threading.enumerate()
+            peak_threads = max(peak_threads, len(threads))
+            executor_threads = max(
+                executor_threads, sum(1 for thread in threads if thread.name.startswith("asyncio_"))
+            )
+            await asyncio.sleep(0.02)
+
+    sampler = asyncio.create_task(sample_threads())
+    cpu_start = time.process_time()
+    started = time.perf_counter()
+    job = await scanner.start_scan(
+        port=path,
+        baudrate=baudrate,
+        start_address=1,
+        end_address=addresses,
+        register=0,
+        count=count,
+        timeout=timeout,
+    )
+    # The final progress event is published once the job leaves the running state.
+    while True:
+        event = await subscription.get()
+        payload = event["payload"]
+        if event["type"] != "rs485.scan.progress" or payload.get("job_id") != job["id"]:
+            continue
+        if payload.get("status") not in ("queued", "running"):
+            break
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_start
+    done.set()
+    await sampler
+    finished = scanner.get_job(job["id"])
+    stats = scanner.get_worker(path).stats[PRIORITY_SCAN]
+    latencies = list(stats.service_times)
+    await subscription.close()
+    await scanner.stop()
+    probes = finished["progress"]
+    return {
+        "status": finished["status"],
+        "probes": probes,
+        "responders": len(finished["results"]),
+        "wall_s": round(elapsed, 4),
+        "addresses_per_s": round(probes / elapsed, 1) if elapsed else None,
+        "p50_probe_ms": round(_percentile(latencies, 0.5) * 1000, 3),
+        "p99_probe_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "cpu_us_per_probe": round(cpu / probes * 1e6, 1) if probes else None,
+        "peak_threads": peak_threads,
+        "executor_threads": executor_threads,
+    }
+
+
+def _scenarios(args: argparse.Namespace) -> Iterator[Dict[str, Any]]:
+    for density, baudrate, timeout, count, transport in itertools.product(
+        args.densities, args.baudrates, args.timeouts, args.counts, args.transports
+    ):
+        yield {
+            "density": density,
+            "baudrate": baudrate,
+            "timeout": timeout,
+            "count": count,
+            "transport": transport,
+        }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    for scenario in _scenarios(args):
+        slaves = _slave_addresses(args.addresses, scenario["density"])
+        with _SimulatedBus(
+            slaves, count=scenario["count"], baudrate=scenario["baudrate"], latency=args.latency
+        ) as path:
+            measured = asyncio.run(
+                _run_scan(
+                    path,
+                    transport=scenario["transport"],
+                    addresses=args.addresses,
+                    baudrate=scenario["baudrate"],
+                    timeout=scenario["timeout"],
+                    count=scenario["count"],
+                )
+            )
+        results.append({**scenario, "expected_responders": len(slaves), **measured})
+    return {
+        "benchmark": "scanner",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "addresses": args.addresses,
+        "slave_latency_s": args.latency,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--addresses", type=int, default=32, help="sweep addresses 1..N")
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.1, 0.5])
+    parser.add_argument("--baudrates", type=int, nargs="+", default=[9600, 115200])
+    parser.add_argument("--timeouts", type=float, nargs="+", default=[0.02, 0.05])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 8], help="registers read per probe")
+    parser.add_argument(
+        "--transports",
+        nargs="+",
+        default=[TRANSPORT_ASYNCIO, TRANSPORT_THREAD],
+        choices=[TRANSPORT_ASYNCIO, TRANSPORT_THREAD],
+    )
+    parser.add_argument("--latency", type=float, default=0.002, help="simulated slave turnaround in seconds")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Compare the asyncio and thread-based serial transports over PTY pairs.
+
+Each simulated port gets a responder thread that answers a share of the
+addresses; all ports are swept concurrently the way port workers would.
+Run with ``python -m benchmarks.bench_transport`` from the repository root.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import tty
+from typing import Any, Dict, List, Tuple
+
+from agritroller.modbus.crc import append_crc
+from agritroller.modbus.transport import TRANSPORT_ASYNCIO, TRANSPORT_THREAD, open_transport
+
+
+def _responder(master_fd: int, stop: threading.Event, every: int) -> None:
+    while not stop.is_set():
+        try:
+            request = os.read(master_fd, 8)
+        except OSError:
+            return
+        if len(request) == 8 and request[0] % every == 0:
+            os.write(master_fd, append_crc(bytes([request[0], request[1], 2, 0, request[0]])))
+
+
+def _open_ptys(count: int, every: int) -> Tuple[List[Tuple[int, int]], threading.Event, List[threading.Thread]]:
+    stop = threading.Event()
+    pairs: List[Tuple[int, int]] = []
+    threads: List[threading.Thread] = []
+    for _ in range(count):
+        master_fd, slave_fd = os.openpty()
+        tty.setraw(master_fd)
+        pairs.append((master_fd, slave_fd))
+        thread = threading.Thread(target=_responder, args=(master_fd, stop, every), daemon=True)
+        thread.start()
+        threads.append(thread)
+    return pairs, stop, threads
+
+
+async def _sweep(mode: str, path: str, addresses: int, timeout: float) -> int:
+    transport = await asyncio.to_thread(open_transport, path, baudrate=115200, timeout=timeout, mode=mode)
+    found = 0
+    try:
+        for address in range(1, addresses + 1):
+            frame = await transport.transact(append_crc(bytes([address, 3, 0, 0, 0, 1])), timeout=timeout)
+            found += bool(frame)
+    finally:
+        transport.close()
+    return found
+
+
+async def _run_mode(mode: str, paths: List[str], addresses: int, timeout: float) -> Dict[str, Any]:
+    peak_threads = threading.active_count()
+    done = asyncio.Event()
+
+    async def sample_threads() -> None:
+        nonlocal peak_threads
+        while not done.is_set():
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.005)
+
+    sampler = asyncio.create_task(sample_threads())
+    cpu_start = time.process_time()
+    started = time.perf_counter()
+    found = await asyncio.gather(*(_sweep(mode, path, addresses, timeout) for path in paths))
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_start
+    done.set()
+    await sampler
+    transactions = addresses * len(paths)
+    return {
+        "transport": mode,
+        "ports": len(paths),
+        "transactions": transactions,
+        "responders": sum(found),
+        "wall_s": round(elapsed, 4),
+        "transactions_per_s": round(transactions / elapsed, 1) if elapsed else None,
+        "cpu_us_per_transaction": round(cpu / transactions * 1e6, 1),
+        "peak_threads": peak_threads,
+    }
+
+
+def run(ports: int = 4, addresses: int = 60, timeout: float = 0.02, every: int = 3) -> Dict[str, Any]:
+    pairs, stop, threads = _open_ptys(ports, every)
+    baseline_threads = threading.active_count()
+    paths = [os.ttyname(slave_fd) for _, slave_fd in pairs]
+    try:
+        results = [
+            asyncio.run(_run_mode(mode, paths, addresses, timeout))
+            for mode in (TRANSPORT_ASYNCIO, TRANSPORT_THREAD)
+        ]
+    finally:
+        stop.set()
+        for master_fd, slave_fd in pairs:
+            os.close(master_fd)
+            os.close(slave_fd)
+        for thread in threads:
+            thread.join(timeout=1)
+    return {"baseline_threads": baseline_threads, "timeout_s": timeout, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ports", type=int, default=4)
+    parser.add_argument("--addresses", type=int, default=60)
+    parser.add_argument("--timeout", type=float, default=0.02)
+    parser.add_argument("--every", type=int, default=3, help="answer every Nth address")
+    args = parser.parse_args()
+    print(json.dumps(run(args.ports, args.addresses, args.timeout, args.every), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -98,6 +98,24 @@ export const useDeviceStore = defineStore('devices', {
       }
     },
 
+    async importScanResults(jobId: string, addresses?: number[]) {
+      this.saving = true;
+      this.error = null;
+      try {
+        const response = await api.post<{ created: DeviceRecord[]; skipped: unknown[] }>(
+          `/rs485/scan/${jobId}/import`,
+          { addresses },
+        );
+        await this.fetchDevices();
+        return response.data;
+      } catch (error) {
+        this.error = extractErrorMessage(error);
+        throw error;
+      } finally {
+        this.saving = false;
+      }
+    },
+
     async updateDevice(deviceId: number, payload: DeviceUpdatePayload) {
       this.saving = true;
       this.error = null;
@@ -3,8 +3,72 @@
 from __future__ import annotations
 
 import sys
+import time
 from pathlib import Path
+from typing import List, Optional, Type
+
+import pytest
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+class ScriptedSerial:
+    """Serial double that serves scripted replies and accounts for time spent waiting.
+
+    Every written request is answered by :meth:`reply`, by default the next
+    entry of ``replies``. A short read adds ``timeout`` to ``waited`` and, with
+    ``sleep``, really waits that long (for buses driven from a worker thread).
+    It takes the keyword arguments of ``serial.Serial``, so tests can patch it in.
+    """
+
+    def __init__(
+        self,
+        replies: Optional[List[bytes]] = None,
+        *,
+        sleep: bool = False,
+        port: Optional[str] = None,
+        baudrate: int = 9600,
+        parity: str = "N",
+        timeout: float = 1.0,
+        **_: object,
+    ) -> None:
+        self.replies = list(replies or [])
+        self.sleep = sleep
+        self.port = port
+        self.baudrate = baudrate
+        self.parity = parity
+        self.timeout = timeout
+        self.pending = bytearray()
+        self.waited = 0.0
+        self.is_open = True
+        self.written: List[bytes] = []
+
+    def reply(self, request: bytes) -> bytes:
+        return self.replies.pop(0) if self.replies else b""
+
+    def reset_input_buffer(self) -> None:
+        self.pending.clear()
+
+    def write(self, data: bytes) -> int:
+        self.written.append(data)
+        self.pending.extend(self.reply(data))
+        return len(data)
+
+    def read(self, size: int) -> bytes:
+        chunk = bytes(self.pending[:size])
+        del self.pending[:size]
+        if len(chunk) < size:
+            self.waited += self.timeout
+            if self.sleep:
+                time.sleep(self.timeout)
+        return chunk
+
+    def close(self) -> None:
+        self.is_open = False
+
+
+@pytest.fixture
+def scripted_serial() -> Type[ScriptedSerial]:
+    return ScriptedSerial
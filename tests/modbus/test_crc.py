@@ -0,0 +1,29 @@
+import random
+
+from agritroller.modbus.crc import append_crc, check_crc, check_frames, crc16, crc16_bitwise
+from agritroller.services.modbus_scanner import ModbusScannerService
+
+
+def test_crc16_matches_reference() -> None:
+    rng = random.Random(7)
+    for size in (0, 1, 6, 37, 255):
+        data = bytes(rng.getrandbits(8) for _ in range(size))
+        assert crc16(data) == crc16_bitwise(data)
+    # Read holding register 0 from slave 1: well-known frame 01 03 00 00 00 01 84 0A
+    assert append_crc(bytes.fromhex("010300000001")) == bytes.fromhex("010300000001840a")
+
+
+def test_check_frames_batch() -> None:
+    good = append_crc(bytes([3, 3, 2, 0x12, 0x34]))
+    corrupted = good[:-1] + bytes([good[-1] ^ 0xFF])
+    assert check_crc(good)
+    assert not check_crc(corrupted)
+    assert check_frames([good, corrupted, b"\x01"]) == [True, False, False]
+
+
+def test_scanner_uses_shared_crc() -> None:
+    request = ModbusScannerService._build_request(5, 0x0100, 1, 3)
+    assert check_crc(request)
+    response = append_crc(bytes([5, 3, 2, 0x00, 0x2A]))
+    assert ModbusScannerService._valid_response(response, 5, 3, 1)
+    assert ModbusScannerService._parse_value(response, 1) == 42
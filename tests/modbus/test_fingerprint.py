@@ -0,0 +1,76 @@
+import math
+from typing import Dict, List, Optional, Set
+
+import pytest
+
+from agritroller.modbus.fingerprint import FingerprintPlan, Probe
+
+
+def _module(slug: str, addresses: List[int], module_type: Optional[str] = None) -> Dict[str, object]:
+    return {
+        "slug": slug,
+        "kind": "module",
+        "module_type": module_type,
+        "content": {
+            "registers": [
+                {"name": f"r{addr}", "register_type": "holding_register", "address": addr, "length": 1}
+                for addr in addresses
+            ],
+            "type_registers": [],
+            "sensors": [],
+            "actuators": [],
+        },
+    }
+
+
+def _slave(mapped: Set[int], calls: List[Probe]):
+    async def probe(item: Probe) -> Optional[bool]:
+        calls.append(item)
+        return item.address in mapped
+
+    return probe
+
+
+@pytest.mark.asyncio
+async def test_plan_identifies_each_module_with_logarithmic_probes() -> None:
+    # Module i exposes register 100 + bit for every bit set in its index, so
+    # the catalog is perfectly separable by eight-way splits.
+    modules = [_module(f"m{i}", [0] + [100 + bit for bit in range(4) if i & (1 << bit)]) for i in range(16)]
+    plan = FingerprintPlan.from_records(modules)
+    budget = math.ceil(math.log2(len(modules))) + 1
+    for record in modules:
+        mapped = {reg["address"] for reg in record["content"]["registers"]}  # type: ignore[index]
+        calls: List[Probe] = []
+        match = await plan.identify(_slave(mapped, calls))
+        assert match.slug == record["slug"]
+        assert match.kind == "module"
+        assert len(calls) <= budget
+    assert len(plan.distinguishing_probes()) == 4
+
+
+@pytest.mark.asyncio
+async def test_plan_prefers_module_over_its_type_and_rejects_strangers() -> None:
+    module_type = {
+        "slug": "base",
+        "kind": "module_type",
+        "content": {"registers": [{"name": "id", "register_type": "holding_register", "address": 0x100}]},
+    }
+    switch = _module("switch", [1])
+    switch["content"]["type_registers"] = module_type["content"]["registers"]  # type: ignore[index]
+    plan = FingerprintPlan.from_records([switch], [module_type])
+
+    match = await plan.identify(_slave({1, 0x100}, []))
+    assert (match.slug, match.kind) == ("switch", "module")
+    match = await plan.identify(_slave({0x100}, []))
+    assert (match.slug, match.kind) == ("base", "module_type")
+    match = await plan.identify(_slave({7}, []))
+    assert match.slug is None
+
+
+@pytest.mark.asyncio
+async def test_plan_uses_known_observations() -> None:
+    plan = FingerprintPlan.from_records([_module("a", [1]), _module("b", [2])])
+    calls: List[Probe] = []
+    match = await plan.identify(_slave({2}, calls), known={Probe(3, 2): True})
+    assert match.slug == "b"
+    assert calls == []
@@ -0,0 +1,82 @@
+import pytest
+
+from agritroller.config import AppConfig
+from agritroller.modbus.crc import append_crc
+from agritroller.modbus.framing import (
+    RTUFrameParser,
+    inter_frame_gap,
+    parse_exception,
+    read_frame,
+)
+from agritroller.modbus.transport import ThreadedSerialTransport
+from agritroller.services.base import BootstrapContext
+from agritroller.services.modbus_scanner import ModbusScannerService, ScanParams
+
+
+def test_parser_detects_lengths() -> None:
+    parser = RTUFrameParser()
+    parser.feed(b"\x01")
+    assert parser.bytes_needed() == 4
+    parser.feed(b"\x83")
+    assert parser.expected_length == 5
+    parser = RTUFrameParser()
+    parser.feed(b"\x01\x03\x04")
+    assert parser.expected_length == 9
+    parser = RTUFrameParser()
+    parser.feed(b"\x01\x05")
+    assert parser.expected_length == 8
+
+
+def test_read_frame_stops_after_exception_reply(scripted_serial) -> None:
+    exception = append_crc(bytes([7, 0x83, 0x02]))
+    ser = scripted_serial()
+    ser.pending.extend(exception + b"\xff\xff")
+    frame = read_frame(ser, timeout=0.5, baudrate=9600)
+    assert frame == exception
+    assert parse_exception(frame) == 2
+    assert ser.waited == 0
+    assert ser.timeout == 1.0
+
+
+def test_read_frame_silent_address_waits_once(scripted_serial) -> None:
+    ser = scripted_serial()
+    assert read_frame(ser, timeout=0.3, baudrate=9600) == b""
+    assert ser.waited == 0.3
+
+
+def test_read_frame_truncated_frame_ends_on_gap(scripted_serial) -> None:
+    ser = scripted_serial()
+    ser.pending.extend(bytes([1, 3, 4, 0, 1]))
+    frame = read_frame(ser, timeout=0.5, baudrate=9600)
+    assert frame == bytes([1, 3, 4, 0, 1])
+    assert ser.waited < 0.5
+    assert inter_frame_gap(9600) < ser.waited
+
+
+@pytest.mark.asyncio
+async def test_scanner_records_exception_responders(scripted_serial) -> None:
+    replies = [
+        append_crc(bytes([1, 3, 2, 0, 9])),
+        b"",
+        append_crc(bytes([3, 0x83, 0x02])),
+    ]
+    ser = scripted_serial(replies)
+    scanner = ModbusScannerService(BootstrapContext(config=AppConfig()))
+    job = {"progress": 0, "results": []}
+    params = ScanParams(
+        port="/dev/null",
+        baudrate=9600,
+        start_address=1,
+        end_address=3,
+        register=0,
+        function=3,
+        count=1,
+        timeout=0.2,
+    )
+    await scanner._scan_part(ThreadedSerialTransport(ser).transact, job, params)
+    assert job["progress"] == 3
+    assert [(r["address"], r["value"], r["exception"]) for r in job["results"]] == [
+        (1, 9, None),
+        (3, None, 2),
+    ]
+    assert ser.waited == 0.2
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from agritroller.modbus.planner import MAX_READ_REGISTERS, ReadPlanner
+from agritroller.modbus.registers import PollPoint, points_from_module
+from agritroller.modbus.simulator import load_catalog
+
+CONFIGS = Path(__file__).resolve().parents[2] / "configs"
+
+
+def _holding(name: str, address: int, length: int = 1) -> PollPoint:
+    return PollPoint(name, "sensor", "holding_register", 3, address, length)
+
+
+def test_planner_coalesces_ac_switch_reads() -> None:
+    record = load_catalog(CONFIGS)["ac_switch"]
+    points = points_from_module(record)
+    blocks = ReadPlanner().plan(points)
+    assert len(points) == 14
+    layout = {(block.function, block.address, block.count) for block in blocks}
+    assert layout == {
+        (1, 0x0000, 2),  # indicator + relay
+        (1, 0x0100, 1),  # change_id, too far from the relays to share a read
+        (2, 0x0000, 3),  # level_min/mid/max
+        (4, 0x0000, 2),  # vin
+        (3, 0x0100, 4),  # ack_id..ack_type, overlapping two-word registers
+        (3, 0x0110, 4),
+        (3, 0x0120, 2),
+    }
+    levels = next(block for block in blocks if block.function == 2)
+    assert [(point.name, offset) for point, offset in levels.points] == [
+        ("level_min", 0),
+        ("level_mid", 1),
+        ("level_max", 2),
+    ]
+
+
+def test_planner_respects_gap_and_quantity_limits() -> None:
+    points = [_holding("a", 0), _holding("b", 5), _holding("c", 20), _holding("d", 124, 2)]
+    assert [(b.address, b.count) for b in ReadPlanner(max_register_gap=4).plan(points)] == [
+        (0, 6),
+        (20, 1),
+        (124, 2),
+    ]
+    wide = ReadPlanner(max_register_gap=200).plan(points)
+    assert [(b.address, b.count) for b in wide] == [(0, 21), (124, 2)]
+    assert all(block.count <= MAX_READ_REGISTERS for block in wide)
+    assert [(b.address, b.count) for b in ReadPlanner.split(wide[0])] == [(0, 1), (5, 1), (20, 1)]
+
+
+def test_planner_cache_follows_config_revision() -> None:
+    planner = ReadPlanner()
+    registers = [{"name": "a", "register_type": "holding_register", "address": 1}]
+    record = {"slug": "probe", "content": {"registers": registers}}
+    first = planner.for_module(record, revision=1)
+    assert planner.for_module(record, revision=1)[1] is first[1]
+    registers.append({"name": "b", "register_type": "holding_register", "address": 2})
+    assert planner.for_module(record, revision=1)[1] is first[1]
+    assert [(b.address, b.count) for b in planner.for_module(record, revision=2)[1]] == [(1, 2)]
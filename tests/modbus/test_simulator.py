@@ -0,0 +1,102 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from agritroller.config import AppConfig
+from agritroller.modbus.crc import append_crc, check_crc
+from agritroller.modbus.simulator import SlaveBehaviour, SlaveFarm, VirtualSlave
+from agritroller.modbus.transport import open_transport
+from agritroller.services.base import BootstrapContext
+from agritroller.services.modbus_scanner import ModbusScannerService
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="PTY simulator requires POSIX")
+
+CONFIGS = Path(__file__).resolve().parents[2] / "configs"
+
+
+def test_virtual_slave_answers_declared_registers_only() -> None:
+    slave = VirtualSlave.from_registers(
+        7,
+        [
+            {"name": "vin", "register_type": "input_register", "address": 0, "length": 2},
+            {"name": "relay", "register_type": "coil", "address": 1, "length": 1},
+        ],
+        values={"vin": 1234},
+    )
+    assert slave.handle(append_crc(bytes([7, 4, 0, 0, 0, 2]))) == append_crc(bytes([7, 4, 4, 0x04, 0xD2, 0, 0]))
+    assert slave.handle(append_crc(bytes([7, 4, 0, 5, 0, 1]))) == append_crc(bytes([7, 0x84, 2]))
+    assert slave.handle(append_crc(bytes([7, 5, 0, 1, 0xFF, 0]))) == append_crc(bytes([7, 5, 0, 1, 0xFF, 0]))
+    assert slave.handle(append_crc(bytes([7, 1, 0, 1, 0, 1]))) == append_crc(bytes([7, 1, 1, 1]))
+    assert slave.handle(append_crc(bytes([7, 0x2B, 0, 0]))) == append_crc(bytes([7, 0xAB, 1]))
+    assert slave.handle(bytes([7, 3, 0, 0, 0, 1, 0, 0])) is None
+
+
+@pytest.mark.asyncio
+async def test_farm_serves_cfg_modules_over_pty() -> None:
+    farm = SlaveFarm.from_configs(CONFIGS)
+    bus = farm.add_bus({1: "ac_switch", 2: "iarduino"}, values={1: {"vin": 12000}})
+    noisy = farm.add_bus({3: "ac_switch"}, behaviour=SlaveBehaviour(crc_error_rate=1.0), seed=1)
+    with farm:
+        transport = open_transport(bus.path, baudrate=115200, timeout=0.2)
+        try:
+            vin = await transport.transact(append_crc(bytes([1, 4, 0, 0, 0, 1])), timeout=0.5)
+            assert vin == append_crc(bytes([1, 4, 2, 0x2E, 0xE0]))
+            # ac_switch has no holding register 0; iarduino maps user_data at 0x120.
+            assert await transport.transact(append_crc(bytes([1, 3, 0, 0, 0, 1])), timeout=0.5) == append_crc(
+                bytes([1, 0x83, 2])
+            )
+            write = append_crc(bytes([2, 16, 0x01, 0x20, 0, 1, 2, 0xBE, 0xEF]))
+            assert await transport.transact(write, timeout=0.5) == append_crc(bytes([2, 16, 0x01, 0x20, 0, 1]))
+            readback = await transport.transact(append_crc(bytes([2, 3, 0x01, 0x20, 0, 1])), timeout=0.5)
+            assert readback == append_crc(bytes([2, 3, 2, 0xBE, 0xEF]))
+            assert await transport.transact(append_crc(bytes([9, 3, 0, 0, 0, 1])), timeout=0.05) == b""
+        finally:
+            transport.close()
+        transport = open_transport(noisy.path, baudrate=115200, timeout=0.2)
+        try:
+            corrupted = await transport.transact(append_crc(bytes([3, 4, 0, 0, 0, 1])), timeout=0.5)
+            assert len(corrupted) == 7 and not check_crc(corrupted)
+        finally:
+            transport.close()
+    assert bus.stats()[2]["replies"] == 2
+    assert noisy.stats()[3]["crc_errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_scanner_identifies_simulated_slaves() -> None:
+    farm = SlaveFarm.from_configs(CONFIGS)
+    bus = farm.add_bus({2: "ac_switch", 5: "iarduino"})
+
+    class Catalog:
+        def list_modules(self) -> List[Dict[str, Any]]:
+            return [record for record in farm.catalog.values() if record["kind"] == "module"]
+
+        def list_module_types(self) -> List[Dict[str, Any]]:
+            return [record for record in farm.catalog.values() if record["kind"] == "module_type"]
+
+    context = BootstrapContext(config=AppConfig())
+    context.state["module_config_service"] = Catalog()
+    scanner = ModbusScannerService(context)
+    with farm:
+        await scanner.start()
+        job = await scanner.start_scan(
+            port=bus.path,
+            baudrate=115200,
+            start_address=1,
+            end_address=6,
+            register=0x100,
+            timeout=0.05,
+            identify=True,
+        )
+        for _ in range(100):
+            if scanner.get_job(job["id"])["status"] not in ("queued", "running"):
+                break
+            await asyncio.sleep(0.02)
+        finished = scanner.get_job(job["id"])
+        await scanner.stop()
+    assert finished["status"] == "completed"
+    identified = [(r["address"], r["device_type_slug"]) for r in finished["results"]]
+    assert identified == [(2, "ac_switch"), (5, "iarduino")]
@@ -0,0 +1,13 @@
+from agritroller.modbus.timing import AdaptiveTimeout
+
+
+def test_adaptive_timeout_shrinks_within_bounds() -> None:
+    estimator = AdaptiveTimeout(ceiling=0.5, floor=0.02)
+    assert estimator.current == 0.5
+    for _ in range(10):
+        estimator.observe(0.005)
+    assert estimator.current == 0.02
+    estimator.observe(0.1)
+    assert 0.15 <= estimator.current <= 0.5
+    estimator.observe(2.0)
+    assert estimator.current == 0.5
@@ -0,0 +1,81 @@
+import struct
+
+import pytest
+
+from agritroller.modbus.registers import BlockDecoder, PollPoint, ReadBlock, decode_point
+from agritroller.modbus.transforms import TransformCache, compile_inverse, compile_transform, identity
+
+
+def test_text_transforms_and_chains_compile_to_callables() -> None:
+    assert compile_transform(None) is identity
+    assert compile_transform("passthrough") is identity
+    assert compile_transform("scale:0.001")(12000) == pytest.approx(12.0)
+    assert compile_transform("scale:0.001") is compile_transform("scale:0.001")
+    assert compile_transform("offset:-40")(65) == 25
+    assert compile_transform("scale:0.5")(True) is True
+
+    chain = compile_transform([{"op": "hex_to_int"}, {"op": "scale", "factor": 0.1}])
+    assert chain("00FA") == pytest.approx(25.0)
+    assert chain(250) == pytest.approx(25.0)
+    signed = compile_transform({"op": "hex_to_int", "signed": True, "bits": 16})
+    assert signed(0xFFF6) == -10
+    masked = compile_transform([{"op": "mask", "mask": "0xFF00", "shift": 8}, {"op": "to_float"}])
+    assert masked(0x1234) == 18.0
+    rounded = compile_transform([{"op": "scale", "factor": 0.01}, {"op": "round", "digits": 1}])
+    assert rounded(12340) == 123.4
+
+
+def test_linear_steps_fold_into_one_call() -> None:
+    ops = [{"op": "scale", "factor": 0.1}, {"op": "offset", "value": -40}, {"op": "scale", "factor": 2}]
+    folded = compile_transform(ops)
+    assert folded(650) == pytest.approx(((650 * 0.1) - 40) * 2)
+    assert compile_inverse(ops)(folded(650)) == pytest.approx(650)
+    assert compile_transform([{"op": "scale", "factor": 1}]) is identity
+
+
+def test_invalid_specs_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        compile_transform([{"op": "sqrt"}])
+    with pytest.raises(ValueError):
+        compile_transform({"op": "scale"})
+    with pytest.raises(ValueError):
+        compile_transform("log:2")
+    with pytest.raises(ValueError):
+        compile_inverse([{"op": "round"}])
+
+
+def test_transform_cache_recompiles_only_changed_devices() -> None:
+    cache = TransformCache()
+    first = cache.for_device(1, {"t": "scale:0.1", "h": [{"op": "to_int"}]})
+    assert cache.for_device(1, {"t": "scale:0.1", "h": [{"op": "to_int"}]}) is first
+    changed = cache.for_device(1, {"t": "scale:0.01", "h": [{"op": "to_int"}]})
+    assert changed is not first and changed["t"](100) == pytest.approx(1.0)
+    broken = cache.for_device(2, {"x": [{"op": "nope"}]})
+    assert broken["x"] is identity
+    cache.retain([1])
+    assert len(cache) == 1
+    cache.invalidate(1)
+    assert len(cache) == 0
+
+
+def test_block_decoder_matches_scalar_decoding() -> None:
+    points = [
+        PollPoint("raw", "register", "holding_register", 3, 0, 1),
+        PollPoint("signed", "register", "holding_register", 3, 1, 1, "int16", "scale:0.1"),
+        PollPoint("total", "register", "holding_register", 3, 2, 2, "uint32"),
+        PollPoint("level", "register", "holding_register", 3, 4, 2, "float32", "offset:1"),
+        PollPoint("flag", "register", "holding_register", 3, 6, 1, "bool"),
+    ]
+    block = ReadBlock(3, 0, 7, tuple((point, point.address) for point in points))
+    words = [7, 0xFF9C, 1, 4464, *struct.unpack(">HH", struct.pack(">f", 2.5)), 1]
+    payload = b"".join(word.to_bytes(2, "big") for word in words)
+    decoded = BlockDecoder(block)(payload)
+    assert decoded == {point.name: decode_point(point, words, point.address) for point in points}
+    assert decoded["signed"] == pytest.approx(-10.0) and decoded["level"] == 3.5
+
+    overridden = BlockDecoder(block, {"raw": compile_transform([{"op": "scale", "factor": 10}])})(payload)
+    assert overridden["raw"] == 70
+
+    coils = [PollPoint(f"c{i}", "actuator", "coil", 1, i, 1) for i in range(3)]
+    bits = BlockDecoder(ReadBlock(1, 0, 3, tuple((point, point.address) for point in coils)))
+    assert bits(bytes([0b101])) == {"c0": True, "c1": False, "c2": True}
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import threading
+import tty
+
+import pytest
+
+from agritroller.modbus.crc import append_crc
+from agritroller.modbus.transport import AsyncSerialTransport, ThreadedSerialTransport, open_transport
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="PTY transport tests require POSIX")
+
+
+def _responder(master_fd: int, stop: threading.Event) -> None:
+    """Answer reads from slave 4 and reject every other address with an exception."""
+
+    while not stop.is_set():
+        try:
+            request = os.read(master_fd, 8)
+        except OSError:
+            return
+        if len(request) < 8:
+            continue
+        address, function = request[0], request[1]
+        if address == 4:
+            os.write(master_fd, append_crc(bytes([address, function, 2, 0x01, 0x02])))
+        elif address == 5:
+            os.write(master_fd, append_crc(bytes([address, function | 0x80, 0x02])))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode, expected_cls", [("asyncio", AsyncSerialTransport), ("thread", ThreadedSerialTransport)])
+async def test_transport_round_trip_over_pty(mode: str, expected_cls: type) -> None:
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(master_fd)
+    stop = threading.Event()
+    thread = threading.Thread(target=_responder, args=(master_fd, stop), daemon=True)
+    thread.start()
+    transport = open_transport(os.ttyname(slave_fd), baudrate=115200, timeout=0.2, mode=mode)
+    try:
+        assert isinstance(transport, expected_cls)
+        read = append_crc(bytes([4, 3, 0, 0, 0, 1]))
+        assert await transport.transact(read, timeout=0.5) == append_crc(bytes([4, 3, 2, 1, 2]))
+        exception = await transport.transact(append_crc(bytes([5, 3, 0, 0, 0, 1])), timeout=0.5)
+        assert exception == append_crc(bytes([5, 0x83, 2]))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        assert await transport.transact(append_crc(bytes([6, 3, 0, 0, 0, 1])), timeout=0.05) == b""
+        assert loop.time() - started < 0.5
+    finally:
+        stop.set()
+        transport.close()
+        os.close(master_fd)
+        os.close(slave_fd)
+        thread.join(timeout=1)
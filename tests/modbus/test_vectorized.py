@@ -0,0 +1,60 @@
+import random
+import struct
+
+import pytest
+
+from agritroller.modbus import vectorized
+from agritroller.modbus.registers import BlockDecoder, PollPoint, ReadBlock
+from agritroller.modbus.transforms import compile_transform
+
+
+def _word_block() -> ReadBlock:
+    points = [
+        PollPoint("raw", "register", "holding_register", 3, 0, 1),
+        PollPoint("signed", "register", "holding_register", 3, 1, 1, "int16", "scale:0.1"),
+        PollPoint("total", "register", "holding_register", 3, 2, 2, "uint32"),
+        PollPoint("delta", "register", "holding_register", 3, 4, 2, "int32", "offset:-5"),
+        PollPoint("level", "register", "holding_register", 3, 5, 2, "float32", "scale:2"),
+        PollPoint("flag", "register", "holding_register", 3, 7, 1, "bool"),
+        PollPoint("volts", "sensor", "holding_register", 3, 8, 1, "uint16", "scale:0.001"),
+        PollPoint("temp", "sensor", "holding_register", 3, 9, 1, "int16", "scale:0.1"),
+        PollPoint("status", "sensor", "holding_register", 3, 10, 1),
+    ]
+    return ReadBlock(3, 0, 11, tuple((point, point.address) for point in points))
+
+
+def test_make_decoder_falls_back_without_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(vectorized, "HAVE_NUMPY", False)
+    assert isinstance(vectorized.make_decoder(_word_block()), BlockDecoder)
+
+
+def test_vector_decoder_matches_block_decoder(monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("numpy")
+    block = _word_block()
+    transforms = {"status": compile_transform([{"op": "mask", "mask": 0xF0, "shift": 4}])}
+    assert isinstance(vectorized.make_decoder(block, transforms), BlockDecoder)
+    monkeypatch.setattr(vectorized, "VECTOR_MIN_POINTS", len(block.points))
+    vector = vectorized.make_decoder(block, transforms)
+    assert isinstance(vector, vectorized.VectorBlockDecoder)
+    scalar = BlockDecoder(block, transforms)
+    rng = random.Random(3)
+    for _ in range(50):
+        payload = bytes(rng.getrandbits(8) for _ in range(block.count * 2))
+        expected, actual = scalar(payload), vector(payload)
+        assert actual.keys() == expected.keys()
+        for name, value in expected.items():
+            if isinstance(value, float) and value != value:  # NaN from random float32 bits
+                assert actual[name] != actual[name]
+            else:
+                assert actual[name] == value and type(actual[name]) is type(value), name
+    payload = struct.pack(">HhHHiH", 7, -250, 0, 9, -1, 0) + b"\x00" * 10
+    assert vector(payload)["signed"] == pytest.approx(-25.0)
+
+
+def test_vector_decoder_unpacks_bits() -> None:
+    pytest.importorskip("numpy")
+    points = [PollPoint(f"c{i}", "actuator", "coil", 1, i, 1) for i in range(9)]
+    points.append(PollPoint("group", "actuator", "coil", 1, 9, 3))
+    block = ReadBlock(1, 0, 12, tuple((point, point.address) for point in points))
+    payload = bytes([0b10100101, 0b0101])
+    assert vectorized.VectorBlockDecoder(block)(payload) == BlockDecoder(block)(payload)
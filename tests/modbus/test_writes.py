@@ -0,0 +1,53 @@
+import pytest
+
+from agritroller.modbus.crc import append_crc
+from agritroller.modbus.registers import PollPoint, encode_point
+from agritroller.modbus.writes import build_write_request, plan_writes, readback_values, write_acknowledged
+
+
+def _coil(name: str, address: int) -> PollPoint:
+    return PollPoint(name, "actuator", "coil", 1, address, 1)
+
+
+def _holding(name: str, address: int, **extra: str) -> PollPoint:
+    return PollPoint(name, "register", "holding_register", 3, address, 1, **extra)
+
+
+def test_plan_merges_adjacent_coils_into_one_fc15() -> None:
+    writes = [(_coil(f"channel{i}", i - 1), i % 2 == 1) for i in range(8, 0, -1)]
+    [block] = plan_writes(writes)
+    assert (block.function, block.address, block.values) == (15, 0, (1, 0, 1, 0, 1, 0, 1, 0))
+    assert build_write_request(7, block) == append_crc(bytes([7, 15, 0, 0, 0, 8, 1, 0b01010101]))
+
+
+def test_plan_never_writes_across_holes() -> None:
+    writes = [
+        (_coil("a", 0), True),
+        (_coil("b", 2), True),
+        (_holding("low", 0x10), 1),
+        (_holding("high", 0x11), 2),
+        (_holding("low", 0x10), 3),  # the later write wins
+    ]
+    layout = [(block.function, block.address, block.values) for block in plan_writes(writes)]
+    assert layout == [(5, 0, (1,)), (5, 2, (1,)), (16, 0x10, (3, 2))]
+    with pytest.raises(ValueError):
+        plan_writes([(PollPoint("level", "sensor", "discrete_input", 2, 0, 1), True)])
+
+
+def test_encode_point_inverts_transforms_and_checks_range() -> None:
+    assert encode_point(_holding("setpoint", 0, data_type="int16", transform="scale:0.1"), -12.5) == [0xFF83]
+    assert encode_point(PollPoint("total", "register", "holding_register", 3, 0, 2, "uint32"), 70000) == [1, 4464]
+    assert encode_point(_coil("relay", 0), "on") == [1]
+    with pytest.raises(ValueError):
+        encode_point(_holding("setpoint", 0), 70000)
+    with pytest.raises(ValueError):
+        encode_point(_holding("setpoint", 0), "warm")
+
+
+def test_write_echo_and_readback_are_validated() -> None:
+    [block] = plan_writes([(_holding("a", 4), 10), (_holding("b", 5), 11)])
+    request = build_write_request(3, block)
+    assert write_acknowledged(append_crc(request[:6]), request)
+    assert not write_acknowledged(append_crc(bytes([3, 0x90, 2])), request)
+    assert readback_values(append_crc(bytes([3, 3, 4, 0, 10, 0, 11])), 3, block) == (10, 11)
+    assert readback_values(b"", 3, block) is None
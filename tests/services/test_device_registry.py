@@ -69,3 +69,56 @@ async def test_device_registry_crud(tmp_path: Path) -> None:
 
     await registry_service.stop()
     await db_service.stop()
+
+
+@pytest.mark.asyncio
+async def test_device_registry_bulk_imports_rs485_slaves(tmp_path: Path) -> None:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "registry.db"))
+    context = BootstrapContext(config=config)
+    db_service = DatabaseService(context, config.database)
+    registry_service = DeviceRegistryService(context, config.serial, config.rs485)
+    await db_service.start()
+    await registry_service.start()
+
+    port = config.rs485.port
+    before = len(registry_service.list_devices())
+    imported = registry_service.create_rs485_slaves(
+        [
+            {"port": port, "baudrate": 9600, "address": address, "metadata": {"module_slug": "soil"}}
+            for address in range(1, 41)
+        ]
+    )
+    created = imported["created"]
+    assert len(created) == 40
+    assert len(registry_service.list_devices()) == before + 40
+    assert [device["metadata"]["modbus_address"] for device in created] == list(range(1, 41))
+    assert all(device["port"] == port and device["kind"] == "rs485" for device in created)
+
+    # A clash anywhere in the batch writes nothing.
+    with pytest.raises(ValueError):
+        registry_service.create_rs485_slaves(
+            [{"port": port, "baudrate": 9600, "address": 41}, {"port": port, "baudrate": 9600, "address": 5}]
+        )
+    assert len(registry_service.list_devices()) == before + 40
+
+    again = registry_service.create_rs485_slaves(
+        [{"port": port, "baudrate": 9600, "address": 41}, {"port": port, "baudrate": 9600, "address": 5}],
+        skip_existing=True,
+    )
+    assert [device["metadata"]["modbus_address"] for device in again["created"]] == [41]
+    assert again["skipped"] == [{"port": port, "address": 5}]
+
+    with pytest.raises(ValueError):
+        registry_service.create_device(
+            kind="rs485", name="Twin", port=port, baudrate=9600, metadata={"modbus_address": 7}
+        )
+    extra = registry_service.create_device(
+        kind="rs485", name="Extra", port=port, baudrate=9600, metadata={"modbus_address": 42}
+    )
+    with pytest.raises(ValueError):
+        registry_service.update_device(extra["id"], metadata={"modbus_address": 41})
+    with pytest.raises(ValueError):
+        registry_service.create_rs485_slaves([{"port": config.serial.port, "baudrate": 9600, "address": 1}])
+
+    await registry_service.stop()
+    await db_service.stop()
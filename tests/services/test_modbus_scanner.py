@@ -0,0 +1,195 @@
+import asyncio
+import functools
+from typing import List
+
+import pytest
+
+from agritroller.config import AppConfig, ModbusScannerConfig
+from agritroller.modbus.crc import append_crc
+from agritroller.modbus.transport import ThreadedSerialTransport
+from agritroller.services.base import BootstrapContext
+from agritroller.services.event_bus import EventBusService
+from agritroller.services.modbus_scanner import ModbusScannerService, ScanParams
+
+
+@pytest.mark.asyncio
+async def test_scanner_adaptive_timeout_shortens_silent_probes(scripted_serial) -> None:
+    replies = [append_crc(bytes([1, 3, 2, 0, 1]))] + [b""] * 9
+    ser = scripted_serial(replies)
+    scanner = ModbusScannerService(BootstrapContext(config=AppConfig()))
+    job = {"progress": 0, "results": [], "timeout": 0.5}
+    params = ScanParams(
+        port="/dev/null",
+        baudrate=9600,
+        start_address=1,
+        end_address=10,
+        register=0,
+        function=3,
+        count=1,
+        timeout=0.5,
+        adaptive_timeout=True,
+        min_timeout=0.03,
+    )
+    await scanner._scan_part(ThreadedSerialTransport(ser).transact, job, params)
+    assert len(job["results"]) == 1
+    assert job["timeout"] == 0.03
+    assert abs(ser.waited - 9 * 0.03) < 1e-9
+
+
+@pytest.mark.asyncio
+async def test_discovery_sweeps_ports_in_parallel_and_reuses_serial(monkeypatch, scripted_serial) -> None:
+    slaves = {("/dev/ttyA", 9600): {2}, ("/dev/ttyB", 19200): {5}, ("/dev/ttyB", 9600): {5}}
+    opened: List[str] = []
+
+    class BusSerial(scripted_serial):
+        def __init__(self, **kwargs: object) -> None:
+            super().__init__(**kwargs)
+            opened.append(self.port)
+
+        def reply(self, request: bytes) -> bytes:
+            address = request[0]
+            if address in slaves.get((self.port, self.baudrate), set()):
+                return append_crc(bytes([address, 3, 2, 0, address]))
+            return b""
+
+    monkeypatch.setattr("agritroller.modbus.transport.serial.Serial", BusSerial)
+    scanner = ModbusScannerService(BootstrapContext(config=AppConfig()))
+    await scanner.start()
+    job = await scanner.start_discovery(
+        ports=["/dev/ttyA", "/dev/ttyB"],
+        baudrates=[9600, 19200],
+        start_address=1,
+        end_address=6,
+        register=0,
+        timeout=0.001,
+    )
+    assert job["kind"] == "discovery"
+    assert job["total"] == 24
+    for _ in range(200):
+        if scanner.get_job(job["id"])["status"] == "completed":
+            break
+        await asyncio.sleep(0.01)
+    final = scanner.serialize_job(scanner.get_job(job["id"]))
+    assert final["status"] == "completed"
+    assert final["progress"] == 24
+    found = sorted((r["port"], r["address"]) for r in final["results"])
+    assert found == [("/dev/ttyA", 2), ("/dev/ttyB", 5)]
+    assert sorted(opened) == ["/dev/ttyA", "/dev/ttyB"]
+    await scanner.stop()
+
+
+@pytest.mark.asyncio
+async def test_scan_publishes_events_and_serves_deltas(monkeypatch, scripted_serial) -> None:
+    replies = [append_crc(bytes([1, 3, 2, 0, 7])), b"", append_crc(bytes([3, 3, 2, 0, 8]))]
+    monkeypatch.setattr("agritroller.modbus.transport.serial.Serial", functools.partial(scripted_serial, replies))
+    context = BootstrapContext(config=AppConfig())
+    bus_service = EventBusService(context)
+    await bus_service.start()
+    subscription = await context.state["event_bus"].subscribe()
+    scanner = ModbusScannerService(context, ModbusScannerConfig(progress_event_interval=0))
+    await scanner.start()
+
+    job = await scanner.start_scan(
+        port="/dev/ttyTEST", baudrate=9600, start_address=1, end_address=3, register=0, timeout=0.001
+    )
+    events = []
+    while True:
+        event = await asyncio.wait_for(subscription.get(), timeout=1)
+        events.append(event)
+        if event["type"] == "rs485.scan.progress" and event["payload"]["status"] == "completed":
+            break
+    results = [event["payload"] for event in events if event["type"] == "rs485.scan.result"]
+    assert [(item["index"], item["result"]["address"]) for item in results] == [(0, 1), (1, 3)]
+    assert any(event["payload"].get("progress") == 2 for event in events if event["type"] == "rs485.scan.progress")
+
+    delta = scanner.serialize_job(scanner.get_job(job["id"]), since=1)
+    assert delta["results_offset"] == 1
+    assert delta["result_count"] == 2
+    assert [item["address"] for item in delta["results"]] == [3]
+
+    await subscription.close()
+    await scanner.stop()
+    await bus_service.stop()
+
+
+@pytest.mark.asyncio
+async def test_interactive_reads_overtake_running_scan(monkeypatch, scripted_serial) -> None:
+    class SlowBusSerial(scripted_serial):
+        """Only slave 200 answers; silent probes really sleep for the timeout."""
+
+        def reply(self, request: bytes) -> bytes:
+            return append_crc(bytes([200, 3, 2, 0, 42])) if request[0] == 200 else b""
+
+    monkeypatch.setattr(
+        "agritroller.modbus.transport.serial.Serial", functools.partial(SlowBusSerial, sleep=True)
+    )
+    scanner = ModbusScannerService(BootstrapContext(config=AppConfig()))
+    await scanner.start()
+    job = await scanner.start_scan(
+        port="/dev/ttyTEST", baudrate=9600, start_address=1, end_address=40, register=0, timeout=0.01
+    )
+    await asyncio.sleep(0.05)
+    result = await scanner.read_registers(port="/dev/ttyTEST", baudrate=9600, address=200, register=0)
+    assert result["value"] == 42
+    assert scanner.get_job(job["id"])["status"] == "running"
+
+    stats = scanner.port_stats()[0]
+    assert stats["priorities"]["interactive"]["completed"] == 1
+    assert stats["priorities"]["interactive"]["max_wait_ms"] < 50
+    assert stats["priorities"]["scan"]["submitted"] >= 1
+    assert stats["priorities"]["scan"]["p50_service_ms"] >= 10
+    await scanner.stop()
+
+
+@pytest.mark.asyncio
+async def test_scan_identifies_responders_against_module_configs(scripted_serial) -> None:
+    class CatalogStub:
+        def list_modules(self) -> List[dict]:
+            return [
+                {"slug": slug, "content": {"registers": [{"register_type": "holding_register", "address": addr}]}}
+                for slug, addr in (("pump", 10), ("valve", 20), ("meter", 30))
+            ]
+
+        def list_module_types(self) -> List[dict]:
+            return []
+
+    mapped = {1: 20, 2: 30}
+
+    class CatalogSerial(scripted_serial):
+        def reply(self, request: bytes) -> bytes:
+            address, function, register = request[0], request[1], int.from_bytes(request[2:4], "big")
+            if address not in mapped:
+                return b""
+            if register in (0, mapped[address]):
+                return append_crc(bytes([address, function, 2, 0, 1]))
+            return append_crc(bytes([address, function | 0x80, 0x02]))
+
+    context = BootstrapContext(config=AppConfig())
+    context.state["module_config_service"] = CatalogStub()
+    scanner = ModbusScannerService(context)
+    ser = CatalogSerial()
+    params = ScanParams(
+        port="/dev/null",
+        baudrate=9600,
+        start_address=1,
+        end_address=4,
+        register=0,
+        function=3,
+        count=1,
+        timeout=0.01,
+        identify=True,
+    )
+    job = {"progress": 0, "results": [], "_fingerprints": scanner._fingerprint_plan()}
+    await scanner._scan_part(ThreadedSerialTransport(ser).transact, job, params)
+    assert [(r["address"], r["device_type_slug"]) for r in job["results"]] == [(1, "valve"), (2, "meter")]
+    # Four sweep probes plus at most log2(3) splits and one confirming read per responder.
+    assert len(ser.written) <= 4 + 2 * 3
+
+
+@pytest.mark.asyncio
+async def test_identify_requires_module_configs() -> None:
+    scanner = ModbusScannerService(BootstrapContext(config=AppConfig()))
+    with pytest.raises(ValueError):
+        await scanner.start_scan(
+            port="/dev/null", baudrate=9600, start_address=1, end_address=2, register=0, identify=True
+        )
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from agritroller.modbus.registers import PollPoint, ReadBlock
+from agritroller.services.poll_scheduler import BusSchedule, PollTiming, transaction_time
+
+
+def test_transaction_time_scales_with_baudrate() -> None:
+    point = PollPoint("t", "sensor", "input_register", 4, 0, 2)
+    block = ReadBlock(4, 0, 2, ((point, 0),))
+    slow = transaction_time(block, 9600, turnaround=0.005)
+    fast = transaction_time(block, 115200, turnaround=0.005)
+    # 17 characters plus two 3.5T gaps at 9600 baud, about 28 ms with the turnaround.
+    assert slow == pytest.approx(17 * 11 / 9600 + 2 * 3.5 * 11 / 9600 + 0.005)
+    # Above 19200 baud the 3.5T gap is fixed at 1.75 ms.
+    assert fast == pytest.approx(17 * 11 / 115200 + 2 * 0.00175 + 0.005)
+
+
+def test_fit_stretches_least_urgent_first() -> None:
+    critical = PollTiming(requested=0.1, priority=0, cost=0.02)
+    normal = PollTiming(requested=0.1, cost=0.02)
+    background = [PollTiming(requested=0.5, priority=20, cost=0.05) for _ in range(4)]
+    schedule = BusSchedule(capacity=0.8, max_stretch=10)
+    schedule.fit([critical, normal, *background])
+
+    assert schedule.requested_utilization == pytest.approx(0.8)
+    assert not schedule.overloaded
+    assert all(timing.effective == timing.requested for timing in (critical, normal, *background))
+
+    schedule.fit([critical, normal, *background], fixed_load=0.2)
+    assert critical.effective == normal.effective == pytest.approx(0.1)
+    assert background[0].effective == pytest.approx(0.5 * 0.4 / 0.2)
+    assert schedule.utilization == pytest.approx(0.8)
+
+
+def test_fit_reports_overload_once_every_level_is_stretched() -> None:
+    timings = [PollTiming(requested=0.1, priority=p, cost=0.1) for p in (0, 1)]
+    schedule = BusSchedule(capacity=0.5, max_stretch=2)
+    schedule.fit(timings)
+    assert schedule.overloaded
+    assert [timing.effective for timing in timings] == pytest.approx([0.2, 0.2])
+    assert schedule.utilization == pytest.approx(1.0)
+
+
+def test_timing_tracks_achieved_rate_and_overruns() -> None:
+    timing = PollTiming(requested=1.0)
+    timing.complete(0.1)
+    timing.complete(1.1)
+    assert timing.next_due == pytest.approx(2.1)
+    assert timing.achieved == pytest.approx(1.0)
+    timing.complete(3.5)  # finished after the 2.1 deadline had already passed
+    assert timing.overruns == 1
+    assert timing.next_due == pytest.approx(3.5)
+    due = {1: PollTiming(requested=1.0, next_due=2.0), 2: PollTiming(requested=1.0, priority=0, next_due=2.0)}
+    due[3] = PollTiming(requested=1.0, next_due=5.0)
+    assert BusSchedule.due(due, now=2.5) == [2, 1]
+
+
+def test_first_poll_is_not_an_overrun() -> None:
+    timing = PollTiming(requested=0.5)
+    now = time.monotonic() + 86_400.0  # a host that has been up for a day
+    timing.complete(now)
+    assert timing.overruns == 0
+    assert timing.next_due == pytest.approx(now + 0.5)
+    timing.complete(now + 0.5)
+    assert timing.overruns == 0 and timing.to_dict()["overruns"] == 0
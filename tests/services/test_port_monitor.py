@@ -199,3 +199,64 @@ async def test_port_monitor_handles_missing_from_list(monkeypatch, tmp_path: Pat
     await event_bus.stop()
     await registry.stop()
     await database.stop()
+
+
+@pytest.mark.asyncio
+async def test_port_monitor_probes_shared_port_once(monkeypatch, tmp_path: Path) -> None:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "ports.db"))
+    context = BootstrapContext(config=config)
+
+    database = DatabaseService(context, config.database)
+    monkeypatch.setattr(DeviceRegistryService, "_seed_defaults", lambda self: None)
+    registry = DeviceRegistryService(context, config.serial, config.rs485)
+    event_bus = EventBusService(context)
+    monitor = PortMonitorService(context, config.port_monitor)
+
+    await database.start()
+    await registry.start()
+    await event_bus.start()
+
+    opened: list[str] = []
+
+    class CountingSerial:
+        def __init__(self, *args, port: str, **kwargs) -> None:
+            opened.append(port)
+
+        def __enter__(self) -> "CountingSerial":
+            return self
+
+        def __exit__(self, exc_type, exc, tb) -> None:
+            pass
+
+    monkeypatch.setattr(
+        "agritroller.services.port_monitor.list_ports",
+        SimpleNamespace(comports=lambda: [SimpleNamespace(device="/dev/ttyBUS0")]),
+    )
+    monkeypatch.setattr("agritroller.services.port_monitor.serial.Serial", CountingSerial)
+
+    await monitor.start()
+    imported = registry.create_rs485_slaves(
+        [{"port": "/dev/ttyBUS0", "baudrate": 9600, "address": address} for address in range(1, 11)]
+    )
+    opened.clear()
+    subscription = await context.state["event_bus"].subscribe()
+    refreshed = await monitor.refresh_ports([device["id"] for device in imported["created"]])
+
+    assert opened == ["/dev/ttyBUS0"]
+    assert [device["id"] for device in refreshed] == [device["id"] for device in imported["created"]]
+    assert all(device["status"] == monitor.STATUS_AVAILABLE for device in refreshed)
+    events = [await asyncio.wait_for(subscription.get(), timeout=1) for _ in range(10)]
+    assert [event["type"] for event in events] == ["device.port_status"] * 10
+    notifying = [event for event in events if event.get("notify")]
+    assert len(notifying) == 1
+    assert notifying[0]["notification"]["message"].endswith("(устройств: 10)")
+    await subscription.close()
+
+    opened.clear()
+    await monitor.refresh_all_ports()
+    assert opened == ["/dev/ttyBUS0"]
+
+    await monitor.stop()
+    await event_bus.stop()
+    await registry.stop()
+    await database.stop()
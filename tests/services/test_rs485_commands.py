@@ -0,0 +1,156 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from agritroller.config import AppConfig, DatabaseConfig
+from agritroller.modbus.simulator import SlaveFarm
+from agritroller.services import BootstrapContext, DatabaseService, DeviceRegistryService
+from agritroller.services.modbus_scanner import ModbusScannerService
+from agritroller.services.rs485 import RS485Service
+
+RELAY8 = {
+    "slug": "relay8",
+    "kind": "module",
+    "content": {
+        "actuators": [
+            {
+                "slug": "channels",
+                "registers": [
+                    {"name": f"channel{i}", "register_type": "coil", "address": i - 1, "length": 1}
+                    for i in range(1, 9)
+                ],
+            }
+        ],
+        "sensors": [
+            {
+                "slug": "door",
+                "registers": [{"name": "door", "register_type": "discrete_input", "address": 0, "length": 1}],
+            }
+        ],
+        "registers": [
+            {
+                "name": "setpoint",
+                "register_type": "holding_register",
+                "address": 0x10,
+                "length": 1,
+                "data_type": "int16",
+                "transform": "scale:0.1",
+            }
+        ],
+    },
+}
+
+
+class CatalogStub:
+    revision = 1
+
+    def list_modules(self) -> List[Dict[str, Any]]:
+        return [RELAY8]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(os.name != "posix", reason="PTY simulator requires POSIX")
+async def test_rs485_commands_are_batched_per_slave(tmp_path: Path) -> None:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "commands.db"))
+    config.rs485.poll_enabled = False
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    registry = DeviceRegistryService(context, config.serial, config.rs485)
+    scanner = ModbusScannerService(context, config.modbus_scanner)
+    service = RS485Service(context, config.rs485)
+    context.state["module_config_service"] = CatalogStub()
+
+    farm = SlaveFarm({"relay8": RELAY8})
+    bus = farm.add_bus({4: "relay8"})
+    slave = bus.slaves[4]
+    with farm:
+        await database.start()
+        await registry.start()
+        await scanner.start()
+        await service.start()
+        [device] = registry.create_rs485_slaves(
+            [{"port": bus.path, "baudrate": 9600, "address": 4, "metadata": {"module_slug": "relay8"}}]
+        )["created"]
+
+        result = await service.command(device["id"], {f"channel{i}": True for i in range(1, 9)})
+        assert result["ok"] and result["writes"] == 1 and result["verified"] is None
+        assert slave.stats.requests == 1
+        assert [slave.tables["coil"][i] for i in range(8)] == [1] * 8
+
+        first, second = await asyncio.gather(
+            service.command(device["id"], {"channel1": False, "setpoint": 21.5}),
+            service.command(device["id"], {"channel2": "off"}, verify=True),
+        )
+        assert first == second
+        assert first["values"] == {"channel1": False, "setpoint": 21.5, "channel2": "off"}
+        # One FC15 and one FC16, each read back once.
+        assert first["writes"] == 2 and first["verified"] is True
+        assert slave.stats.requests == 5
+        assert slave.tables["coil"][0] == slave.tables["coil"][1] == 0
+        assert slave.tables["holding_register"][0x10] == 215
+
+        with pytest.raises(ValueError):
+            await service.command(device["id"], {"door": True})
+        with pytest.raises(ValueError):
+            await service.command(device["id"], {"channel9": True})
+        with pytest.raises(LookupError):
+            await service.command(device["id"] + 100, {"channel1": True})
+
+        await service.stop()
+        await scanner.stop()
+        await registry.stop()
+        await database.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(os.name != "posix", reason="PTY simulator requires POSIX")
+async def test_rs485_commands_invert_the_device_mapping(tmp_path: Path) -> None:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "commands.db"))
+    config.rs485.poll_enabled = False
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    registry = DeviceRegistryService(context, config.serial, config.rs485)
+    scanner = ModbusScannerService(context, config.modbus_scanner)
+    service = RS485Service(context, config.rs485)
+    context.state["module_config_service"] = CatalogStub()
+
+    farm = SlaveFarm({"relay8": RELAY8})
+    bus = farm.add_bus({4: "relay8", 5: "relay8"})
+    with farm:
+        await database.start()
+        await registry.start()
+        await scanner.start()
+        await service.start()
+        scaled, rounded = registry.create_rs485_slaves(
+            [
+                {
+                    "port": bus.path,
+                    "baudrate": 9600,
+                    "address": 4,
+                    "metadata": {"module_slug": "relay8"},
+                    # Replaces the register's scale:0.1.
+                    "mapping": {"setpoint": [{"op": "scale", "factor": 0.01}, {"op": "offset", "value": -10}]},
+                },
+                {
+                    "port": bus.path,
+                    "baudrate": 9600,
+                    "address": 5,
+                    "metadata": {"module_slug": "relay8"},
+                    "mapping": {"setpoint": [{"op": "scale", "factor": 0.1}, {"op": "round", "digits": 1}]},
+                },
+            ]
+        )["created"]
+
+        result = await service.command(scaled["id"], {"setpoint": 21.5})
+        assert result["ok"]
+        assert bus.slaves[4].tables["holding_register"][0x10] == 3150
+        with pytest.raises(ValueError):
+            await service.command(rounded["id"], {"setpoint": 21.5})
+
+        await service.stop()
+        await scanner.stop()
+        await registry.stop()
+        await database.stop()
@@ -0,0 +1,187 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from agritroller.config import AppConfig, DatabaseConfig
+from agritroller.modbus.registers import decode_point, points_from_module
+from agritroller.modbus.simulator import SlaveFarm, load_catalog
+from agritroller.services import (
+    BootstrapContext,
+    DatabaseService,
+    DeviceRegistryService,
+    EventBusService,
+    TelemetryService,
+)
+from agritroller.services.modbus_scanner import ModbusScannerService
+from agritroller.services.rs485 import RS485Service
+
+CONFIGS = Path(__file__).resolve().parents[2] / "configs"
+
+
+SPARSE = {
+    "slug": "sparse",
+    "kind": "module",
+    "content": {
+        "registers": [
+            {"name": "low", "register_type": "holding_register", "address": 0, "length": 1},
+            {"name": "high", "register_type": "holding_register", "address": 3, "length": 1},
+        ]
+    },
+}
+
+
+class CatalogStub:
+    def __init__(self) -> None:
+        self.catalog = load_catalog(CONFIGS)
+        self.catalog["sparse"] = SPARSE
+        self.revision = 1
+
+    def list_modules(self) -> List[Dict[str, Any]]:
+        return [record for record in self.catalog.values() if record["kind"] == "module"]
+
+
+def _values(telemetry: TelemetryService, device_id: int) -> Dict[str, Any]:
+    return {point["name"]: point["value"] for point in telemetry.latest.snapshot(device_id=device_id)["points"]}
+
+
+def test_points_cover_sensors_actuators_and_type_registers() -> None:
+    points = {point.name: point for point in points_from_module(load_catalog(CONFIGS)["ac_switch"])}
+    assert points["vin"].kind == "sensor" and points["vin"].function == 4
+    assert points["relay"].kind == "actuator" and points["relay"].function == 1
+    assert points["user_data"].kind == "type_register" and points["user_data"].address == 0x120
+    assert decode_point(points["vin"], [12000, 0]) == pytest.approx(12.0)
+    assert decode_point(points["level_min"], [0, 1], offset=1) is True
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(os.name != "posix", reason="PTY simulator requires POSIX")
+async def test_rs485_service_polls_module_points(tmp_path: Path) -> None:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "poll.db"))
+    config.rs485.poll_timeout = 0.05
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    registry = DeviceRegistryService(context, config.serial, config.rs485)
+    event_bus = EventBusService(context)
+    scanner = ModbusScannerService(context, config.modbus_scanner)
+    telemetry = TelemetryService(context, config.telemetry)
+    service = RS485Service(context, config.rs485)
+    context.state["module_config_service"] = CatalogStub()
+
+    farm = SlaveFarm.from_configs(CONFIGS)
+    bus = farm.add_bus({1: "ac_switch", 2: "ac_switch", 3: "ac_switch"}, values={1: {"vin": 12340}, 2: {"vin": 5000, "relay": 1}})
+    with farm:
+        await database.start()
+        await registry.start()
+        await event_bus.start()
+        await scanner.start()
+        await telemetry.start()
+        imported = registry.create_rs485_slaves(
+            [
+                {
+                    "port": bus.path,
+                    "baudrate": 9600,
+                    "address": address,
+                    "metadata": {"module_slug": "ac_switch"},
+                    "mapping": {"vin": [{"op": "scale", "factor": 0.01}, {"op": "round", "digits": 1}]}
+                    if address == 1
+                    else {},
+                }
+                for address in (1, 2, 3, 9)
+            ]
+        )
+        ids = {device["metadata"]["modbus_address"]: device["id"] for device in imported["created"]}
+        subscription = await event_bus.bus.subscribe()
+        await service.start()
+
+        async def wait_for_values() -> None:
+            while len({point["device_id"] for point in telemetry.latest.snapshot()["points"]}) < 3:
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(wait_for_values(), timeout=5)
+        latest = _values(telemetry, ids[2])
+        assert latest["vin"] == pytest.approx(5.0)
+        assert latest["relay"] is True
+        assert latest["level_max"] is False
+        assert _values(telemetry, ids[9]) == {}
+        # The device mapping replaces the register's scale:0.001.
+        assert _values(telemetry, ids[1])["vin"] == 123.4
+        transforms = service._targets[ids[1]].transforms
+        service.sync_targets()
+        assert service._targets[ids[1]].transforms is transforms
+
+        offline = None
+        while offline is None:
+            event = await asyncio.wait_for(subscription.get(), timeout=5)
+            if event["type"] == "rs485.device.status":
+                offline = event
+        assert offline["payload"] == {"device_id": ids[9], "port": bus.path, "address": 9, "online": False}
+        assert offline["notify"] is True
+
+        stats = service.poll_stats()
+        assert stats["ports"][bus.path]["devices"] == 4
+        assert not stats["ports"][bus.path]["overloaded"]
+        assert {device["address"]: device["online"] for device in stats["devices"]}[9] is False
+
+        registry.delete_device(ids[3])
+        service.sync_targets()
+        assert _values(telemetry, ids[3]) == {}
+
+        await subscription.close()
+        await service.stop()
+        await telemetry.stop()
+        await scanner.stop()
+        await event_bus.stop()
+        await registry.stop()
+        await database.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(os.name != "posix", reason="PTY simulator requires POSIX")
+async def test_rs485_service_splits_blocks_the_slave_refuses(tmp_path: Path) -> None:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "poll.db"))
+    config.rs485.poll_interval = 0.02
+    config.rs485.poll_timeout = 0.05
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    registry = DeviceRegistryService(context, config.serial, config.rs485)
+    scanner = ModbusScannerService(context, config.modbus_scanner)
+    telemetry = TelemetryService(context, config.telemetry)
+    service = RS485Service(context, config.rs485)
+    context.state["module_config_service"] = CatalogStub()
+
+    # Registers 1 and 2 are not mapped, so the merged 0..3 read gets exception 02.
+    farm = SlaveFarm({"sparse": SPARSE})
+    bus = farm.add_bus({5: "sparse"}, values={5: {"low": 11, "high": 33}})
+    with farm:
+        await database.start()
+        await registry.start()
+        await scanner.start()
+        await telemetry.start()
+        registry.create_rs485_slaves(
+            [{"port": bus.path, "baudrate": 9600, "address": 5, "metadata": {"module_slug": "sparse"}}]
+        )
+        await service.start()
+        [target] = service._targets.values()
+        assert [(block.address, block.count) for block in target.blocks] == [(0, 4)]
+
+        async def wait_for_values() -> None:
+            while "high" not in _values(telemetry, target.device_id):
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(wait_for_values(), timeout=5)
+        assert _values(telemetry, target.device_id) == {"low": 11, "high": 33}
+        assert [(block.address, block.count) for block in target.blocks] == [(0, 1), (3, 1)]
+        # The refused merged read decoded nothing: a failure, not a completed poll.
+        assert target.failures == 1
+        assert target.timing.completed == target.polls - 1
+        service.sync_targets()
+        assert len(service._targets[target.device_id].blocks) == 2
+
+        await service.stop()
+        await telemetry.stop()
+        await scanner.stop()
+        await registry.stop()
+        await database.stop()
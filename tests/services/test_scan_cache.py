@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import pytest
+
+from agritroller.config import AppConfig, DatabaseConfig, ModbusScannerConfig
+from agritroller.modbus.crc import append_crc
+from agritroller.modbus.transport import ThreadedSerialTransport
+from agritroller.services.base import BootstrapContext
+from agritroller.services.database import DatabaseService
+from agritroller.services.modbus_scanner import ModbusScannerService
+
+
+def _scan_kwargs(mode: str, **extra: object) -> dict:
+    return dict(
+        port="/dev/ttyCACHE",
+        baudrate=9600,
+        parity="N",
+        start_address=1,
+        end_address=5,
+        register=0,
+        function=3,
+        count=1,
+        timeout=0.01,
+        adaptive_timeout=False,
+        min_timeout=None,
+        max_timeout=None,
+        mode=mode,
+        **extra,
+    )
+
+
+@pytest.mark.asyncio
+async def test_address_cache_orders_and_skips_after_restart(tmp_path: Path, scripted_serial) -> None:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "cache.db"))
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    await database.start()
+
+    scanner = ModbusScannerService(context)
+    params = scanner._make_params(**_scan_kwargs("full"))
+    job = scanner._new_job("scan", [params], port=params.port)
+    class OneSlaveSerial(scripted_serial):
+        def reply(self, request: bytes) -> bytes:
+            return append_crc(bytes([4, 3, 2, 0, 1])) if request[0] == 4 else b""
+
+    ser = OneSlaveSerial()
+    await scanner._scan_part(ThreadedSerialTransport(ser).transact, job, params)
+    scanner._finish_part(job)
+    assert await scanner.address_cache.flush() == 5
+    assert [request[0] for request in ser.written] == [1, 2, 3, 4, 5]
+
+    restarted = ModbusScannerService(context)
+    quick = restarted._make_params(**_scan_kwargs("quick"))
+    assert quick.address_list() == [4, 1, 2, 3, 5]
+    skip = restarted._make_params(**_scan_kwargs("skip"))
+    assert (skip.address_list(), skip.skipped) == ([4], 4)
+    forced = restarted._make_params(**_scan_kwargs("skip", force=True))
+    assert forced.address_list() == [1, 2, 3, 4, 5]
+    other_baud = restarted._make_params(**{**_scan_kwargs("skip"), "baudrate": 19200})
+    assert other_baud.address_list() == [1, 2, 3, 4, 5]
+
+    assert restarted.clear_address_cache("/dev/ttyCACHE") == 5
+    assert restarted._make_params(**_scan_kwargs("skip")).skipped == 0
+    await database.stop()
+
+
+@pytest.mark.asyncio
+async def test_address_cache_entries_expire() -> None:
+    scanner = ModbusScannerService(BootstrapContext(config=AppConfig()), ModbusScannerConfig(address_cache_ttl=60))
+    scanner.address_cache.record("/dev/ttyX", 9600, "N", 1, False)
+    assert scanner.address_cache.lookup("/dev/ttyX", 9600, "N", 1) is False
+    line = scanner.address_cache._lines[("/dev/ttyX", 9600, "N")]
+    line[1] = (False, line[1][1] - 120)
+    assert scanner.address_cache.lookup("/dev/ttyX", 9600, "N", 1) is None
+    with pytest.raises(ValueError):
+        scanner._make_params(**_scan_kwargs("bogus"))
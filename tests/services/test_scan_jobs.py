@@ -0,0 +1,175 @@
+import asyncio
+import functools
+from pathlib import Path
+
+import pytest
+
+from agritroller.config import AppConfig, DatabaseConfig, ModbusScannerConfig
+from agritroller.services.base import BootstrapContext
+from agritroller.services.database import DatabaseService
+from agritroller.services.modbus_scanner import ModbusScannerService
+
+
+def _finished_job(scanner: ModbusScannerService, index: int) -> dict:
+    job = scanner._new_job("scan", [], port="/dev/ttyUSB0")
+    job["started_at"] = 1000.0 + index
+    job["results"] = [{"address": index, "raw": "00" * 8}]
+    job["status"] = "running"
+    return job
+
+
+@pytest.mark.asyncio
+async def test_job_store_evicts_and_archives(tmp_path: Path) -> None:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "scan.db"))
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    await database.start()
+    scanner = ModbusScannerService(context, ModbusScannerConfig(max_jobs=3, max_archived_jobs=4))
+    await scanner.start()
+
+    jobs = []
+    for index in range(6):
+        job = _finished_job(scanner, index)
+        scanner.jobs.add(job)
+        scanner._finish_part(job)
+        jobs.append(job)
+    running = _finished_job(scanner, 10)
+    scanner.jobs.add(running)
+    # Nothing is evicted before its row is committed.
+    assert len(scanner.jobs) == 7
+    assert await scanner.jobs.flush() == 6
+
+    assert len(scanner.jobs) == 3
+    assert running["id"] in scanner.jobs
+    assert jobs[0]["id"] not in scanner.jobs
+
+    archived = scanner.get_job(jobs[2]["id"])
+    assert archived and archived["archived"] is True
+    assert archived["results"] == [{"address": 2, "raw": "0000000000000000"}]
+    assert scanner.get_job(jobs[0]["id"]) is None  # trimmed by max_archived_jobs
+
+    page = scanner.list_jobs(offset=0, limit=2)
+    assert page["total"] == 5
+    assert [item["status"] for item in page["items"]] == ["running", "completed"]
+    assert "results" not in page["items"][1]
+    assert page["items"][1]["result_count"] == 1
+    rest = scanner.list_jobs(offset=2, limit=10)
+    assert len(rest["items"]) == 3
+
+    await scanner.stop()
+    await database.stop()
+
+
+def test_job_store_expires_finished_jobs_by_age() -> None:
+    scanner = ModbusScannerService(
+        BootstrapContext(config=AppConfig()),
+        ModbusScannerConfig(max_job_age=60, archive_completed=False),
+    )
+    job = _finished_job(scanner, 0)
+    scanner.jobs.add(job)
+    scanner._finish_part(job)
+    assert job["id"] in scanner.jobs
+    scanner.jobs.prune(now=job["finished_at"] + 61)
+    assert job["id"] not in scanner.jobs
+    assert scanner.list_jobs()["total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_job_store_archives_and_expires_on_timer(tmp_path: Path) -> None:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "scan.db"))
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    await database.start()
+    scanner = ModbusScannerService(context, ModbusScannerConfig(max_job_age=0.05, archive_interval=0.01))
+    await scanner.start()
+    job = _finished_job(scanner, 0)
+    scanner.jobs.add(job)
+    scanner._finish_part(job)
+    assert job["id"] in scanner.jobs
+    assert scanner.list_jobs()["total"] == 1
+
+    await asyncio.sleep(0.2)
+    assert job["id"] not in scanner.jobs
+    assert scanner.get_job(job["id"])["archived"] is True
+    assert scanner.list_jobs()["total"] == 1
+    await scanner.stop()
+    await database.stop()
+
+
+async def _wait_for_status(scanner: ModbusScannerService, job_id: str, *statuses: str) -> dict:
+    for _ in range(300):
+        job = scanner.get_job(job_id)
+        if job and job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {statuses}")
+
+
+@pytest.mark.asyncio
+async def test_paused_scan_resumes_after_restart(tmp_path: Path, monkeypatch, scripted_serial) -> None:
+    silent_bus = functools.partial(scripted_serial, sleep=True)
+    monkeypatch.setattr("agritroller.modbus.transport.serial.Serial", silent_bus)
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "scan.db"))
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    await database.start()
+    scanner = ModbusScannerService(context, ModbusScannerConfig(transport="thread"))
+    await scanner.start()
+
+    job = await scanner.start_scan(
+        port="/dev/ttySIM", baudrate=9600, start_address=1, end_address=40, register=0, timeout=0.005
+    )
+    await asyncio.sleep(0.05)
+    assert (await scanner.pause_job(job["id"]))["pause_requested"] is True
+    paused = await _wait_for_status(scanner, job["id"], "paused")
+    progress = paused["progress"]
+    assert 0 < progress < 40
+    serialized = scanner.serialize_job(paused)
+    assert serialized["remaining"] == 40 - progress
+    assert serialized["next_addresses"] == {"/dev/ttySIM@9600N": progress + 1}
+    assert scanner.list_jobs()["total"] == 1
+    await scanner.stop()
+
+    restarted = ModbusScannerService(context, ModbusScannerConfig(transport="thread"))
+    await restarted.start()
+    assert restarted.get_job(job["id"])["status"] == "paused"
+    with pytest.raises(LookupError):
+        await restarted.pause_job(job["id"])
+    await restarted.resume_job(job["id"])
+    done = await _wait_for_status(restarted, job["id"], "completed")
+    assert done["progress"] == 40
+    assert restarted.list_jobs()["total"] == 1
+    with pytest.raises(ValueError):
+        await restarted.cancel_job(job["id"])
+    await restarted.stop()
+    await database.stop()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_checkpoints_running_scan_and_cancel_discards_it(
+    tmp_path: Path, monkeypatch, scripted_serial
+) -> None:
+    silent_bus = functools.partial(scripted_serial, sleep=True)
+    monkeypatch.setattr("agritroller.modbus.transport.serial.Serial", silent_bus)
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "scan.db"))
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    await database.start()
+    scanner = ModbusScannerService(context, ModbusScannerConfig(transport="thread"))
+    await scanner.start()
+    job = await scanner.start_scan(
+        port="/dev/ttySIM", baudrate=9600, start_address=1, end_address=40, register=0, timeout=0.005
+    )
+    await asyncio.sleep(0.03)
+    await scanner.stop()
+
+    restarted = ModbusScannerService(context, ModbusScannerConfig(transport="thread"))
+    await restarted.start()
+    assert restarted.get_job(job["id"])["status"] == "paused"
+    cancelled = await restarted.cancel_job(job["id"])
+    assert cancelled["status"] == "cancelled"
+    assert restarted.get_job(job["id"])["status"] == "cancelled"
+    with pytest.raises(ValueError):
+        await restarted.resume_job(job["id"])
+    await restarted.stop()
+    await database.stop()
@@ -0,0 +1,92 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from agritroller.config import AppConfig, DatabaseConfig
+from agritroller.services import BootstrapContext, DatabaseService, TelemetryService
+
+
+async def _start(tmp_path: Path, **overrides: object) -> tuple[DatabaseService, TelemetryService]:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "telemetry.db"))
+    for key, value in overrides.items():
+        setattr(config.telemetry, key, value)
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    telemetry = TelemetryService(context, config.telemetry)
+    await database.start()
+    await telemetry.start()
+    return database, telemetry
+
+
+@pytest.mark.asyncio
+async def test_telemetry_commits_batches_by_row_count(tmp_path: Path) -> None:
+    database, telemetry = await _start(tmp_path, flush_interval=60.0, flush_rows=100)
+    conn = database.connection
+    assert conn is not None
+
+    for second in range(60):
+        values = {"vin": 12.5, "relay": True, "mode": "auto", "bad": float("nan")}
+        assert telemetry.record(7, values, timestamp=second) == 2
+    # 120 samples crossed flush_rows once; the flusher commits them in one go.
+    for _ in range(100):
+        if telemetry.flushes:
+            break
+        await asyncio.sleep(0.01)
+    assert telemetry.flushes == 1 and telemetry.written == 120
+    assert conn.execute("SELECT COUNT(*) FROM telemetry").fetchone()[0] == 120
+
+    telemetry.record(7, {"vin": 13.0}, timestamp=59)  # same timestamp replaces the sample
+    telemetry.record(8, {"vin": 1.0}, timestamp=0)
+    await telemetry.stop()
+    rows = conn.execute(
+        """
+        SELECT p.device_id, p.name, t.ts, t.value
+        FROM telemetry t JOIN telemetry_points p ON p.id = t.point_id
+        WHERE t.ts = 59000 OR p.device_id = 8
+        ORDER BY p.device_id, p.name
+        """
+    ).fetchall()
+    assert [tuple(row) for row in rows] == [(7, "relay", 59000, 1.0), (7, "vin", 59000, 13.0), (8, "vin", 0, 1.0)]
+    assert set(telemetry.point_ids(7)) == {(7, "relay"), (7, "vin")}
+    await database.stop()
+
+
+@pytest.mark.asyncio
+async def test_telemetry_flushes_on_interval_and_caps_buffer(tmp_path: Path) -> None:
+    database, telemetry = await _start(tmp_path, flush_interval=0.05, flush_rows=10_000, max_buffer=5)
+    telemetry.record(1, {f"p{i}": i for i in range(8)}, timestamp=1)
+    assert telemetry.stats()["buffered"] == 5 and telemetry.dropped == 3
+    for _ in range(100):
+        if telemetry.written:
+            break
+        await asyncio.sleep(0.01)
+    assert telemetry.written == 5
+    names = {name for _, name in telemetry.point_ids(1)}
+    assert names == {"p3", "p4", "p5", "p6", "p7"}
+    await telemetry.stop()
+    await database.stop()
+
+
+@pytest.mark.asyncio
+async def test_telemetry_range_is_downsampled(tmp_path: Path) -> None:
+    database, telemetry = await _start(tmp_path, flush_interval=60.0, range_chunk_rows=100)
+    for second in range(2000):
+        telemetry.record(3, {"temp": 20 + (second % 60) / 10, "hum": 50.0}, timestamp=second)
+    await telemetry.flush()
+
+    result = await telemetry.query_range(3, ["temp"], start=0, end=2000, points=50)
+    assert [series["name"] for series in result["series"]] == ["temp"]
+    data = result["series"][0]["data"]
+    assert 2 < len(data) <= 50 and data[0] == [0, 20.0] and data[-1] == [1_999_000, 20 + 1999 % 60 / 10]
+
+    buckets = await telemetry.query_range(3, start=0, end=1000, points=10, mode="minmax")
+    assert buckets["columns"] == ["ts", "min", "max", "avg", "count"]
+    hum, temp = buckets["series"]
+    assert hum["name"] == "hum" and len(temp["data"]) == 10
+    assert temp["data"][0] == pytest.approx([0, 20.0, 25.9, 22.55, 100])
+
+    with pytest.raises(ValueError):
+        await telemetry.query_range(3, start=0, end=10, mode="spline")
+    await telemetry.stop()
+    await database.stop()
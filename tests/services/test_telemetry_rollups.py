@@ -0,0 +1,103 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from agritroller.config import AppConfig, DatabaseConfig
+from agritroller.services import BootstrapContext, DatabaseService, TelemetryRollupService, TelemetryService
+
+DAY = 86_400
+BASE = 19_676 * DAY  # midnight UTC
+
+
+@pytest.mark.asyncio
+async def test_rollups_are_incremental_and_feed_range_queries(tmp_path: Path) -> None:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "rollups.db"))
+    config.telemetry.flush_interval = 60.0
+    config.telemetry.retention_batch_rows = 1000
+    config.telemetry.archive_enabled = False
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    telemetry = TelemetryService(context, config.telemetry)
+    rollups = TelemetryRollupService(context, config.telemetry)
+    await database.start()
+    await telemetry.start()
+    conn = database.connection
+    assert conn is not None
+
+    for second in range(7200):
+        telemetry.record(1, {"temp": second % 120}, timestamp=BASE + second)
+    await telemetry.flush()
+
+    result = await rollups.run_once(now=BASE + 7200 + config.telemetry.rollup_delay)
+    assert result["rolled"] == {"1m": 120, "1h": 2, "1d": 0}
+    minute = conn.execute(
+        "SELECT min_value, max_value, avg_value, count, last_value FROM telemetry_rollups WHERE period = 60000"
+    ).fetchone()
+    hour = conn.execute(
+        "SELECT min_value, max_value, avg_value, count, last_value FROM telemetry_rollups WHERE period = 3600000"
+    ).fetchone()
+    assert tuple(minute) == (0, 59, 29.5, 60, 59) and tuple(hour) == (0, 119, 59.5, 3600, 119)
+    # Nothing new below the watermarks: nothing is rolled again.
+    again = await rollups.run_once(now=BASE + 7200 + config.telemetry.rollup_delay)
+    assert again["rolled"] == {"1m": 0, "1h": 0, "1d": 0}
+
+    fine = await telemetry.query_range(1, start=BASE, end=BASE + 7200, points=10, mode="minmax")
+    assert [source["tier"] for source in fine["sources"]] == ["1m"]
+    assert [row[4] for row in fine["series"][0]["data"]] == [720] * 10
+    coarse = await telemetry.query_range(1, start=BASE, end=BASE + DAY, points=12, mode="minmax")
+    assert [source["tier"] for source in coarse["sources"]] == ["1h", "raw"]
+    assert coarse["series"][0]["data"] == [[BASE * 1000, 0, 119, 59.5, 7200]]
+
+    # Three weeks later raw samples are past retention; the rollups stay.
+    late = await rollups.run_once(now=BASE + 21 * DAY)
+    assert late["rolled"]["1d"] == 1
+    assert late["deleted"]["raw"] == 7200 and late["deleted"]["1m"] == 0
+    assert conn.execute("SELECT COUNT(*) FROM telemetry").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM telemetry_rollups WHERE period = 60000").fetchone()[0] == 120
+    assert rollups.stats()["watermarks"]["1d"] == (BASE + 20 * DAY) * 1000
+
+    await telemetry.stop()
+    await database.stop()
+
+
+@pytest.mark.asyncio
+async def test_rollups_wait_for_requeued_samples(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "late.db"))
+    config.telemetry.flush_interval = 60.0
+    config.telemetry.archive_enabled = False
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    telemetry = TelemetryService(context, config.telemetry)
+    rollups = TelemetryRollupService(context, config.telemetry)
+    await database.start()
+    await telemetry.start()
+
+    for second in range(600):
+        telemetry.record(1, {"temp": 1.0}, timestamp=BASE + second)
+    await telemetry.flush()
+    for second in range(600, 1200):
+        telemetry.record(1, {"temp": 2.0}, timestamp=BASE + second)
+    write = telemetry._write
+
+    def fail(batch: object) -> None:
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(telemetry, "_write", fail)
+    assert await telemetry.flush() == 0
+    assert telemetry.oldest_unflushed() == (BASE + 600) * 1000
+
+    # Well past rollup_delay, but the re-queued minutes are still held back.
+    first = await rollups.run_once(now=BASE + 3600)
+    assert first["rolled"]["1m"] == 10
+    monkeypatch.setattr(telemetry, "_write", write)
+    assert await telemetry.flush() == 600
+    second = await rollups.run_once(now=BASE + 3600)
+    assert second["rolled"]["1m"] == 10
+    conn = database.connection
+    assert conn is not None
+    minutes = conn.execute("SELECT COUNT(*), SUM(count) FROM telemetry_rollups WHERE period = 60000").fetchone()
+    assert tuple(minutes) == (20, 1200)
+
+    await telemetry.stop()
+    await database.stop()
@@ -0,0 +1,68 @@
+import math
+
+import pytest
+
+from agritroller.telemetry.downsample import HAVE_NUMPY, bucket_width, lttb, minmax_buckets
+
+
+def _series(count: int) -> list[tuple[int, float]]:
+    rows = [(second * 1000, math.sin(second / 50) * 10) for second in range(count)]
+    rows[777] = (777_000, 95.0)  # a spike that must survive downsampling
+    return rows
+
+
+def _chunks(rows: list[tuple[int, float]], size: int) -> list[list[tuple[int, float]]]:
+    return [rows[index : index + size] for index in range(0, len(rows), size)]
+
+
+def _flat(buckets: list[tuple[float, ...]]) -> list[float]:
+    return [item for bucket in buckets for item in bucket]
+
+
+def _samples(rows: list[tuple[int, float]]) -> list[tuple[int, float, float, float, int]]:
+    return [(ts, value, value, value, 1) for ts, value in rows]
+
+
+def test_minmax_buckets_ignore_chunk_boundaries() -> None:
+    rows = _series(3000)
+    width = bucket_width(0, 3_000_000, 100)
+    whole = list(minmax_buckets([_samples(rows)], 0, width, vectorized=False))
+    chunked = list(minmax_buckets(_chunks(_samples(rows), 7), 0, width, vectorized=False))
+
+    assert _flat(whole) == pytest.approx(_flat(chunked))
+    assert len(whole) == 100 and sum(bucket[4] for bucket in whole) == 3000
+    assert max(bucket[2] for bucket in whole) == 95.0
+    first = rows[:30]
+    values = [value for _, value in first]
+    assert whole[0] == pytest.approx((0, min(values), max(values), sum(values) / 30, 30))
+
+    # Re-bucketing aggregates weighs each one by its count.
+    coarse = list(minmax_buckets([whole], 0, width * 50, vectorized=False))
+    assert len(coarse) == 2 and coarse[0][4] == coarse[1][4] == 1500
+    assert coarse[0][3] == pytest.approx(sum(value for _, value in rows[:1500]) / 1500)
+
+
+def test_lttb_keeps_ends_and_spikes_within_budget() -> None:
+    rows = _series(3000)
+    width = bucket_width(0, 3_000_000, 98)
+    picked = list(lttb(_chunks(rows, 64), 0, width, vectorized=False))
+
+    assert len(picked) <= 100
+    assert picked[0] == rows[0] and picked[-1] == rows[-1]
+    assert (777_000, 95.0) in picked
+    assert [ts for ts, _ in picked] == sorted({ts for ts, _ in picked})
+    # At most one sample per bucket passes through untouched.
+    assert list(lttb([rows[:5]], 0, 1000)) == rows[:5]
+    assert list(lttb([], 0, width)) == []
+
+
+@pytest.mark.skipif(not HAVE_NUMPY, reason="NumPy is not installed")
+def test_numpy_reducers_match_python() -> None:
+    rows = _series(5000)
+    width = bucket_width(0, 5_000_000, 40)
+    chunks = _chunks(rows, 333)
+
+    samples = _chunks(_samples(rows), 333)
+    expected = list(minmax_buckets(samples, 0, width, vectorized=False))
+    assert _flat(list(minmax_buckets(samples, 0, width))) == pytest.approx(_flat(expected))
+    assert list(lttb(chunks, 0, width)) == list(lttb(chunks, 0, width, vectorized=False))
@@ -0,0 +1,24 @@
+import math
+import random
+import struct
+
+from agritroller.telemetry.gorilla import decode, encode
+
+
+def test_gorilla_round_trips_exactly() -> None:
+    rng = random.Random(7)
+    timestamps, values = [], []
+    ts, value = 1_700_000_000_000, 21.5
+    for index in range(5000):
+        ts += 1000 + rng.randint(-20, 20) if index != 2500 else 3_600_000
+        value = value if rng.random() < 0.8 else round(value + rng.choice((-0.1, 0.1)), 1)
+        timestamps.append(ts)
+        values.append(value)
+    values[10:14] = [math.nan, -0.0, 1e308, -5e-324]
+    timestamps[-1] = timestamps[-2]  # a repeated timestamp is a negative delta-of-delta
+
+    data = encode(timestamps, values)
+    decoded_ts, decoded_values = decode(b"xx" + data, len(timestamps), offset=2)
+    assert decoded_ts == timestamps
+    assert struct.pack(f">{len(values)}d", *decoded_values) == struct.pack(f">{len(values)}d", *values)
+    assert encode([], []) == b"" and decode(b"", 0) == ([], [])
@@ -0,0 +1,48 @@
+from agritroller.telemetry import LatestValueCache
+
+
+def test_version_only_moves_on_changes() -> None:
+    cache = LatestValueCache()
+    start = cache.version
+    assert cache.update(1, {"temp": 21.5, "relay": False}, timestamp=100.0)
+    first = cache.version
+    assert first == start + 1
+
+    # Identical readings refresh the timestamp but leave the version alone.
+    assert not cache.update(1, {"temp": 21.5, "relay": False}, timestamp=101.0)
+    assert cache.version == first
+    assert cache.snapshot(since=first) == {"version": first, "points": [], "removed": []}
+    assert cache.snapshot()["points"][0]["ts"] == 101000
+
+    # 0 and False compare equal but are different readings.
+    assert cache.update(1, {"relay": 0}, timestamp=102.0)
+    assert cache.update(2, {"temp": 19.0}, timestamp=102.0)
+    changed = cache.snapshot(since=first)
+    assert changed["version"] == first + 2
+    assert [(point["device_id"], point["name"]) for point in changed["points"]] == [(1, "relay"), (2, "temp")]
+    assert len(cache) == 3
+
+
+def test_snapshot_filters_by_device_and_discard_bumps_version() -> None:
+    cache = LatestValueCache()
+    cache.update(1, {"temp": 21.5})
+    cache.update(2, {"temp": 19.0, "hum": 60})
+
+    only = cache.snapshot(device_id=2)
+    assert {point["name"] for point in only["points"]} == {"temp", "hum"}
+    assert cache.snapshot(device_id=9)["points"] == []
+
+    before = cache.version
+    cache.discard([2, 9])
+    assert cache.version == before + 1
+    assert [point["device_id"] for point in cache.snapshot()["points"]] == [1]
+    cache.discard([9])
+    assert cache.version == before + 1
+
+    # A client polling with an older version learns which points went away.
+    delta = cache.snapshot(since=before)
+    assert delta["points"] == []
+    assert sorted((point["device_id"], point["name"]) for point in delta["removed"]) == [(2, "hum"), (2, "temp")]
+    assert cache.snapshot(since=cache.version)["removed"] == []
+    cache.update(2, {"temp": 18.0})
+    assert [point["name"] for point in cache.snapshot(since=before)["removed"]] == ["hum"]
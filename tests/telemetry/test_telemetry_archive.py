@@ -0,0 +1,81 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from agritroller.config import AppConfig, DatabaseConfig
+from agritroller.services import BootstrapContext, DatabaseService, TelemetryRollupService, TelemetryService
+
+DAY = 86_400
+BASE = 19_676 * DAY  # midnight UTC
+
+
+@pytest.mark.asyncio
+async def test_old_samples_move_into_segments(tmp_path: Path) -> None:
+    config = AppConfig(database=DatabaseConfig(path=tmp_path / "archive.db"))
+    config.telemetry.flush_interval = 60.0
+    config.telemetry.max_buffer = 200_000
+    config.telemetry.rollup_batch_periods = 1440
+    config.telemetry.archive_dir = tmp_path / "segments"
+    context = BootstrapContext(config=config)
+    database = DatabaseService(context, config.database)
+    telemetry = TelemetryService(context, config.telemetry)
+    rollups = TelemetryRollupService(context, config.telemetry)
+    await database.start()
+    await telemetry.start()
+    conn = database.connection
+    assert conn is not None
+
+    rng = random.Random(3)
+    humidity, relay, samples = 55.0, False, []
+    for second in range(DAY // 2):
+        ts = BASE + second + rng.randint(0, 5) / 1000
+        # A 0.1-resolution sensor whose last digit moves on nearly every reading.
+        humidity = round(humidity + rng.gauss(0, 0.15), 1)
+        relay = relay if rng.random() < 0.999 else not relay
+        telemetry.record(1, {"hum": humidity, "relay": relay}, timestamp=ts)
+        samples.append([int(ts * 1000), humidity])
+    for minute in range(600):
+        telemetry.record(2, {"temp": 20 + minute / 100}, timestamp=BASE + minute * 60)
+    await telemetry.flush()
+    pages = conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+    result = await rollups.run_once(now=BASE + 3 * DAY)
+    archived = result["archived"]
+    assert archived["days"] == 1 and archived["segments"] == 2 and archived["samples"] == DAY + 600
+    assert result["deleted"]["raw"] == DAY + 600
+    assert conn.execute("SELECT COUNT(*) FROM telemetry").fetchone()[0] == 0
+    assert (tmp_path / "segments" / "1" / "20231115.seg").exists()
+    # The noisy channel takes ~6 bytes a sample against ~23 in SQLite, the relay ~1: about a sixth overall.
+    assert archived["bytes"] * 4 < pages
+
+    # Fine ranges are served from the segments, sample for sample.
+    window = await telemetry.query_range(1, ["hum"], start=BASE, end=BASE + 600, points=1000)
+    assert [source["tier"] for source in window["sources"]] == ["archive"]
+    assert window["series"][0]["data"] == samples[:600]
+    # Wide ranges still come from the rollups.
+    day = await telemetry.query_range(2, start=BASE, end=BASE + DAY, points=100, mode="minmax")
+    assert [source["tier"] for source in day["sources"]] == ["1m"]
+    assert sum(row[4] for row in day["series"][0]["data"]) == 600
+
+    # Samples written behind the watermark are merged into their day's segments, not dropped.
+    telemetry.record(1, {"hum": 99.9}, timestamp=BASE + 100.5)
+    telemetry.record(3, {"temp": 18.0}, timestamp=BASE + 7)
+    await telemetry.flush()
+    assert conn.execute("SELECT COUNT(*) FROM telemetry").fetchone()[0] == 0
+    merged = await rollups.run_once(now=BASE + 3 * DAY)
+    assert merged["archived"]["late"] == 2 and merged["archived"]["days"] == 0
+    assert conn.execute("SELECT COUNT(*) FROM telemetry_late").fetchone()[0] == 0
+    window = await telemetry.query_range(1, ["hum"], start=BASE + 100, end=BASE + 102, points=10)
+    assert window["series"][0]["data"] == [*samples[100:101], [(BASE + 100) * 1000 + 500, 99.9], *samples[101:102]]
+    window = await telemetry.query_range(3, ["temp"], start=BASE, end=BASE + 60, points=10)
+    assert window["series"][0]["data"] == [[(BASE + 7) * 1000, 18.0]]
+    assert rollups.stats()["archive"]["samples"] == DAY + 602
+
+    expired = await rollups.run_once(now=BASE + 400 * DAY)
+    assert expired["deleted"]["archive"] == DAY + 602
+    assert not list((tmp_path / "segments" / "1").glob("*.seg"))
+    assert rollups.stats()["archive"]["segments"] == 0
+
+    await telemetry.stop()
+    await database.stop()